@@ -0,0 +1 @@
+"""This package contains benchmarks of the confipy loading pipeline."""
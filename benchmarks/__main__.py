@@ -0,0 +1,6 @@
+"""Run benchmarks via python -m benchmarks."""
+
+import sys
+import benchmarks.run
+
+sys.exit(benchmarks.run.main())
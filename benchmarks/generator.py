@@ -0,0 +1,124 @@
+"""This module generates synthetic config files for benchmarks."""
+
+import os
+import json
+import yaml
+
+# python 2.7
+try:
+    import configparser
+except ImportError:
+    import ConfigParser as configparser
+
+EXTENSIONS = {"yaml": "yaml", "json": "json", "ini": "ini"}
+
+
+def generate(directory, keys=1000, depth=3, list_size=0, includes=0,
+             chain=0, fmt="yaml"):
+    """Write a synthetic index config file and its included config files.
+
+    Parameters
+    ----------
+    directory: str
+        Directory into which config files are written.
+    keys: int, optional
+        Number of leaf values distributed across the index file and its
+        includes.
+    depth: int, optional
+        Nesting depth of leaf values. INI files always use a depth of 2.
+    list_size: int, optional
+        If larger than 0, every tenth leaf value is a list of this size. INI
+        files store lists as comma separated strings.
+    includes: int, optional
+        Number of config files included by the index file.
+    chain: int, optional
+        Length of a chain of substitutions where each value references its
+        predecessor.
+    fmt: {"yaml", "json", "ini"}, optional
+        Format of the config files.
+
+    Return
+    ------
+    path: str
+        Path to the index config file.
+
+    """
+
+    if fmt == "ini":
+        depth = 2
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    extension = EXTENSIONS[fmt]
+    per_file = keys // (includes + 1)
+
+    index = _tree(keys - per_file * includes, depth, list_size, fmt)
+    for number in range(includes):
+        name = "include_{}.{}".format(number, extension)
+        _write(os.path.join(directory, name),
+               _tree(per_file, depth, list_size, fmt), fmt)
+        _section(index, fmt)["include_{}".format(number)] = (
+            "$include " + name)
+
+    if chain:
+        section = _section(index, fmt)
+        prefix = "general." if fmt == "ini" else ""
+        section["chain_0"] = "/base"
+        for number in range(1, chain):
+            section["chain_{}".format(number)] = "${}chain_{} + /{}".format(
+                prefix, number - 1, number)
+
+    path = os.path.join(directory, "index.{}".format(extension))
+    _write(path, index, fmt)
+    return path
+
+
+def _tree(keys, depth, list_size, fmt):
+    """Build a nested dictionary with given number of leaf values which are
+    all located at given depth."""
+
+    tree = {}
+    width = max(int(round(keys ** (1.0 / depth))), 1)
+
+    for number in range(keys):
+        node = tree
+        for level in range(depth - 1, 0, -1):
+            key = "n{}".format((number // width ** level) % width)
+            node = node.setdefault(key, {})
+
+        value = "value_{}".format(number)
+        if list_size and number % 10 == 0:
+            value = [value] * list_size
+            if fmt == "ini":
+                value = ",".join(value)
+
+        node["k{}".format(number)] = value
+
+    return tree
+
+
+def _section(tree, fmt):
+    """Return the dictionary which receives include statements and
+    substitution chains. INI files require a section."""
+
+    if fmt == "ini":
+        return tree.setdefault("general", {})
+    return tree
+
+
+def _write(path, tree, fmt):
+    """Write nested dictionary in given format."""
+
+    with open(path, "w") as file:
+        if fmt == "yaml":
+            yaml.safe_dump(tree, file, default_flow_style=False)
+        elif fmt == "json":
+            json.dump(tree, file, indent=1)
+        else:
+            cfg_parser = configparser.ConfigParser()
+            for section, values in tree.items():
+                cfg_parser.add_section(section)
+                for key, value in values.items():
+                    cfg_parser.set(section, key, value)
+            cfg_parser.write(file)
@@ -0,0 +1,139 @@
+"""This module times the stages of the confipy loading pipeline on synthetic
+config files and stores the results as json."""
+
+import sys
+import json
+import shutil
+import timeit
+import argparse
+import platform
+import tempfile
+import confipy
+import confipy.reader
+import confipy.parser
+import confipy.converter
+import benchmarks.generator
+
+STAGES = ("read", "flatten", "include", "substitute", "unflatten", "load")
+
+
+def time_stages(path, repeat=5, notation="dot"):
+    """Time each pipeline stage separately on given config file.
+
+    Parameters
+    ----------
+    path: str
+        Path to config file.
+    repeat: int, optional
+        Number of repetitions per stage. The minimum is reported.
+    notation: {"dot", "dict"}, optional
+        Notation used for flattening and unflattening.
+
+    Return
+    ------
+    timings: dict
+        Stage names mapped to seconds.
+
+    """
+
+    read_cfg = confipy.reader.read_config(path)
+    flat_cfg = confipy.converter._flat_dict(read_cfg, notation=notation)
+    included = confipy.parser.include(flat_cfg, path)
+    substituted = confipy.parser.substitute(included)
+
+    stages = {
+        "read": lambda: confipy.reader.read_config(path),
+        "flatten": lambda: confipy.converter._flat_dict(read_cfg,
+                                                        notation=notation),
+        "include": lambda: confipy.parser.include(flat_cfg, path),
+        "substitute": lambda: confipy.parser.substitute(included),
+        "unflatten": lambda: confipy.converter._unflat_dict(
+            substituted, notation=notation),
+        "load": lambda: confipy.load(path, notation=notation)}
+
+    return {stage: min(timeit.repeat(stages[stage], number=1, repeat=repeat))
+            for stage in STAGES}
+
+
+def run(formats=("yaml", "json", "ini"), repeat=5, **params):
+    """Generate config files for each format and time all stages.
+
+    Parameters
+    ----------
+    formats: iterable, optional
+        Config formats to be benchmarked.
+    repeat: int, optional
+        Number of repetitions per stage.
+    params: dict, optional
+        Parameters of benchmarks.generator.generate().
+
+    Return
+    ------
+    results: dict
+        Benchmark parameters, environment information and timings per
+        format.
+
+    """
+
+    results = {"params": dict(params, repeat=repeat),
+               "python": platform.python_version(),
+               "timings": {}}
+
+    for fmt in formats:
+        directory = tempfile.mkdtemp(prefix="confipy_bench_")
+        try:
+            path = benchmarks.generator.generate(directory, fmt=fmt, **params)
+            results["timings"][fmt] = time_stages(path, repeat=repeat)
+        finally:
+            shutil.rmtree(directory)
+
+    return results
+
+
+def compare(results, baseline):
+    """Return ratios of timings relative to baseline timings. Values below 1
+    indicate a speedup."""
+
+    return {fmt: {stage: timings[stage] / baseline["timings"][fmt][stage]
+                  for stage in timings
+                  if baseline["timings"].get(fmt, {}).get(stage)}
+            for fmt, timings in results["timings"].items()}
+
+
+def main(argv=None):
+    """Command line interface, see --help."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--list-size", type=int, default=5)
+    parser.add_argument("--includes", type=int, default=10)
+    parser.add_argument("--chain", type=int, default=100)
+    parser.add_argument("--formats", default="yaml,json,ini",
+                        help="Comma separated config formats.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results to json file.")
+    parser.add_argument("--compare", help="Json file of a previous run.")
+    args = parser.parse_args(argv)
+
+    results = run(formats=args.formats.split(","), repeat=args.repeat,
+                  keys=args.keys, depth=args.depth, list_size=args.list_size,
+                  includes=args.includes, chain=args.chain)
+
+    if args.compare:
+        with open(args.compare) as file:
+            results["ratios"] = compare(results, json.load(file))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    for fmt, timings in sorted(results["timings"].items()):
+        for stage in STAGES:
+            line = "{:<5} {:<11} {:>10.2f} ms".format(fmt, stage,
+                                                     timings[stage] * 1000)
+            if "ratios" in results and stage in results["ratios"][fmt]:
+                line += "  x{:.2f}".format(results["ratios"][fmt][stage])
+            sys.stdout.write(line + "\n")
+
+    return 0
@@ -1,43 +1,321 @@
 """This module provides the index function."""
 
+import os
+import sys
+import timeit
+import functools
+import confipy.cache
+import confipy.stats
 import confipy.reader
+import confipy.stream
 import confipy.converter
 import confipy.parser
+import confipy.lazy
+import confipy.schema
+import confipy.tracking
 
 
 def load(path_or_fp, read_engine="auto", parsers=("include", "substitute"),
-         notation="dot", **kwargs):
+         notation="dot", yaml_engine="auto", lazy=False, config_cache=None,
+         track=False, stats=None, select=None, stream=False, schema=None,
+         read_options=None, **kwargs):
     """Main function to initiate reading, parsing and conversion.
 
     Parameters
     ----------
     path_or_fp: str, file-like
         Path to config file to be read.
-    read_engine: {"auto", "yaml", "json", "configparser"}, optional
+    read_engine: {"auto", "yaml", "json", "configparser", "compiled"},
+                 optional
         Define the read engine to open the config file. By default, the file
-        type is used to infer the correct read engine.
+        type is used to infer the correct read engine. Compiled configs are
+        parsed already, hence parsers are not run again.
     parsers: iterable, optional
         Define parsers to be run on raw config data. Be aware, order matters.
-    notation: {"dot", "dict"}, optional
+        Custom parsers can be added via register_parser().
+    notation: {"dot", "dict", "compact"}, optional
         Define output type of config data. By default, config data provided in
-        dot notation.
+        dot notation. The compact notation stores large configs in flat
+        arrays and provides read-only views with dot and bracket access.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation. By default, the libyaml based
+        C loader is used if available. Otherwise, falls back to the pure
+        python loader.
+    lazy: bool, optional
+        If True, include statements and substitutions are resolved on first
+        access. Included config files are read once their namespace is
+        accessed. Requires dot notation. Use cfg("resolve") to force the
+        resolution of the entire config.
+    config_cache: ConfigCache, optional
+        On-disk cache of parsed configs. If the root config, all its includes
+        and the load options are unchanged, reading and parsing is skipped
+        entirely. Only applies to paths and is ignored for lazy loading.
+    track: bool, optional
+        If True, returns a TrackedConfig which keeps a reverse dependency
+        index of substitutions. Its update() method changes single values
+        and only resolves dependent substitutions again.
+    stats: LoadStats, optional
+        Records wall time per stage, read time and size per config file,
+        substitution passes and lookups as well as cache hits.
+    select: iterable, optional
+        Key chains in dot notation like "database" or "paths.*" whose
+        subtrees are loaded exclusively. Keys may contain shell-style
+        wildcards. Included config files are only read if they are located
+        within selected subtrees or contain referenced values. Supports the
+        include and substitute parsers only and ignores `config_cache`.
+        Cannot be combined with `lazy` or `track`.
+    stream: bool, optional
+        If True, yaml and json files are streamed directly into flattened
+        key chains without building the nested dictionary first. Applies to
+        included config files, too.
+    schema: dict, optional
+        Keys mapped to field types or nested schemas, see
+        confipy.schema.compile_schema(). If given, an instance of the
+        generated class is returned whose fields are slots holding converted
+        values. Raises a SchemaError for missing or invalid values. Cannot be
+        combined with `lazy` or `track`.
+    read_options: dict, optional
+        Keyword arguments passed to the read engine of the root config file,
+        e.g. `{"verify": True}` for compiled configs.
+    kwargs: dict, optional
+        Keyword arguments passed to the parsers, e.g. `include_cache` to
+        share an IncludeCache across several load calls or `include_workers`
+        to read included config files concurrently.
 
     Returns
     -------
-    converted_cfg: {DotNotation, dict}
+    converted_cfg: {DotNotation, dict, CompactNotation, TrackedConfig,
+                    SchemaConfig}
 
     """
 
-    read_cfg = confipy.reader.read_config(path_or_fp, read_engine=read_engine)
+    if select is not None and (lazy or track):
+        raise ValueError("Selected subtrees cannot be used with lazy loading "
+                         "or tracking.")
 
-    flatten_cfg = confipy.converter._flat_dict(read_cfg, notation=notation)
+    if schema is not None:
+        if lazy or track:
+            raise ValueError("Schemas cannot be used with lazy loading or "
+                             "tracking.")
+
+        # schema fields are attributes, hence flatten as for dot notation
+        notation = "dot"
+
+    # compiled configs contain parsed config data
+    if confipy.reader._is_compiled(path_or_fp, read_engine):
+        parsers = ()
+
+    if track:
+        flatten_cfg = _read_flat(path_or_fp, read_engine, yaml_engine,
+                                 notation, stats, stream, read_options)
+        raw_cfg = confipy.parser.parsing_handler([parser for parser in parsers
+                                                  if parser != "substitute"],
+                                                 flatten_cfg,
+                                                 source_path=path_or_fp,
+                                                 yaml_engine=yaml_engine,
+                                                 stats=stats, stream=stream,
+                                                 **kwargs)
+        return confipy.tracking.TrackedConfig(
+            raw_cfg, notation=notation, substitute="substitute" in parsers,
+            stats=stats, **kwargs)
+
+    if lazy or select is not None:
+        if lazy and notation != "dot":
+            raise ValueError("Lazy loading requires dot notation.")
+
+        flatten_cfg = _read_flat(path_or_fp, read_engine, yaml_engine,
+                                 notation, stats, stream, read_options)
+        resolver = confipy.lazy.LazyResolver(flatten_cfg,
+                                             source_path=path_or_fp,
+                                             parsers=parsers,
+                                             yaml_engine=yaml_engine,
+                                             stats=stats, stream=stream,
+                                             **kwargs)
+        if lazy:
+            return resolver.root()
+
+        with confipy.stats.timed(stats, "select"):
+            selected = resolver.select(select)
+        if schema is not None:
+            return _build_schema(schema, "flat", selected, stats)
+        with confipy.stats.timed(stats, "unflatten"):
+            return confipy.converter._unflat_dict(selected, notation=notation,
+                                                  keep_index=True)
+
+    if config_cache is None or hasattr(path_or_fp, "read"):
+        layout, cfg_data = _parse(path_or_fp, read_engine, parsers, notation,
+                                  yaml_engine, stats=stats, stream=stream,
+                                  read_options=read_options, **kwargs)
+    else:
+        options = _cache_options(read_engine, parsers, notation, **kwargs)
+        with confipy.stats.timed(stats, "cache"):
+            cached = config_cache.get(path_or_fp, options)
+        if stats is not None:
+            stats.record_cache("config", cached is not None)
+
+        if cached is not None:
+            layout, cfg_data = cached
+        else:
+            # signatures are taken before reading, hence files changed while
+            # loading are detected
+            signature = confipy.cache.file_signature(path_or_fp,
+                                                     config_cache.key_by)
+            manifest = config_cache.manifest()
+            layout, cfg_data = _parse(path_or_fp, read_engine, parsers,
+                                      notation, yaml_engine,
+                                      include_manifest=manifest, stats=stats,
+                                      stream=stream, read_options=read_options,
+                                      **kwargs)
+            files = [path_or_fp] + [path for _, path in manifest]
+            config_cache.set(path_or_fp, options, files, (layout, cfg_data),
+                             signatures=[signature] + manifest.signatures)
+
+    if schema is not None:
+        return _build_schema(schema, layout, cfg_data, stats)
+
+    if layout == "nested":
+        with confipy.stats.timed(stats, "convert"):
+            return confipy.converter._convert_dict(cfg_data,
+                                                   notation=notation)
+
+    with confipy.stats.timed(stats, "unflatten"):
+        converted_cfg = confipy.converter._unflat_dict(cfg_data,
+                                                       notation=notation,
+                                                       keep_index=True)
+
+    return converted_cfg
+
+
+def _read(path_or_fp, read_engine, yaml_engine, stats=None, notation=None,
+          read_options=None):
+    """Read root config file and record its read time and size. If a
+    notation is given, the config file is streamed into a flattened
+    dictionary instead. Read options are passed to the read engine."""
+
+    if notation is None:
+        reader = confipy.reader.read_config
+    else:
+        reader = functools.partial(confipy.stream.read_flat,
+                                   notation=notation)
+
+    reader = functools.partial(reader, read_engine=read_engine,
+                               yaml_engine=yaml_engine, **(read_options or {}))
+
+    if stats is None:
+        return reader(path_or_fp)
+
+    start = timeit.default_timer()
+    read_cfg = reader(path_or_fp)
+    seconds = timeit.default_timer() - start
+
+    if hasattr(path_or_fp, "read"):
+        path, size = getattr(path_or_fp, "name", None), None
+    else:
+        path, size = path_or_fp, os.path.getsize(path_or_fp)
+
+    stats.record_stage("read", seconds)
+    stats.record_read(path, seconds, size)
+    return read_cfg
+
+
+def _read_flat(path_or_fp, read_engine, yaml_engine, notation, stats=None,
+               stream=False, read_options=None):
+    """Read root config file into a flattened dictionary. Compiled configs
+    are read as stored."""
+
+    if stream or confipy.reader._is_compiled(path_or_fp, read_engine):
+        return _read(path_or_fp, read_engine, yaml_engine, stats, notation,
+                     read_options)
+
+    read_cfg = _read(path_or_fp, read_engine, yaml_engine, stats,
+                     read_options=read_options)
+    with confipy.stats.timed(stats, "flatten"):
+        return confipy.converter._flat_dict(read_cfg, notation=notation)
+
+
+def _parse(path_or_fp, read_engine, parsers, notation, yaml_engine,
+           stats=None, stream=False, read_options=None, **kwargs):
+    """Read and parse config file. See load() for parameter descriptions.
+
+    Returns
+    -------
+    layout: {"nested", "flat"}
+        'nested' if the config data did not require parsing and is returned
+        as read. Otherwise, 'flat' for the parsed flattened dictionary.
+        Compiled configs are returned as stored without parsing.
+    cfg_data: dict
+
+    """
+
+    if confipy.reader._is_compiled(path_or_fp, read_engine):
+        return "flat", _read(path_or_fp, read_engine, yaml_engine, stats,
+                             notation, read_options)
+
+    if stream:
+        flatten_cfg = _read(path_or_fp, read_engine, yaml_engine, stats,
+                            notation, read_options)
+    else:
+        read_cfg = _read(path_or_fp, read_engine, yaml_engine, stats,
+                         read_options=read_options)
+
+        # skip flattening if no value requires parsing
+        if not confipy.parser.requires_parsing(parsers, read_cfg, **kwargs):
+            return "nested", read_cfg
+
+        with confipy.stats.timed(stats, "flatten"):
+            flatten_cfg = confipy.converter._flat_dict(read_cfg,
+                                                       notation=notation)
 
     parsed_cfg = confipy.parser.parsing_handler(parsers,
                                                 flatten_cfg,
                                                 source_path=path_or_fp,
+                                                yaml_engine=yaml_engine,
+                                                stats=stats,
+                                                stream=stream,
                                                 **kwargs)
 
-    converted_cfg = confipy.converter._unflat_dict(parsed_cfg,
-                                                   notation=notation)
+    return "flat", parsed_cfg
 
-    return converted_cfg
+
+def _load_flat(path_or_fp, read_engine="auto",
+               parsers=("include", "substitute"), yaml_engine="auto",
+               **kwargs):
+    """Read and parse config file into a flattened dictionary in dot
+    notation. See load() for parameter descriptions."""
+
+    layout, cfg_data = _parse(path_or_fp, read_engine, parsers, "dot",
+                              yaml_engine, **kwargs)
+    if layout == "nested":
+        return confipy.converter._flat_dict(cfg_data, notation="dot")
+
+    return cfg_data
+
+
+def _build_schema(schema, layout, cfg_data, stats=None):
+    """Build the schema config from parsed config data, see _parse()."""
+
+    if layout == "nested":
+        with confipy.stats.timed(stats, "flatten"):
+            cfg_data = confipy.converter._flat_dict(cfg_data, notation="dot")
+
+    with confipy.stats.timed(stats, "schema"):
+        return confipy.schema.build(schema, cfg_data)
+
+
+def _cache_options(read_engine, parsers, notation, **kwargs):
+    """Return load options which influence the parsed config data. Runtime
+    helpers like caches and worker counts are omitted."""
+
+    options = {key: value for key, value in kwargs.items()
+               if key not in ("include_cache", "include_workers")}
+    options.update(read_engine=read_engine, parsers=tuple(parsers),
+                   notation=notation)
+    return options
+
+
+from confipy.batch import load_many
+from confipy.parser import register_parser
+
+# asyncio support requires python 3.5+
+if sys.version_info >= (3, 5):
+    from confipy.aio import aload
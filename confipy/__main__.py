@@ -0,0 +1,6 @@
+"""Run the command line interface via python -m confipy."""
+
+import sys
+import confipy.cli
+
+sys.exit(confipy.cli.main())
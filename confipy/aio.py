@@ -0,0 +1,165 @@
+"""This module provides the asynchronous index function."""
+
+import asyncio
+import functools
+import collections
+import confipy
+import confipy.stats
+import confipy.reader
+import confipy.converter
+import confipy.parser
+
+ERR_OPTIONS = "Load options not supported by aload(): {}."
+
+# options of load() which require the synchronous loading pipeline
+UNSUPPORTED_OPTIONS = ("lazy", "track", "select", "config_cache", "stream",
+                       "schema")
+
+
+async def aload(path_or_fp, read_engine="auto",
+                parsers=("include", "substitute"), notation="dot",
+                yaml_engine="auto", max_concurrency=8, stats=None,
+                read_options=None, **kwargs):
+    """Asynchronous counterpart of load(). Blocking file operations run in the
+    event loop's default executor. Included config files of the same level
+    are read concurrently.
+
+    Parameters
+    ----------
+    path_or_fp: str, file-like
+        Path to config file to be read.
+    read_engine: {"auto", "yaml", "json", "configparser", "compiled"},
+                 optional
+        Define the read engine to open the config file. By default, the file
+        type is used to infer the correct read engine. Compiled configs are
+        not parsed again.
+    parsers: iterable, optional
+        Define parsers to be run on raw config data. Be aware, order matters.
+    notation: {"dot", "dict"}, optional
+        Define output type of config data. By default, config data provided in
+        dot notation.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation. By default, the libyaml based
+        C loader is used if available.
+    max_concurrency: int, optional
+        Maximum number of config files being read at the same time.
+    stats: LoadStats, optional
+        Records wall time per stage and read time and size per config file.
+    read_options: dict, optional
+        Keyword arguments passed to the read engine of the root config file.
+    kwargs: dict, optional
+        Keyword arguments passed to the parsers. The load() options listed in
+        UNSUPPORTED_OPTIONS raise a TypeError.
+
+    Returns
+    -------
+    converted_cfg: {DotNotation, dict}
+
+    """
+
+    unsupported = sorted(set(kwargs) & set(UNSUPPORTED_OPTIONS))
+    if unsupported:
+        raise TypeError(ERR_OPTIONS.format(", ".join(unsupported)))
+
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_blocking(func, *args, **func_kwargs):
+        async with semaphore:
+            call = functools.partial(func, *args, **func_kwargs)
+            return await loop.run_in_executor(None, call)
+
+    # compiled configs contain parsed config data
+    if confipy.reader._is_compiled(path_or_fp, read_engine):
+        parsed_cfg = await run_blocking(confipy._read, path_or_fp,
+                                        read_engine, yaml_engine, stats,
+                                        notation, read_options)
+        parsers = ()
+    else:
+        read_cfg = await run_blocking(confipy._read, path_or_fp, read_engine,
+                                      yaml_engine, stats,
+                                      read_options=read_options)
+
+        # skip flattening if no value requires parsing
+        if not confipy.parser.requires_parsing(parsers, read_cfg, **kwargs):
+            with confipy.stats.timed(stats, "convert"):
+                return confipy.converter._convert_dict(read_cfg,
+                                                       notation=notation)
+
+        with confipy.stats.timed(stats, "flatten"):
+            parsed_cfg = confipy.converter._flat_dict(read_cfg,
+                                                      notation=notation)
+
+    for parser in parsers:
+        if parser == "include":
+            with confipy.stats.timed(stats, "parse.include"):
+                parsed_cfg = await _include(parsed_cfg, run_blocking,
+                                            source_path=path_or_fp,
+                                            yaml_engine=yaml_engine,
+                                            stats=stats, **kwargs)
+        else:
+            parsed_cfg = confipy.parser.parsing_handler(
+                (parser,), parsed_cfg, source_path=path_or_fp,
+                yaml_engine=yaml_engine, stats=stats, **kwargs)
+
+    with confipy.stats.timed(stats, "unflatten"):
+        converted_cfg = confipy.converter._unflat_dict(parsed_cfg,
+                                                       notation=notation,
+                                                       keep_index=True)
+
+    return converted_cfg
+
+
+async def _include(flattened_dict, run_blocking, source_path=None,
+                   marker="$include", include_cache=None, yaml_engine="auto",
+                   stats=None, **kwargs):
+    """Asynchronous counterpart of confipy.parser.include(). All config files
+    of one include level are read concurrently.
+
+    Parameters
+    ----------
+    flattened_dict: dict
+        Flattened dictionary containing config data.
+    run_blocking: coroutine function
+        Runs blocking functions without blocking the event loop.
+    source_path: str
+        Path to original config file. Necessary for relative includes.
+    marker: str, optional
+        Set keyword to define include values.
+    include_cache: IncludeCache, optional
+        Cache for flattened configs of included files.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation for included yaml files.
+    stats: LoadStats, optional
+        Records read time, size and cache usage of included config files.
+
+    Return
+    ------
+    parsed_dict: dict
+
+    """
+
+    pending = await run_blocking(confipy.parser._find_includes,
+                                 flattened_dict, source_path, marker)
+    if not pending:
+        return dict(flattened_dict)
+
+    loaded = {}
+    payloads = {}
+    while pending:
+        paths = [path for _, path, _ in pending]
+        unique = list(collections.OrderedDict.fromkeys(paths))
+        read = await asyncio.gather(*[
+            run_blocking(confipy.parser._read_include, path,
+                         include_cache=include_cache, yaml_engine=yaml_engine,
+                         stats=stats, payloads=payloads)
+            for path in unique])
+        read = dict(zip(unique, read))
+        results = [read.pop(path) if path in read else
+                   confipy.parser._read_include(path, stats=stats,
+                                                payloads=payloads)
+                   for path in paths]
+        pending = await run_blocking(confipy.parser._collect_includes,
+                                     pending, results, loaded, marker)
+
+    return confipy.parser._merge_includes(flattened_dict, loaded)
@@ -0,0 +1,100 @@
+"""This module provides the batch index function."""
+
+import collections
+import confipy
+import confipy.cache
+
+BatchResult = collections.namedtuple("BatchResult",
+                                     ["path", "config", "error"])
+
+EXECUTORS = ("thread", "process")
+
+# include cache of worker processes, created on first use in each process
+_process_cache = None
+
+
+def load_many(paths, workers=None, executor="thread", include_cache=None,
+              **kwargs):
+    """Load several config files in parallel. Included config files are read
+    and flattened only once per batch for thread executors and once per
+    worker process for process executors.
+
+    Parameters
+    ----------
+    paths: iterable
+        Paths to config files to be read.
+    workers: int, optional
+        Maximum number of threads or processes. By default, the executor's
+        default is used.
+    executor: {"thread", "process"}, optional
+        Run config files in a thread pool or a process pool. Process pools
+        require picklable load options and results.
+    include_cache: IncludeCache, optional
+        Cache shared across the batch for thread executors. By default, a
+        cache with the default maxsize is created for the batch.
+    kwargs: dict, optional
+        Keyword arguments passed to confipy.load().
+
+    Returns
+    -------
+    results: list
+        BatchResult named tuples in the order of paths. Either `config` or
+        `error` is set, hence failing config files do not abort the batch.
+        This includes load options or configs which cannot be transferred
+        between processes.
+
+    """
+
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+    if executor not in EXECUTORS:
+        raise ValueError("Unknown executor '{}'. Use one of {}.".format(
+            executor, EXECUTORS))
+
+    paths = list(paths)
+
+    if executor == "process":
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_load_in_process, path, kwargs)
+                       for path in paths]
+            return [_result(path, future)
+                    for path, future in zip(paths, futures)]
+
+    if include_cache is None:
+        include_cache = confipy.cache.IncludeCache()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda path: _load_one(path, include_cache,
+                                                    kwargs), paths))
+
+
+def _load_one(path, include_cache, kwargs):
+    """Load a single config file and capture errors."""
+
+    try:
+        config = confipy.load(path, include_cache=include_cache, **kwargs)
+    except Exception as error:
+        return BatchResult(path, None, error)
+
+    return BatchResult(path, config, None)
+
+
+def _result(path, future):
+    """Return the result of a worker process and capture errors raised
+    while transferring load options or results, e.g. pickling errors."""
+
+    try:
+        return future.result()
+    except Exception as error:
+        return BatchResult(path, None, error)
+
+
+def _load_in_process(path, kwargs):
+    """Load a single config file within a worker process using the process
+    wide include cache."""
+
+    global _process_cache
+    if _process_cache is None:
+        _process_cache = confipy.cache.IncludeCache()
+
+    return _load_one(path, _process_cache, kwargs)
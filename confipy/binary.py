@@ -0,0 +1,271 @@
+"""This module contains the compact binary config format.
+
+A binary config consists of a header, a table of entries sorted by key
+chain, a blob of encoded key chains and a blob of pickled values. Key chains
+are encoded as utf-8 keys joined by null bytes, hence sorting the encoded key
+chains keeps all key chains of a subtree next to each other. Key chains are
+found by binary search and values are unpickled on access only, so the
+format can be used directly from shared memory or memory mapped files.
+
+"""
+
+import json
+import struct
+import pickle
+import bisect
+import collections
+import six
+import confipy.cache
+
+MAGIC = b"CONFIPY\x00"
+VERSION = 1
+
+# magic, version, count, table, keys, values and metadata offset, metadata
+# length
+HEADER = struct.Struct("<8sHxxIIIIII")
+
+# key offset, key length, value offset and value length
+ENTRY = struct.Struct("<IIII")
+
+SEPARATOR = b"\x00"
+PICKLE_PROTOCOL = 2
+
+ERR_KEY_TYPE = "Binary configs support string keys only, got {!r}."
+ERR_MAGIC = "Buffer does not contain a binary config."
+ERR_VERSION = "Binary config version {} is not supported."
+
+
+def encode(flat_dict, metadata=None):
+    """Serialize flattened config data into the binary format.
+
+    Parameters
+    ----------
+    flat_dict: dict
+        Flattened dictionary with key chains of strings, see
+        confipy.converter._flat_dict() with dot notation.
+    metadata: dict, optional
+        Json serializable information stored alongside, e.g. source hashes.
+
+    Return
+    ------
+    data: bytes
+
+    """
+
+    entries = sorted((_encode_key_chain(key_chain), value)
+                     for key_chain, value in flat_dict.items())
+
+    table = []
+    keys = []
+    values = []
+    key_offset = value_offset = 0
+
+    for key, value in entries:
+        value = pickle.dumps(value, protocol=PICKLE_PROTOCOL)
+        table.append(ENTRY.pack(key_offset, len(key), value_offset,
+                                len(value)))
+        keys.append(key)
+        values.append(value)
+        key_offset += len(key)
+        value_offset += len(value)
+
+    meta = json.dumps(metadata or {}, sort_keys=True).encode("utf-8")
+
+    table_offset = HEADER.size
+    keys_offset = table_offset + ENTRY.size * len(entries)
+    values_offset = keys_offset + key_offset
+    meta_offset = values_offset + value_offset
+
+    header = HEADER.pack(MAGIC, VERSION, len(entries), table_offset,
+                         keys_offset, values_offset, meta_offset, len(meta))
+
+    return b"".join([header] + table + keys + values + [meta])
+
+
+def _encode_key_chain(key_chain):
+    """Encode key chain as null separated utf-8 keys."""
+
+    for key in key_chain:
+        if not isinstance(key, six.string_types):
+            raise TypeError(ERR_KEY_TYPE.format(key))
+
+    return SEPARATOR.join(key.encode("utf-8") for key in key_chain)
+
+
+def stale_sources(metadata):
+    """Compare source hashes stored in the metadata of a binary config with
+    the current source files.
+
+    Parameters
+    ----------
+    metadata: dict
+        Metadata of a binary config, see BinaryIndex.metadata.
+
+    Return
+    ------
+    stale: list
+        Paths of source files which changed or do not exist anymore.
+
+    """
+
+    stale = []
+    for path, digest in sorted(metadata.get("sources", {}).items()):
+        try:
+            _, current = confipy.cache.file_signature(path, key_by="hash")
+        except (IOError, OSError):
+            current = None
+
+        if current != digest:
+            stale.append(path)
+
+    return stale
+
+
+class BinaryIndex(object):
+    """Read-only access to a binary config stored in any buffer, e.g. bytes,
+    mmap or shared memory. Neither key chains nor values are decoded up
+    front.
+
+    Parameters
+    ----------
+    buffer: bytes-like
+        Buffer containing the binary config.
+
+    """
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer)
+
+        (magic, version, self._count, self._table, self._keys, self._values,
+         meta_offset, meta_length) = HEADER.unpack_from(self._buffer)
+
+        if magic != MAGIC:
+            raise ValueError(ERR_MAGIC)
+        if version != VERSION:
+            raise ValueError(ERR_VERSION.format(version))
+
+        self._meta = (meta_offset, meta_length)
+        self._encoded = _EncodedKeys(self)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def metadata(self):
+        """Return the metadata stored alongside the config data."""
+
+        offset, length = self._meta
+        return json.loads(self._buffer[offset:offset + length].tobytes()
+                          .decode("utf-8"))
+
+    def find(self, key_chain):
+        """Return the position of given key chain or None if it does not
+        refer to a value."""
+
+        try:
+            key = _encode_key_chain(key_chain)
+        except TypeError:
+            return None
+
+        position = bisect.bisect_left(self._encoded, key)
+        if position < self._count and self._encoded[position] == key:
+            return position
+
+        return None
+
+    def is_node(self, key_chain):
+        """Check whether values exist below given key chain."""
+
+        start, stop = self._subtree(key_chain)
+        return start < stop
+
+    def key_chain(self, position):
+        """Return the key chain at given position."""
+
+        return tuple(self._encoded[position].decode("utf-8").split(u"\x00"))
+
+    def value(self, position):
+        """Decode and return the value at given position."""
+
+        _, _, offset, length = ENTRY.unpack_from(
+            self._buffer, self._table + ENTRY.size * position)
+        offset += self._values
+        return pickle.loads(self._buffer[offset:offset + length])
+
+    def children(self, key_chain=()):
+        """Return child keys of given key chain mapped to a boolean which is
+        True for nodes and False for values. Children are sorted by key."""
+
+        children = collections.OrderedDict()
+        start, stop = self._subtree(key_chain)
+        prefix_length = len(key_chain)
+
+        while start < stop:
+            child_chain = self.key_chain(start)[:prefix_length + 1]
+            child_start, child_stop = self._subtree(child_chain)
+            if child_start < child_stop:
+                children[child_chain[-1]] = True
+                start = child_stop
+            else:
+                children[child_chain[-1]] = False
+                start += 1
+
+        return children
+
+    def items(self, key_chain=()):
+        """Iterate over key chains and decoded values of given subtree."""
+
+        start, stop = self._subtree(key_chain)
+        buffer = self._buffer
+
+        for position in range(start, stop):
+            entry = ENTRY.unpack_from(buffer,
+                                      self._table + ENTRY.size * position)
+            key_offset = self._keys + entry[0]
+            value_offset = self._values + entry[2]
+
+            key = buffer[key_offset:key_offset + entry[1]].tobytes()
+            value = buffer[value_offset:value_offset + entry[3]]
+            yield (tuple(key.decode("utf-8").split(u"\x00")),
+                   pickle.loads(value))
+
+    def release(self):
+        """Release the underlying buffer. Required before closing shared
+        memory or memory mapped files."""
+
+        self._buffer.release()
+
+    def _subtree(self, key_chain):
+        """Return the range of positions of all values below given key
+        chain."""
+
+        if not key_chain:
+            return 0, self._count
+
+        try:
+            prefix = _encode_key_chain(key_chain) + SEPARATOR
+        except TypeError:
+            return 0, 0
+
+        start = bisect.bisect_left(self._encoded, prefix)
+        stop = bisect.bisect_left(self._encoded, prefix[:-1] + b"\x01", start)
+        return start, stop
+
+
+class _EncodedKeys(object):
+    """Sequence of encoded key chains used for binary search."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index._count
+
+    def __getitem__(self, position):
+        index = self.index
+        offset, length, _, _ = ENTRY.unpack_from(
+            index._buffer, index._table + ENTRY.size * position)
+        offset += index._keys
+        return index._buffer[offset:offset + length].tobytes()
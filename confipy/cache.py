@@ -0,0 +1,287 @@
+"""This module contains caches for config data."""
+
+import os
+import copy
+import pickle
+import hashlib
+import tempfile
+import threading
+import collections
+
+CacheInfo = collections.namedtuple("CacheInfo",
+                                   ["hits", "misses", "maxsize", "currsize"])
+
+# atomic on python 3.3+, falls back to rename for python 2.7
+_replace = getattr(os, "replace", os.rename)
+
+
+def file_signature(path, key_by="stat"):
+    """Return a signature of given file which changes once the file changes.
+
+    Parameters
+    ----------
+    path: str
+        Path to file.
+    key_by: {"stat", "hash"}, optional
+        'stat' uses the absolute path, modification time and size. 'hash'
+        uses the absolute path and the content's sha1 hash.
+
+    Return
+    ------
+    signature: tuple
+
+    """
+
+    absolute_path = os.path.abspath(path)
+    if key_by == "hash":
+        with open(absolute_path, "rb") as file:
+            digest = hashlib.sha1(file.read()).hexdigest()
+        return absolute_path, digest
+
+    stat = os.stat(absolute_path)
+    return absolute_path, stat.st_mtime, stat.st_size
+
+
+class IncludeCache(object):
+    """LRU cache for flattened configs referenced by include statements. One
+    instance may be shared across several load calls in order to read and
+    parse commonly included config files only once.
+
+    Entries are keyed on the absolute path of the config file combined with
+    either its modification time and size or its content hash. Hence,
+    modified files are automatically read again.
+
+    Mutable values like lists are copied when stored and when returned.
+    Hence, configs loaded with a shared cache never share mutable values and
+    modifying one of them does not affect the cache or other configs.
+
+    Parameters
+    ----------
+    maxsize: int, None, optional
+        Maximum number of cached config files. If None, the cache is
+        unbounded.
+    key_by: {"stat", "hash"}, optional
+        Define how cache keys are derived from a config file. 'stat' uses the
+        modification time and size. 'hash' uses the content's sha1 hash which
+        requires reading the file but is independent of file system
+        timestamps.
+
+    """
+
+    def __init__(self, maxsize=128, key_by="stat"):
+        if key_by not in ("stat", "hash"):
+            raise ValueError("Unknown key_by '{}'.".format(key_by))
+
+        self.maxsize = maxsize
+        self.key_by = key_by
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, path):
+        """Return the cache key of given config file path."""
+
+        return file_signature(path, self.key_by)
+
+    def get(self, key):
+        """Return a copy of the cached flattened config for given key. Returns
+        None if key is not present."""
+
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+
+            # reinsert to mark as most recently used
+            self._entries[key] = value
+            self.hits += 1
+
+        return _copy_flat(value)
+
+    def set(self, key, value):
+        """Store a copy of the flattened config for given key and evict least
+        recently used entries if maxsize is exceeded."""
+
+        value = _copy_flat(value)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+    def info(self):
+        """Return hit and miss statistics as CacheInfo named tuple."""
+
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize,
+                             len(self._entries))
+
+    def clear(self):
+        """Remove all entries and reset statistics."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _copy_flat(flat_dict):
+    """Return a copy of a flattened config whose mutable values are copied,
+    too. Immutable values are shared."""
+
+    return {key_chain: copy.deepcopy(value)
+            if isinstance(value, (list, dict, set)) else value
+            for key_chain, value in flat_dict.items()}
+
+
+class ConfigCache(object):
+    """On-disk cache of parsed configs to skip reading and parsing entirely
+    across processes. Each entry contains the signatures of all config files
+    which were read, namely the root config and all transitive includes.
+    Entries are invalidated automatically once any of these files changes or
+    different load options are used.
+
+    Entries are stored via pickle. Hence, the cache directory must not be
+    writable by untrusted users.
+
+    Parameters
+    ----------
+    directory: str
+        Directory containing the cache files. Created if not present.
+    key_by: {"stat", "hash"}, optional
+        Define how file signatures are derived, see file_signature().
+
+    """
+
+    def __init__(self, directory, key_by="stat"):
+        if key_by not in ("stat", "hash"):
+            raise ValueError("Unknown key_by '{}'.".format(key_by))
+
+        self.directory = directory
+        self.key_by = key_by
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, path, options):
+        """Return the cache file path of given config path and load
+        options."""
+
+        key = repr((os.path.abspath(path), sorted(options.items())))
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".pickle")
+
+    def get(self, path, options):
+        """Return cached config data for given config path and load options.
+        Returns None if no valid entry is present."""
+
+        try:
+            with open(self.path(path, options), "rb") as file:
+                signatures, cfg_data = pickle.load(file)
+        except (IOError, OSError, EOFError, ValueError,
+                pickle.UnpicklingError):
+            self.misses += 1
+            return None
+
+        try:
+            valid = all(file_signature(signature[0], self.key_by) == signature
+                        for signature in signatures)
+        except (IOError, OSError):
+            valid = False
+
+        if not valid:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return cfg_data
+
+    def manifest(self):
+        """Return an include manifest which records the signature of each
+        included config file once it is added, i.e. before the file is read.
+        See set()."""
+
+        return _SignedManifest(self.key_by)
+
+    def set(self, path, options, files, cfg_data, signatures=None):
+        """Store config data for given config path and load options. If the
+        signatures of the files taken before reading are given and any file
+        changed since, nothing is stored because the config data might be
+        outdated.
+
+        Parameters
+        ----------
+        path: str
+            Path to root config file.
+        options: dict
+            Load options which influence the config data.
+        files: iterable
+            Paths of all config files which were read.
+        cfg_data: object
+            Picklable config data.
+        signatures: list, optional
+            Signatures of files taken before reading them, in the order of
+            files.
+
+        Return
+        ------
+        stored: bool
+
+        """
+
+        current = [file_signature(file, self.key_by) for file in files]
+        if signatures is not None and list(signatures) != current:
+            return False
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        # write to temporary file first to prevent partially written entries
+        handle, temp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                pickle.dump((current, cfg_data), file,
+                            pickle.HIGHEST_PROTOCOL)
+            _replace(temp_path, self.path(path, options))
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        return True
+
+    def clear(self):
+        """Remove all cache files and reset statistics."""
+
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".pickle"):
+                    os.remove(os.path.join(self.directory, name))
+
+        self.hits = 0
+        self.misses = 0
+
+
+class _SignedManifest(list):
+    """Include manifest of key chains and paths which records the signature
+    of each path once an entry is added. Parsers add entries before reading
+    included config files."""
+
+    def __init__(self, key_by="stat"):
+        super(_SignedManifest, self).__init__()
+        self.key_by = key_by
+        self.signatures = []
+
+    def append(self, entry):
+        super(_SignedManifest, self).append(entry)
+        self.signatures.append(file_signature(entry[1], self.key_by))
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
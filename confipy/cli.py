@@ -0,0 +1,58 @@
+"""This module contains the command line interface of confipy."""
+
+import sys
+import argparse
+import confipy.compiler
+
+
+def main(argv=None):
+    """Command line interface, see --help."""
+
+    parser = argparse.ArgumentParser(prog="confipy")
+    commands = parser.add_subparsers(dest="command")
+
+    compile_cmd = commands.add_parser(
+        "compile", help="Compile config files into the binary format.")
+    compile_cmd.add_argument("paths", nargs="+",
+                             help="Config files to be compiled.")
+    compile_cmd.add_argument("-o", "--output",
+                             help="Path of the compiled config. Only valid "
+                                  "for a single config file.")
+    compile_cmd.add_argument("--read-engine", default="auto")
+    compile_cmd.add_argument("--yaml-engine", default="auto")
+    compile_cmd.add_argument("--parsers", default="include,substitute",
+                             help="Comma separated parser names.")
+
+    check_cmd = commands.add_parser(
+        "check", help="Check compiled configs against their sources.")
+    check_cmd.add_argument("paths", nargs="+",
+                           help="Compiled config files to be checked.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        if args.output and len(args.paths) > 1:
+            parser.error("--output requires a single config file.")
+
+        parsers = tuple(name for name in args.parsers.split(",") if name)
+        for path in args.paths:
+            output = confipy.compiler.compile_config(
+                path, output=args.output, read_engine=args.read_engine,
+                parsers=parsers, yaml_engine=args.yaml_engine)
+            sys.stdout.write("{} -> {}\n".format(path, output))
+        return 0
+
+    if args.command == "check":
+        exit_code = 0
+        for path in args.paths:
+            stale = confipy.compiler.stale_sources(path)
+            if stale:
+                exit_code = 1
+                sys.stdout.write("{}: outdated ({})\n".format(
+                    path, ", ".join(stale)))
+            else:
+                sys.stdout.write("{}: up to date\n".format(path))
+        return exit_code
+
+    parser.print_help()
+    return 2
@@ -0,0 +1,91 @@
+"""This module compiles config files into the binary format.
+
+Compiled configs contain the fully parsed config data, hence reading them
+requires neither yaml parsing nor include and substitute parsers. The source
+hashes of the config file and all its includes are recorded to detect
+outdated compiled configs.
+
+"""
+
+import os
+import tempfile
+import confipy
+import confipy.cache
+import confipy.binary
+
+EXTENSION = "cfgc"
+
+
+def compile_config(path, output=None, read_engine="auto",
+                   parsers=("include", "substitute"), yaml_engine="auto",
+                   **kwargs):
+    """Run the loading pipeline on given config file and write the result as
+    compiled config.
+
+    Parameters
+    ----------
+    path: str
+        Path to config file to be compiled.
+    output: str, optional
+        Path of the compiled config. By default, the extension of the config
+        file is replaced by '.cfgc'.
+    read_engine: {"auto", "yaml", "json", "configparser"}, optional
+        See confipy.load().
+    parsers: iterable, optional
+        See confipy.load().
+    yaml_engine: {"auto", "c", "python"}, optional
+        See confipy.load().
+    kwargs: dict, optional
+        Keyword arguments passed to the parsers.
+
+    Return
+    ------
+    output: str
+        Path of the compiled config.
+
+    """
+
+    if output is None:
+        output = os.path.splitext(path)[0] + "." + EXTENSION
+
+    manifest = []
+    cfg_data = confipy._load_flat(path, read_engine, parsers, yaml_engine,
+                                  include_manifest=manifest, **kwargs)
+
+    sources = [path] + [inc_path for _, inc_path in manifest]
+    metadata = {"sources": dict(confipy.cache.file_signature(source,
+                                                             key_by="hash")
+                                for source in sources)}
+
+    data = confipy.binary.encode(cfg_data, metadata=metadata)
+
+    directory = os.path.dirname(os.path.abspath(output))
+    handle, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(handle, "wb") as file:
+        file.write(data)
+    confipy.cache._replace(tmp_path, output)
+
+    return output
+
+
+def stale_sources(path):
+    """Return source files of a compiled config which changed since
+    compilation.
+
+    Parameters
+    ----------
+    path: str
+        Path to compiled config.
+
+    Return
+    ------
+    stale: list
+        Paths of changed or removed source files. Empty if the compiled
+        config is up to date.
+
+    """
+
+    with open(path, "rb") as file:
+        index = confipy.binary.BinaryIndex(file.read())
+
+    return confipy.binary.stale_sources(index.metadata)
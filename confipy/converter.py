@@ -1,24 +1,38 @@
 """This module contains converter functions."""
 
 import six
+import confipy.store
 import confipy.notation
 
 NOTATION_TYPES = {"dot": confipy.notation.DotNotation,
                   "dict": dict}
 
+# notations which require string keys for attribute access
+ATTRIBUTE_NOTATIONS = ("dot", "compact")
 
-def _unflat_dict(flat_dict, unflat_dict=None, notation="dict"):
+
+def _unflat_dict(flat_dict, unflat_dict=None, notation="dict",
+                 keep_index=False):
     """Convert flattened dict back to nested dict structure.
 
+    Each key chain is walked once. Created parent nodes are remembered by
+    their key chain and reused for siblings, hence no intermediate
+    dictionaries or recursive calls are required.
+
     Parameters
     ----------
     flat_dict: dict
         See _flatten_dict() for more information.
     unflat_dict: None, dict
-        Parameter is used as parent dictionary.
-    notation: {"dict", "dot"}, optional
+        Parameter is used as parent dictionary. Not supported for the compact
+        notation.
+    notation: {"dict", "dot", "compact"}, optional
         Provide notation type into which the unflattened dictionary will be
-        converted to.
+        converted to. The compact notation stores the entire config in an
+        ArrayStore and returns a read-only ArrayNotation view.
+    keep_index: bool, optional
+        If True, a copy of the flattened dict is kept as lookup index of the
+        created DotNotation.
 
     Return
     ------
@@ -26,34 +40,134 @@ def _unflat_dict(flat_dict, unflat_dict=None, notation="dict"):
 
     """
 
-    if not unflat_dict:
-        notation_type = NOTATION_TYPES[notation]
+    if notation == "compact":
+        store = confipy.store.ArrayStore(flat_dict)
+        return confipy.notation.ArrayNotation(store)
+
+    notation_type = NOTATION_TYPES[notation]
+    if unflat_dict is None:
         unflat_dict = notation_type()
 
-    # iterate, begin with lowest depth
-    sorted_items = sorted(flat_dict.items(), key=lambda x: len(x[0]))
-    for key_chain, value in sorted_items:
-        this_key = key_chain[0]
-        # directly set value, if only one key is present
-        if len(key_chain)== 1:
-            unflat_dict[this_key] = value
+    nodes = {(): unflat_dict}
+    targets = {}
+    for key_chain, value in flat_dict.items():
+        parent_chain = key_chain[:-1]
+        target = targets.get(parent_chain)
+
+        if target is None:
+            parent = nodes.get(parent_chain)
+            if parent is None:
+                parent = _create_parents(parent_chain, nodes, notation_type)
+            target = targets[parent_chain] = _item_target(parent)
+
+        target[key_chain[-1]] = value
+
+    if keep_index and notation == "dot":
+        confipy.notation._set_index(unflat_dict, flat_dict, nodes.values())
+
+    return unflat_dict
+
+
+def _patch_dict(unflat_dict, updated, removed, notation="dict"):
+    """Apply changed and removed key chains to a nested config in place.
+    Nodes which become empty due to removed key chains are removed as well.
+
+    Parameters
+    ----------
+    unflat_dict: dict, DotNotation
+        Nested config to be patched.
+    updated: dict
+        Flattened dictionary of new or changed values.
+    removed: iterable
+        Key chains to be removed.
+    notation: {"dict", "dot"}, optional
+        Notation type of the nested config.
+
+    Return
+    ------
+    unflat_dict: dict, DotNotation
+
+    """
+
+    for key_chain in removed:
+        parents = [unflat_dict]
+        try:
+            for key in key_chain[:-1]:
+                parents.append(parents[-1][key])
+            _delete_key(parents[-1], key_chain[-1])
+        except (AttributeError, KeyError, TypeError):
             continue
 
-        # check for existing key and account for DotNotation
+        # prune nodes which became empty
+        for depth in range(len(parents) - 1, 0, -1):
+            node = parents[depth]
+            if (vars(node) if notation == "dot" else node):
+                break
+            _delete_key(parents[depth - 1], key_chain[depth - 1])
+
+    return _unflat_dict(updated, unflat_dict, notation)
+
+
+def _item_target(node):
+    """Return the mapping into which values of given node are stored. Values
+    of DotNotation nodes without memoized views or lookup indices are stored
+    in their attribute dictionary directly, which skips invalidation."""
+
+    if (isinstance(node, confipy.notation.DotNotation) and
+            not node._dot_watched):
+        return vars(node)
+    return node
+
+
+def _delete_key(node, key):
+    """Delete key from dict or DotNotation."""
+
+    if isinstance(node, dict):
+        del node[key]
+    else:
+        delattr(node, key)
+
+
+def _create_parents(parent_chain, nodes, notation_type):
+    """Find or create all nodes along given key chain and register them in
+    nodes. Existing nodes are reused.
+
+    Parameters
+    ----------
+    parent_chain: tuple
+        Key chain of the node to be created.
+    nodes: dict
+        Key chains mapped to existing nodes. Updated in place.
+    notation_type: {DotNotation, dict}
+        Type of nodes to be created.
+
+    Return
+    ------
+    node: {DotNotation, dict}
+
+    """
+
+    # find the deepest registered ancestor
+    depth = len(parent_chain) - 1
+    while parent_chain[:depth] not in nodes:
+        depth -= 1
+
+    node = nodes[parent_chain[:depth]]
+    for depth in range(depth, len(parent_chain)):
+        key = parent_chain[depth]
         try:
-            key_exists = unflat_dict[this_key]
+            child = node[key]
         except (AttributeError, KeyError):
-            key_exists = None
+            child = None
 
-        # if key exists, do not create again
-        if key_exists:
-            _unflat_dict({key_chain[1:]: value}, key_exists, notation)
-            continue
+        if not isinstance(child, (notation_type, dict)):
+            child = notation_type()
+            node[key] = child
 
-        unflat_dict[this_key] = _unflat_dict({key_chain[1:]: value},
-                                             notation=notation)
+        node = child
+        nodes[parent_chain[:depth + 1]] = node
 
-    return unflat_dict
+    return node
 
 
 def _flat_dict(cfg_dict, parent=None, notation="dict"):
@@ -63,7 +177,8 @@ def _flat_dict(cfg_dict, parent=None, notation="dict"):
     For example, {"key1": {"key11":{"key111": "value1"}}}
     evaluates to  {("key1", "key11", "key111"): "value1"}.
 
-    Simplifies dictionary operations for other parser functions.
+    Simplifies dictionary operations for other parser functions. String keys
+    are interned, see _intern_key().
 
     Parameters
     ----------
@@ -71,12 +186,13 @@ def _flat_dict(cfg_dict, parent=None, notation="dict"):
         Dictionary containing config data.
     parent: None, optional
         For nested, recursive calls remembers the parent of current level.
-    notation: {"dict", "dot"}, optional
+    notation: {"dict", "dot", "compact"}, optional
         Provide notation type into which the unflattened dictionary will be
         converted by _unflat_dict later on. This information is required here
         because keys which are not strings cannot be used as attribute names
         for the DotNotation. Therefore, dictionaries containing non-string
-        keys are not converted to DotNotation.
+        keys are not converted to DotNotation. The same applies to the
+        compact notation.
 
     Return
     ------
@@ -88,13 +204,13 @@ def _flat_dict(cfg_dict, parent=None, notation="dict"):
         parent = []
 
     # check for non string keys for dot notation
-    if notation == "dot":
+    if notation in ATTRIBUTE_NOTATIONS:
         if not all([isinstance(x, six.string_types) for x in cfg_dict.keys()]):
             return {tuple(parent):cfg_dict}
 
     flattened = {}
     for key, value in cfg_dict.items():
-        key_level = parent + [key]
+        key_level = parent + [_intern_key(key)]
 
         # unflat nested dictionaries
         if isinstance(value, dict):
@@ -103,4 +219,58 @@ def _flat_dict(cfg_dict, parent=None, notation="dict"):
             key_chain = tuple(key_level)
             flattened[key_chain] = value
 
-    return flattened
\ No newline at end of file
+    return flattened
+
+
+def _intern_key(key):
+    """Intern string keys. Configs repeat the same keys in many namespaces,
+    e.g. for included config files, which then share a single string object.
+    Other keys and unicode keys on python 2 are returned as they are."""
+
+    if type(key) is str:
+        return six.moves.intern(key)
+    return key
+
+
+def _convert_dict(cfg_dict, notation="dict"):
+    """Convert nested dictionary directly into given notation without
+    flattening. The result equals _unflat_dict(_flat_dict(cfg_dict)), hence
+    empty dictionaries are omitted and dictionaries containing non-string
+    keys are kept as values for the dot notation.
+
+    Parameters
+    ----------
+    cfg_dict: dict
+        Dictionary containing config data.
+    notation: {"dict", "dot", "compact"}, optional
+        Provide notation type into which the dictionary will be converted.
+
+    Return
+    ------
+    converted: {dict, DotNotation, CompactNotation}
+
+    """
+
+    if notation == "compact":
+        return _unflat_dict(_flat_dict(cfg_dict, notation=notation),
+                            notation=notation)
+
+    notation_type = NOTATION_TYPES[notation]
+    converted = notation_type()
+
+    for key, value in cfg_dict.items():
+        key = _intern_key(key)
+        if not isinstance(value, dict):
+            converted[key] = value
+            continue
+
+        if notation == "dot" and not all([isinstance(x, six.string_types)
+                                          for x in value.keys()]):
+            converted[key] = value
+            continue
+
+        child = _convert_dict(value, notation)
+        if (vars(child) if notation == "dot" else child):
+            converted[key] = child
+
+    return converted
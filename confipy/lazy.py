@@ -0,0 +1,280 @@
+"""This module contains the lazy config resolver."""
+
+import six
+import fnmatch
+import threading
+import confipy.parser
+import confipy.notation
+
+ERR_LAZY_PARSER = "Parser '{}' is not supported for lazy loading."
+
+
+class LazyResolver(object):
+    """Resolves include statements and substitutions on demand. Included
+    config files are read once their namespace is accessed. Substitutions are
+    rendered on first access and memoized afterwards.
+
+    The results equal the eager parsing_handler() with include statements
+    being resolved before substitutions.
+
+    Parameters
+    ----------
+    flattened_dict: dict
+        Flattened dictionary containing config data.
+    source_path: str
+        Path to original config file. Necessary for relative includes.
+    parsers: iterable, optional
+        Parsers to be applied on demand. Supports "include" and "substitute".
+    kwargs: dict, optional
+        Keyword arguments of the include and substitute parsers.
+
+    """
+
+    def __init__(self, flattened_dict, source_path=None,
+                 parsers=("include", "substitute"), **kwargs):
+        for parser in parsers:
+            if parser not in ("include", "substitute"):
+                raise ValueError(ERR_LAZY_PARSER.format(parser))
+
+        self.substitute = "substitute" in parsers
+        self.include_marker = kwargs.get("marker", "$include")
+        self.subs_marker = kwargs.get("marker", "$")
+        self.splitter = kwargs.get("splitter", " + ")
+        self.include_cache = kwargs.get("include_cache")
+        self.yaml_engine = kwargs.get("yaml_engine", "auto")
+        self.stats = kwargs.get("stats")
+        self.stream = kwargs.get("stream", False)
+        self._payloads = {}
+
+        self._raw = {}
+        self._values = {}
+        self._includes = {}
+        self._children = {}
+        self._lock = threading.RLock()
+
+        self._register(flattened_dict)
+        if "include" in parsers:
+            self._register_includes(flattened_dict, source_path)
+
+    def root(self):
+        """Return the lazily resolved root node."""
+
+        return confipy.notation.LazyDotNotation(self, ())
+
+    def children(self, prefix):
+        """Return child keys of given key chain mapped to a boolean which is
+        True for nodes and False for values. Includes referenced by the key
+        chain are loaded beforehand."""
+
+        with self._lock:
+            if prefix in self._includes:
+                self._load_include(prefix)
+
+            return self._children.get(prefix, {})
+
+    def value(self, key_chain):
+        """Return the resolved value of given key chain. Referenced values are
+        resolved iteratively and memoized."""
+
+        with self._lock:
+            if key_chain in self._values:
+                return self._values[key_chain]
+
+            stack = [key_chain]
+            visiting = set()
+
+            while stack:
+                current = stack[-1]
+                if current in self._values:
+                    stack.pop()
+                    continue
+
+                raw_value = self._raw_value(current, stack)
+                template = None
+                if self.substitute:
+                    template = confipy.parser._tokenize(raw_value,
+                                                        self.splitter,
+                                                        self.subs_marker)
+
+                if template is None:
+                    self._values[current] = raw_value
+                    stack.pop()
+                    continue
+
+                references = confipy.parser._references(template)
+                unresolved = [reference for reference in references
+                              if reference not in self._values]
+
+                if not unresolved:
+                    self._values[current] = confipy.parser._render(
+                        template, self._values)
+                    visiting.discard(current)
+                    stack.pop()
+                    continue
+
+                for reference in unresolved:
+                    if reference in visiting:
+                        path = [chain for chain in stack
+                                if chain in visiting] + [current]
+                        cycle = tuple(path[path.index(reference):])
+                        raise confipy.parser.SubstitutionError(
+                            confipy.parser.ERR_SUBS_CYCLE.format(
+                                confipy.parser._format_key_chains(cycle)),
+                            cycle=cycle)
+
+                visiting.add(current)
+                stack.extend(unresolved)
+
+            return self._values[key_chain]
+
+    def select(self, patterns):
+        """Resolve only the subtrees matching given patterns. Included config
+        files are read if they are located within a selected subtree or
+        contain values referenced by selected substitutions.
+
+        Parameters
+        ----------
+        patterns: iterable
+            Key chains in dot notation like "paths" or as tuples. Each key may
+            contain shell-style wildcards, e.g. "paths.*".
+
+        Return
+        ------
+        selected: dict
+            Flattened dictionary of resolved values within selected subtrees.
+
+        """
+
+        with self._lock:
+            selected = {}
+            for pattern in patterns:
+                if isinstance(pattern, six.string_types):
+                    pattern = confipy.parser._convert_key_chain(pattern)
+
+                for key_chain, is_node in self._match(pattern):
+                    for leaf in self._leaves(key_chain, is_node):
+                        selected[leaf] = None
+
+            for key_chain in selected:
+                selected[key_chain] = self.value(key_chain)
+
+            return selected
+
+    def resolve(self):
+        """Load all includes and resolve all values."""
+
+        with self._lock:
+            while self._includes:
+                self._load_include(next(iter(self._includes)))
+
+            for key_chain in list(self._raw):
+                self.value(key_chain)
+
+    def _match(self, pattern):
+        """Return key chains matching given pattern together with a boolean
+        which is True for nodes and False for values."""
+
+        matched = [((), True)]
+        for segment in pattern:
+            next_matched = []
+            for prefix, is_node in matched:
+                if not is_node:
+                    continue
+
+                for key, child_is_node in self.children(prefix).items():
+                    if fnmatch.fnmatchcase(six.text_type(key), segment):
+                        next_matched.append((prefix + (key,), child_is_node))
+
+            matched = next_matched
+
+        return matched
+
+    def _leaves(self, key_chain, is_node):
+        """Return key chains of all values within given subtree. Includes
+        within the subtree are loaded."""
+
+        if not is_node:
+            return [key_chain]
+
+        leaves = []
+        stack = [(key_chain, iter(list(self.children(key_chain).items())))]
+        while stack:
+            prefix, children = stack[-1]
+            for key, child_is_node in children:
+                child_chain = prefix + (key,)
+                if child_is_node:
+                    stack.append((child_chain, iter(list(
+                        self.children(child_chain).items()))))
+                    break
+                leaves.append(child_chain)
+            else:
+                stack.pop()
+
+        return leaves
+
+    def _raw_value(self, key_chain, stack):
+        """Return the unresolved value of given key chain. Loads includes
+        whose namespace contains the key chain if required."""
+
+        while key_chain not in self._raw:
+            include_chain = self._find_include(key_chain)
+            if include_chain is None:
+                requester = stack[-2] if len(stack) > 1 else key_chain
+                missing = {requester: [key_chain]}
+                raise confipy.parser.SubstitutionError(
+                    confipy.parser.ERR_SUBS_MISSING.format(
+                        confipy.parser._format_key_chains(missing),
+                        confipy.parser._format_key_chains([key_chain])),
+                    missing=missing)
+
+            self._load_include(include_chain)
+
+        return self._raw[key_chain]
+
+    def _find_include(self, key_chain):
+        """Return the key chain of a pending include whose namespace contains
+        given key chain. Returns None if there is none."""
+
+        for depth in range(len(key_chain), 0, -1):
+            if key_chain[:depth] in self._includes:
+                return key_chain[:depth]
+
+        return None
+
+    def _load_include(self, key_chain):
+        """Read a pending include and register its flattened config."""
+
+        path, ancestors = self._includes.pop(key_chain)
+        inc_flat = confipy.parser._read_include(path, self.include_cache,
+                                                yaml_engine=self.yaml_engine,
+                                                stats=self.stats,
+                                                stream=self.stream,
+                                                payloads=self._payloads)
+        inc_flat = {key_chain + inc_key_chain: inc_value
+                    for inc_key_chain, inc_value in inc_flat.items()}
+
+        self._register(inc_flat)
+        self._register_includes(inc_flat, path, ancestors)
+
+    def _register(self, flattened_dict):
+        """Add raw values and their key chains to the children index."""
+
+        self._raw.update(flattened_dict)
+        for key_chain in flattened_dict:
+            last = len(key_chain) - 1
+            for depth, key in enumerate(key_chain):
+                children = self._children.setdefault(key_chain[:depth], {})
+                children[key] = depth < last
+
+    def _register_includes(self, flattened_dict, source_path, ancestors=()):
+        """Find include statements and mark their key chains as pending
+        nodes."""
+
+        pending = confipy.parser._find_includes(flattened_dict, source_path,
+                                                self.include_marker,
+                                                ancestors)
+
+        for key_chain, path, path_ancestors in pending:
+            del self._raw[key_chain]
+            self._includes[key_chain] = (path, path_ancestors)
+            self._children[key_chain[:-1]][key_chain[-1]] = True
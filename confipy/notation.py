@@ -1,14 +1,37 @@
 """This module contains the notation classes for the output configs."""
 
 
+_MISSING = object()
+
+# internal state of DotNotation instances which is not part of the config
+_INTERNAL = frozenset(["_dot_parent", "_dot_index", "_dot_views",
+                       "_dot_watched", "_lazy_resolver", "_lazy_prefix",
+                       "_lazy_complete"])
+
+
 class DotNotation(object):
     """Enables dot notation for accessing config properties. This class does
     not inherit from dict on purpose in order to prevent namespace clashes.
     Therefore, only operator overloading methods are used which are unlikely
     to clash with variable names from config files.
 
+    Internal state is kept in slots to keep vars() restricted to config
+    attributes. Each node knows its parent to invalidate memoized views and
+    lookup indices of its ancestors once a value changes. Only nodes which
+    are part of a memoized view or lookup index are watched, hence building
+    a config is not slowed down by invalidation.
+
     """
 
+    __slots__ = ("__dict__", "_dot_parent", "_dot_index", "_dot_views",
+                 "_dot_watched")
+
+    def __init__(self):
+        object.__setattr__(self, "_dot_parent", None)
+        object.__setattr__(self, "_dot_index", None)
+        object.__setattr__(self, "_dot_views", None)
+        object.__setattr__(self, "_dot_watched", False)
+
     def __getitem__(self, key):
         """Support bracketing attribute access. It is required to access
         attributes with builtin names like 'except'."""
@@ -18,48 +41,505 @@ class DotNotation(object):
         """Support bracketing attribute setting."""
         setattr(self, key, value)
 
+    def __setattr__(self, name, value):
+        """Set attribute and invalidate memoized views and lookup indices."""
+
+        if name in _INTERNAL:
+            object.__setattr__(self, name, value)
+            return
+
+        if isinstance(value, DotNotation):
+            object.__setattr__(value, "_dot_parent", (self, name))
+
+        if not self._dot_watched:
+            object.__setattr__(self, name, value)
+            return
+
+        previous = vars(self).get(name, _MISSING)
+        object.__setattr__(self, name, value)
+        self._dot_invalidate(name, value, previous)
+
+    def __delattr__(self, name):
+        """Delete attribute and invalidate memoized views and lookup
+        indices."""
+
+        previous = vars(self).get(name, _MISSING)
+        object.__delattr__(self, name)
+
+        if self._dot_watched:
+            self._dot_invalidate(name, _MISSING, previous)
+
+    def __getstate__(self):
+        """Return config attributes only. Copies and unpickled instances get
+        their own parent, memoized views and lookup index."""
+
+        return dict(vars(self))
+
+    def __setstate__(self, state):
+        """Restore config attributes with reset internal state. Nodes which
+        are copied as well are attached to this instance, shared nodes of
+        shallow copies keep their parent."""
+
+        DotNotation.__init__(self)
+        vars(self).update(state)
+
+        for name, value in state.items():
+            if isinstance(value, DotNotation) and value._dot_parent is None:
+                object.__setattr__(value, "_dot_parent", (self, name))
+
     def __call__(self, ret="val", key=None, default=None):
         """Return specific attributes of the DotNotation instance.
 
         Parameters
         ----------
-        ret: {"val", "dot", "dict", "get"}
+        ret: {"val", "dot", "dict", "get", "resolve", "lookup", "lookup_many"}
             Define the return value. 'val' refers to attributes which are not
             DotNotation instances (therefore being str/lists by default).
             'dot' refers to attributes which are DotNotation instances. 'dict'
             provides the possibility to return itself as a dictionary. 'get'
             mimics the default dict.get() method. It returns the attribute if
-            present. Otherwise returns the 'default' parameter.
+            present. Otherwise returns the 'default' parameter. 'resolve'
+            forces the resolution of lazily loaded configs and returns the
+            instance itself. 'lookup' returns the value of a nested key given
+            in dot notation like "a.b.c" or as key chain tuple via a single
+            dictionary lookup. Otherwise returns the 'default' parameter.
+            'lookup_many' returns a list of values for a list of keys.
+
+        Notes
+        -----
+        Results of 'val', 'dot' and 'dict' are memoized until an attribute of
+        the instance or one of its descendants changes. Each call returns a
+        copy of the memoized dictionaries, hence modifying the result does
+        not affect subsequent calls.
 
         """
 
+        if ret in ("val", "dot"):
+            return dict(self._dot_view(ret))
+
+        elif ret == "dict":
+            return _copy_view(self._dot_view(ret))
+
+        elif ret == "get":
+            if hasattr(self, key):
+                return getattr(self, key)
+            else:
+                return default
+
+        elif ret == "resolve":
+            return self
+
+        elif ret == "lookup":
+            return self._dot_lookup(_key_chain(key), default)
+
+        elif ret == "lookup_many":
+            return [self._dot_lookup(_key_chain(item), default)
+                    for item in key]
+
+        else:
+            return None
+
+    def _dot_view(self, ret):
+        """Return the memoized 'val', 'dot' or 'dict' view, see __call__().
+        Memoized views are shared and must not be modified."""
+
+        views = self._dot_views
+        if views is None:
+            views = {}
+            object.__setattr__(self, "_dot_views", views)
+            object.__setattr__(self, "_dot_watched", True)
+        elif ret in views:
+            return views[ret]
+
         if ret == "val":
-            return {key: value for key, value in vars(self).items()
+            view = {key: value for key, value in vars(self).items()
                     if not isinstance(value, DotNotation)}
 
         elif ret == "dot":
-            return {key: value for key, value in vars(self).items()
+            view = {key: value for key, value in vars(self).items()
                     if isinstance(value, DotNotation)}
 
-        elif ret == "dict":
-            res_dict = {}
+        else:
+            view = {}
             for key, value in vars(self).items():
                 if isinstance(value, self.__class__):
-                    res_dict[key] = value("dict")
+                    view[key] = value._dot_view("dict")
                     continue
-                res_dict[key] = value
-            return res_dict
+                view[key] = value
 
-        elif ret == "get":
-            if hasattr(self, key):
-                return getattr(self, key)
-            else:
+        views[ret] = view
+        return view
+
+    def __repr__(self):
+        """Return string representation."""
+        tpl = "CfgNode: {} nodes ({}) / {} values ({})"
+        nodes = self._dot_view("dot").keys()
+        values = self._dot_view("val").keys()
+        return tpl.format(len(nodes), nodes, len(values), values)
+
+    def _dot_lookup(self, key_chain, default):
+        """Return value of given key chain via the lookup index. Key chains
+        of nodes are not part of the index and are resolved attribute by
+        attribute."""
+
+        index = self._dot_index
+        if index is None:
+            index = self._dot_build_index()
+
+        value = index.get(key_chain, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        node = self
+        for key in key_chain:
+            if not isinstance(node, DotNotation):
+                return default
+            node = vars(node).get(key, _MISSING)
+            if node is _MISSING:
                 return default
 
+        return node
+
+    def _dot_build_index(self):
+        """Build the lookup index mapping key chains relative to this node to
+        values. All nodes of the subtree are watched afterwards."""
+
+        index = {}
+        stack = [((), self)]
+        while stack:
+            prefix, node = stack.pop()
+            object.__setattr__(node, "_dot_watched", True)
+            for key, value in vars(node).items():
+                if isinstance(value, DotNotation):
+                    stack.append((prefix + (key,), value))
+                else:
+                    index[prefix + (key,)] = value
+
+        object.__setattr__(self, "_dot_index", index)
+        return index
+
+    def _dot_invalidate(self, name, value, previous):
+        """Drop memoized views of this node and its ancestors. Lookup indices
+        are updated in place for changed values and dropped if nodes are
+        added or removed."""
+
+        is_value = not (isinstance(value, DotNotation) or
+                        isinstance(previous, DotNotation))
+
+        key_chain = (name,)
+        node = self
+        while True:
+            object.__setattr__(node, "_dot_views", None)
+
+            index = node._dot_index
+            if index is not None:
+                if not is_value:
+                    object.__setattr__(node, "_dot_index", None)
+                elif value is _MISSING:
+                    index.pop(key_chain, None)
+                else:
+                    index[key_chain] = value
+
+            if node._dot_parent is None:
+                break
+
+            node, key = node._dot_parent
+            key_chain = (key,) + key_chain
+
+
+def _restore_dot(state):
+    """Create DotNotation from config attributes, see
+    LazyDotNotation.__reduce_ex__()."""
+
+    node = DotNotation()
+    node.__setstate__(state)
+    return node
+
+
+def _key_chain(key):
+    """Convert dot notation to key chain tuple. Tuples are kept."""
+
+    if isinstance(key, tuple):
+        return key
+    return tuple(key.split("."))
+
+
+def _copy_view(view):
+    """Copy a nested dictionary view. Other values are shared."""
+
+    return {key: _copy_view(value) if isinstance(value, dict) else value
+            for key, value in view.items()}
+
+
+def _set_index(node, flat_dict, nodes=None):
+    """Use an existing flattened dictionary as lookup index of given node.
+
+    Parameters
+    ----------
+    node: DotNotation
+        Root node of the config.
+    flat_dict: dict
+        Key chains relative to node mapped to values. The lookup index is a
+        copy, hence the flattened dictionary is not modified on changes.
+    nodes: iterable, optional
+        All nodes of the config. If omitted, nodes are found by traversal.
+
+    """
+
+    if nodes is None:
+        node._dot_build_index()
+    else:
+        for child in nodes:
+            object.__setattr__(child, "_dot_watched", True)
+
+    object.__setattr__(node, "_dot_index", dict(flat_dict))
+
+
+class LazyDotNotation(DotNotation):
+    """Dot notation whose attributes are resolved on first access via a
+    LazyResolver. Resolved attributes are set on the instance, hence
+    subsequent access equals the plain DotNotation.
+
+    Lookups are resolved attribute by attribute without an index, hence
+    only the accessed attributes are resolved.
+
+    """
+
+    __slots__ = ("_lazy_resolver", "_lazy_prefix", "_lazy_complete")
+
+    def __init__(self, resolver, prefix):
+        super(LazyDotNotation, self).__init__()
+        self._lazy_resolver = resolver
+        self._lazy_prefix = prefix
+        self._lazy_complete = False
+
+    def __getattr__(self, name):
+        """Resolve attributes which are not set yet."""
+
+        if name.startswith("_lazy_") or (name.startswith("__") and
+                                         name.endswith("__")):
+            raise AttributeError(name)
+
+        children = self._lazy_resolver.children(self._lazy_prefix)
+        if name not in children:
+            raise AttributeError(name)
+
+        return self._lazy_set(name, children[name])
+
+    def _dot_lookup(self, key_chain, default):
+        """Resolve key chain attribute by attribute."""
+
+        node = self
+        for key in key_chain:
+            if not isinstance(node, DotNotation):
+                return default
+            node = getattr(node, key, _MISSING)
+            if node is _MISSING:
+                return default
+
+        return node
+
+    def __call__(self, ret="val", key=None, default=None):
+        """See DotNotation.__call__(). Attributes are resolved beforehand."""
+
+        if ret == "resolve":
+            self._lazy_resolver.resolve()
+            self._lazy_materialize()
+            for value in vars(self).values():
+                if isinstance(value, DotNotation):
+                    value("resolve")
+            return self
+
+        return super(LazyDotNotation, self).__call__(ret, key, default)
+
+    def __reduce_ex__(self, protocol):
+        """Copy and pickle the resolved config as DotNotation since the
+        resolver is not part of copies."""
+
+        self("resolve")
+        return _restore_dot, (self.__getstate__(),)
+
+    def _dot_view(self, ret):
+        """See DotNotation._dot_view(). Attributes are resolved
+        beforehand."""
+
+        self._lazy_materialize()
+        return super(LazyDotNotation, self)._dot_view(ret)
+
+    def _lazy_set(self, name, is_node):
+        """Resolve a child attribute and set it on the instance."""
+
+        key_chain = self._lazy_prefix + (name,)
+        if is_node:
+            value = LazyDotNotation(self._lazy_resolver, key_chain)
+        else:
+            value = self._lazy_resolver.value(key_chain)
+
+        setattr(self, name, value)
+        return value
+
+    def _lazy_materialize(self):
+        """Resolve all direct child attributes which are not set yet."""
+
+        if self._lazy_complete:
+            return
+
+        attributes = vars(self)
+        children = self._lazy_resolver.children(self._lazy_prefix)
+        for name, is_node in list(children.items()):
+            if name not in attributes:
+                self._lazy_set(name, is_node)
+
+        self._lazy_complete = True
+
+
+class CompactNotation(object):
+    """Read-only dot notation view of a compact config store like a
+    BinaryIndex. Nodes are created and values are decoded on access only,
+    hence nothing is copied up front. Supports the same calls as
+    DotNotation except 'resolve' which returns the instance itself.
+
+    Parameters
+    ----------
+    store: {BinaryIndex, FlatStore, ArrayStore}
+        Store providing find(), value(), is_node() and children().
+    prefix: tuple, optional
+        Key chain of this node within the store.
+
+    """
+
+    __slots__ = ("_store", "_prefix")
+
+    def __init__(self, store, prefix=()):
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_prefix", prefix)
+
+    def __getattr__(self, name):
+        """Decode values and create nodes on access."""
+
+        if name in CompactNotation.__slots__ or (name.startswith("__") and
+                                                 name.endswith("__")):
+            raise AttributeError(name)
+
+        value = self._compact_get((name,), _MISSING)
+        if value is _MISSING:
+            raise AttributeError(name)
+
+        return value
+
+    def __getitem__(self, key):
+        """Support bracketing attribute access."""
+        return getattr(self, key)
+
+    def __setattr__(self, name, value):
+        raise TypeError("Compact configs are read-only.")
+
+    __setitem__ = __delattr__ = __setattr__
+
+    def __reduce__(self):
+        """Support pickle and copy which cannot set read-only slots."""
+        return type(self), (self._store, self._prefix)
+
+    def __call__(self, ret="val", key=None, default=None):
+        """See DotNotation.__call__()."""
+
+        if ret in ("val", "dot"):
+            view = {}
+            for name, is_node in self._compact_children().items():
+                if is_node == (ret == "dot"):
+                    view[name] = getattr(self, name)
+            return view
+
+        elif ret == "dict":
+            view = {}
+            for name, is_node in self._compact_children().items():
+                value = getattr(self, name)
+                view[name] = value("dict") if is_node else value
+            return view
+
+        elif ret == "get":
+            return self._compact_get((key,), default)
+
+        elif ret == "resolve":
+            return self
+
+        elif ret == "lookup":
+            return self._compact_get(_key_chain(key), default)
+
+        elif ret == "lookup_many":
+            return [self._compact_get(_key_chain(item), default)
+                    for item in key]
 
     def __repr__(self):
         """Return string representation."""
         tpl = "CfgNode: {} nodes ({}) / {} values ({})"
-        nodes = self("dot").keys()
-        values = self("val").keys()
-        return tpl.format(len(nodes), nodes, len(values), values)
\ No newline at end of file
+        children = self._compact_children()
+        nodes = [name for name, is_node in children.items() if is_node]
+        values = [name for name, is_node in children.items() if not is_node]
+        return tpl.format(len(nodes), nodes, len(values), values)
+
+    def _compact_get(self, key_chain, default):
+        """Return the value or node of given key chain relative to this
+        node."""
+
+        key_chain = self._prefix + key_chain
+        position = self._store.find(key_chain)
+        if position is not None:
+            return self._store.value(position)
+
+        if self._store.is_node(key_chain):
+            return CompactNotation(self._store, key_chain)
+
+        return default
+
+    def _compact_children(self):
+        """Return child keys mapped to a boolean which is True for nodes."""
+
+        return self._store.children(self._prefix)
+
+
+_set_store = CompactNotation._store.__set__
+_set_prefix = CompactNotation._prefix.__set__
+
+
+class ArrayNotation(CompactNotation):
+    """CompactNotation view of an ArrayStore. Views refer to the entry of
+    their node instead of a key chain, hence keys are resolved relative to
+    the node independent of its depth.
+
+    Parameters
+    ----------
+    store: ArrayStore
+        Store containing the entire config.
+    prefix: int, optional
+        Entry of this node within the store.
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, store, prefix=0):
+        super(ArrayNotation, self).__init__(store, prefix)
+
+    def _compact_get(self, key_chain, default):
+        """Return the value or node of given key chain relative to this
+        node."""
+
+        entry = self._store.descend(self._prefix, key_chain)
+        if entry is None:
+            return default
+
+        store = self._store
+        if store.is_value(entry):
+            return store.value(entry)
+
+        # skip __init__ since views are created on every node access
+        view = object.__new__(ArrayNotation)
+        _set_store(view, store)
+        _set_prefix(view, entry)
+        return view
+
+    def _compact_children(self):
+        """Return child keys mapped to a boolean which is True for nodes."""
+
+        return self._store.entry_children(self._prefix)
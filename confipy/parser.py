@@ -2,16 +2,84 @@
 
 import os
 import six
+import timeit
+import functools
+import collections
+import contextlib
+import confipy.cache
+import confipy.stats
 import confipy.reader
+import confipy.stream
 import confipy.converter
 
 ERR_CFG_NOT_FOUND = "Cannot find referenced config '{}'."
+ERR_CFG_CYCLE = "Config '{}' includes itself."
+ERR_SUBS_MISSING = "Cannot substitute {} due to missing keys: {}."
+ERR_SUBS_CYCLE = "Cannot substitute cyclic references: {}."
+ERR_PARSER_UNKNOWN = "Unknown parser '{}'. Registered parsers are: {}."
+
+Parser = collections.namedtuple("Parser", ["func", "marker", "per_item"])
+
+# parser names mapped to Parser tuples, see register_parser()
+PARSERS = collections.OrderedDict()
+
+
+class SubstitutionError(ValueError):
+    """Raised if substitution references cannot be resolved.
+
+    Attributes
+    ----------
+    missing: dict
+        Key chains mapped to their referenced key chains which do not exist.
+    cycle: tuple
+        Key chains forming a reference cycle.
+
+    """
+
+    def __init__(self, message, missing=None, cycle=None):
+        super(SubstitutionError, self).__init__(message)
+        self.missing = missing or {}
+        self.cycle = cycle or ()
+
+
+def register_parser(name, func, marker=None, per_item=False):
+    """Register a parser which can be referenced by name via the `parsers`
+    parameter of confipy.load(). Registering an existing name replaces the
+    parser.
+
+    Parameters
+    ----------
+    name: str
+        Name of the parser.
+    func: callable
+        Parsers working on the whole config are called with the flattened
+        dictionary and keyword arguments of load() and return a new flattened
+        dictionary. Per item parsers are called with key chain, value and
+        keyword arguments of load() and return the new value.
+    marker: str, callable, optional
+        Token whose presence in a value requires the parser to run. A callable
+        receives the keyword arguments of load() and returns the token. If
+        omitted, the parser always runs and per item parsers receive every
+        value.
+    per_item: bool, optional
+        If True, the parser transforms single values independently of each
+        other. Consecutive per item parsers are fused with the include and
+        substitute parsers into a single traversal of the config.
+
+    """
+
+    PARSERS[name] = Parser(func, marker, per_item)
 
 
 def parsing_handler(parsers, flattened_dict, **kwargs):
     """Delegates positional and keyword arguments to parser functions.
     Returns parsed config as flattened dictionary.
 
+    Parsers are grouped such that each group is run in a single traversal of
+    the config. A group starts with an include parser, may contain any number
+    of per item parsers and ends with a substitute parser. Parsers working on
+    the whole config form groups of their own.
+
     Parameters
     ----------
     parsers: iterable
@@ -25,21 +93,278 @@ def parsing_handler(parsers, flattened_dict, **kwargs):
         Flattened dictionary.
 
     """
-    
-    parsers_opt = {"include": include,
-                   "substitute": substitute}
-    
-    parsed_cfg = flattened_dict.copy()
-    for parser in parsers:
-        parsed_cfg = parsers_opt[parser](parsed_cfg, **kwargs)
+
+    stats = kwargs.get("stats")
+
+    # parsers return new dictionaries, hence no defensive copy is required
+    parsed_cfg = flattened_dict
+    for group in _group_parsers(parsers, kwargs):
+        if group[0] is None:
+            name = group[1]
+            with confipy.stats.timed(stats, "parse." + name):
+                parsed_cfg = PARSERS[name].func(parsed_cfg, **kwargs)
+        else:
+            parsed_cfg = _fused_parse(group, parsed_cfg, **kwargs)
 
     return parsed_cfg
 
 
-def include(flattened_dict, source_path=None, marker="$include", **kwargs):
+def _group_parsers(parsers, kwargs):
+    """Split parser names into groups which are run in a single traversal.
+    Parsers which cannot be fused are returned as (None, name).
+
+    Parameters
+    ----------
+    parsers: iterable
+        Parser names which are executed sequentially.
+    kwargs: dict
+        Keyword arguments of the parsers.
+
+    Return
+    ------
+    groups: list
+
+    """
+
+    groups = []
+    current = []
+
+    for name in parsers:
+        if name not in PARSERS:
+            raise ValueError(ERR_PARSER_UNKNOWN.format(
+                name, ", ".join(PARSERS)))
+
+        parser = PARSERS[name]
+        if not _is_fusable(parser, kwargs):
+            if current:
+                groups.append(tuple(current))
+                current = []
+            groups.append((None, name))
+            continue
+
+        if parser.func is include and current:
+            groups.append(tuple(current))
+            current = []
+
+        current.append(name)
+        if parser.func is substitute:
+            groups.append(tuple(current))
+            current = []
+
+    if current:
+        groups.append(tuple(current))
+
+    return groups
+
+
+def _is_fusable(parser, kwargs):
+    """Check whether given parser can be run within a fused traversal.
+    Includes loaded by multiple workers require the level wise include
+    parser."""
+
+    if parser.func is include:
+        workers = kwargs.get("include_workers")
+        return not workers or workers <= 1
+
+    return parser.per_item or parser.func is substitute
+
+
+def _fused_parse(names, flattened_dict, source_path=None, include_cache=None,
+                 yaml_engine="auto", include_manifest=None, stats=None,
+                 stream=False, **kwargs):
+    """Run a group of parsers in a single traversal of the flattened
+    dictionary. Values without any marker are copied as they are. Included
+    config files are read when their include statement is reached and their
+    items are traversed in place. Substitutions are collected during the
+    traversal and resolved afterwards. Config files which are included
+    several times are read once and their values are shared.
+
+    Parameters
+    ----------
+    names: tuple
+        Parser names of the group, see _group_parsers().
+    flattened_dict: dict
+        Config data as flattened dictionary.
+    source_path: str, optional
+        Path to original config file. Necessary for relative includes.
+    include_cache: IncludeCache, optional
+        Cache for flattened configs of included files.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation for included yaml files.
+    include_manifest: list, optional
+        If provided, key chains and paths of all included config files are
+        appended as tuples.
+    stats: LoadStats, optional
+        Records stage timings, included config files and substitutions.
+    stream: bool, optional
+        If True, included yaml and json files are streamed.
+    kwargs: dict, optional
+        Keyword arguments of the parsers.
+
+    Return
+    ------
+    parsed_dict: dict
+
+    """
+
+    parser_kwargs = dict(kwargs, source_path=source_path,
+                         include_cache=include_cache, yaml_engine=yaml_engine,
+                         include_manifest=include_manifest, stats=stats)
+
+    include_marker = None
+    subs = False
+    item_parsers = []
+    for name in names:
+        parser = PARSERS[name]
+        if parser.func is include:
+            include_marker = _marker_token(parser, kwargs)
+        elif parser.func is substitute:
+            subs = True
+        else:
+            item_parsers.append((parser.func,
+                                 _marker_token(parser, parser_kwargs)))
+
+    splitter = kwargs.get("splitter", " + ")
+    subs_marker = kwargs.get("marker", "$")
+
+    parsed_dict = {}
+    templates = {}
+    payloads = {}
+
+    stage = "+".join(name for name in names
+                     if PARSERS[name].func is not substitute) or "substitute"
+
+    with confipy.stats.timed(stats, "parse." + stage):
+        stack = [(iter(flattened_dict.items()), source_path, ())]
+        while stack:
+            items, current_path, ancestors = stack[-1]
+            for key_chain, value in items:
+                # include is the first parser of its group, hence the raw
+                # value is checked before any other parser runs
+                if (include_marker is not None and
+                        isinstance(value, six.string_types) and
+                        value.startswith(include_marker)):
+                    path, inc_ancestors = _locate_include(
+                        value, current_path, include_marker, ancestors)
+                    if include_manifest is not None:
+                        include_manifest.append((key_chain, path))
+
+                    inc_flat = _read_include(path, include_cache=include_cache,
+                                             yaml_engine=yaml_engine,
+                                             stats=stats, stream=stream,
+                                             payloads=payloads)
+                    stack.append((_prefixed_items(key_chain, inc_flat), path,
+                                  inc_ancestors))
+                    break
+
+                for func, token in item_parsers:
+                    if token is None or _has_token(value, token):
+                        value = func(key_chain, value, **parser_kwargs)
+
+                if subs:
+                    template = _tokenize(value, splitter, subs_marker)
+                    if template is not None:
+                        templates[key_chain] = template
+
+                parsed_dict[key_chain] = value
+            else:
+                stack.pop()
+
+    if templates:
+        with confipy.stats.timed(stats, "parse.substitute"):
+            _substitute_templates(templates, parsed_dict, stats)
+
+    return parsed_dict
+
+
+def _prefixed_items(prefix, flattened_dict):
+    """Iterate items of a flattened dictionary with key chains moved under
+    given prefix."""
+
+    for key_chain, value in flattened_dict.items():
+        yield prefix + key_chain, value
+
+
+def _marker_token(parser, kwargs):
+    """Return the marker token of given parser. None if the parser has no
+    marker."""
+
+    if callable(parser.marker):
+        return parser.marker(kwargs)
+    return parser.marker
+
+
+def _has_token(value, token):
+    """Check whether a string or any string element of a list contains given
+    token."""
+
+    if isinstance(value, six.string_types):
+        return token in value
+
+    if isinstance(value, list):
+        return any(isinstance(element, six.string_types) and token in element
+                   for element in value)
+
+    return False
+
+
+def requires_parsing(parsers, cfg_dict, **kwargs):
+    """Check whether any value of the nested config data contains a marker of
+    the given parsers. Stops at the first occurrence. Parsers without a marker
+    always require parsing.
+
+    Parameters
+    ----------
+    parsers: iterable
+        Parser names which are executed sequentially.
+    cfg_dict: dict
+        Nested dictionary containing config data.
+
+    Return
+    ------
+    boolean
+
+    """
+
+    tokens = []
+    for parser in parsers:
+        if parser not in PARSERS:
+            return True
+
+        token = _marker_token(PARSERS[parser], kwargs)
+        if token is None:
+            return True
+        tokens.append(token)
+
+    if not tokens:
+        return False
+
+    stack = [cfg_dict]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+        elif isinstance(current, six.string_types):
+            if any(token in current for token in tokens):
+                return True
+
+    return False
+
+
+def include(flattened_dict, source_path=None, marker="$include",
+            include_cache=None, include_workers=None, yaml_engine="auto",
+            include_manifest=None, stats=None, stream=False, **kwargs):
     """Scan config dictionary for include statements. Load and insert
     referenced config files under corresponding key's namespace.
 
+    Include statements are collected level by level. All config files of one
+    level are read and flattened at once before their own include statements
+    are collected. The results are merged in the order of the include
+    statements, independent of the number of workers. Config files which are
+    included several times are read once and their values are shared.
+
     Parameters
     ----------
     flattened_dict: dict
@@ -48,6 +373,22 @@ def include(flattened_dict, source_path=None, marker="$include", **kwargs):
         Path to original config file. Necessary for relative includes.
     marker: str, optional
         Set keyword to define include values.
+    include_cache: IncludeCache, optional
+        Cache for flattened configs of included files. May be shared across
+        load calls to read and parse commonly included files only once.
+    include_workers: int, optional
+        Number of threads used to read and flatten included config files of
+        the same level concurrently. By default, files are read sequentially.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation for included yaml files.
+    include_manifest: list, optional
+        If provided, key chains and paths of all included config files are
+        appended as tuples.
+    stats: LoadStats, optional
+        Records read time, size and cache usage of included config files.
+    stream: bool, optional
+        If True, included yaml and json files are streamed, see
+        confipy.stream.read_flat().
 
     Return
     ------
@@ -55,44 +396,274 @@ def include(flattened_dict, source_path=None, marker="$include", **kwargs):
 
     """
 
-    cwd = os.path.dirname(source_path)
-    parsed_dict = {}
+    pending = _find_includes(flattened_dict, source_path, marker)
+    if not pending:
+        return dict(flattened_dict)
+
+    payloads = {}
+    read_func = functools.partial(_read_include, include_cache=include_cache,
+                                  yaml_engine=yaml_engine, stats=stats,
+                                  stream=stream, payloads=payloads)
+    loaded = {}
+
+    with _include_mapper(include_workers) as map_func:
+        while pending:
+            if include_manifest is not None:
+                include_manifest.extend((key_chain, path)
+                                        for key_chain, path, _ in pending)
+            paths = [path for _, path, _ in pending]
+            unique = list(collections.OrderedDict.fromkeys(paths))
+            read = dict(zip(unique, map_func(read_func, unique)))
+            results = [read.pop(path) if path in read else read_func(path)
+                       for path in paths]
+            pending = _collect_includes(pending, results, loaded, marker)
+
+    return _merge_includes(flattened_dict, loaded)
+
+
+def _find_includes(flattened_dict, source_path, marker, ancestors=()):
+    """Find include statements and resolve the paths of referenced config
+    files.
+
+    Parameters
+    ----------
+    flattened_dict: dict
+        Flattened dictionary containing config data.
+    source_path: str
+        Path to config file containing the include statements.
+    marker: str
+        Keyword to define include values.
+    ancestors: tuple, optional
+        Absolute paths of config files which include the source config.
+        Required to detect cyclic includes.
+
+    Return
+    ------
+    pending: list
+        Tuples of key chain, path and ancestors for each include statement.
+
+    """
+
+    pending = []
 
     for key_chain, value in flattened_dict.items():
         try:
             if not value.startswith(marker):
-                parsed_dict[key_chain] = value
                 continue
         except AttributeError:
-            parsed_dict[key_chain] = value
             continue
 
-        absolute_path = value.replace(marker, "").lstrip().rstrip()
-        relative_path = os.path.join(cwd, absolute_path)
+        path, inc_ancestors = _locate_include(value, source_path, marker,
+                                              ancestors)
+        pending.append((key_chain, path, inc_ancestors))
+
+    return pending
 
-        # check relative path first, if not found, absolute path second
-        if os.path.exists(relative_path):
-            path = relative_path
-        elif os.path.exists(absolute_path):
-            path = absolute_path
-        else:
-            raise AssertionError(ERR_CFG_NOT_FOUND.format(absolute_path))
 
-        # load, flatten and include referenced config under its own namespace
-        inc_cfg = confipy.reader.read_config(path)
-        inc_flat = confipy.converter._flat_dict(inc_cfg, list(key_chain))
-        inc_included = include(inc_flat, path)
-        parsed_dict.update(inc_included)
+def _locate_include(value, source_path, marker, ancestors=()):
+    """Resolve the path of the config file referenced by an include statement.
+
+    Parameters
+    ----------
+    value: str
+        Include statement.
+    source_path: str
+        Path to config file containing the include statement.
+    marker: str
+        Keyword to define include values.
+    ancestors: tuple, optional
+        Absolute paths of config files which include the source config.
+
+    Return
+    ------
+    path: str
+        Path to the included config file.
+    ancestors: tuple
+        Absolute paths of config files which include the included config.
+
+    Raises
+    ------
+    AssertionError if the config file does not exist or includes itself.
+
+    """
+
+    cwd = os.path.dirname(source_path)
+    ancestors = ancestors + (os.path.abspath(source_path),)
+
+    absolute_path = value.replace(marker, "").lstrip().rstrip()
+    relative_path = os.path.join(cwd, absolute_path)
+
+    # check relative path first, if not found, absolute path second
+    if os.path.exists(relative_path):
+        path = relative_path
+    elif os.path.exists(absolute_path):
+        path = absolute_path
+    else:
+        raise AssertionError(ERR_CFG_NOT_FOUND.format(absolute_path))
+
+    if os.path.abspath(path) in ancestors:
+        raise AssertionError(ERR_CFG_CYCLE.format(path))
+
+    return path, ancestors
+
+
+def _collect_includes(pending, results, loaded, marker):
+    """Move flattened configs of included files under their key's namespace
+    and find the include statements of the next level.
+
+    Parameters
+    ----------
+    pending: list
+        See _find_includes() for more information.
+    results: iterable
+        Flattened configs corresponding to the pending includes.
+    loaded: dict
+        Key chains of include statements mapped to the flattened configs.
+        Updated in place.
+    marker: str
+        Keyword to define include values.
+
+    Return
+    ------
+    pending: list
+        Include statements of the next level.
+
+    """
+
+    next_pending = []
+    for (key_chain, path, ancestors), inc_flat in zip(pending, results):
+        inc_flat = {key_chain + inc_key_chain: inc_value
+                    for inc_key_chain, inc_value in inc_flat.items()}
+        loaded[key_chain] = inc_flat
+        next_pending.extend(_find_includes(inc_flat, path, marker, ancestors))
+
+    return next_pending
+
+
+def _merge_includes(flattened_dict, loaded):
+    """Replace include statements with the flattened configs of included
+    files while preserving the order of items.
+
+    Parameters
+    ----------
+    flattened_dict: dict
+        Flattened dictionary containing config data.
+    loaded: dict
+        See _collect_includes() for more information.
+
+    Return
+    ------
+    parsed_dict: dict
+
+    """
+
+    parsed_dict = {}
+    for key_chain, value in flattened_dict.items():
+        if key_chain in loaded:
+            parsed_dict.update(_merge_includes(loaded[key_chain], loaded))
+        else:
+            parsed_dict[key_chain] = value
 
     return parsed_dict
 
 
-def substitute(to_parse, parsed=None, splitter=" + ", marker="$", **kwargs):
+@contextlib.contextmanager
+def _include_mapper(include_workers):
+    """Provide a map function which either runs sequentially or in a thread
+    pool, depending on the number of workers. Both preserve the order of
+    results."""
+
+    if not include_workers or include_workers <= 1:
+        yield lambda func, iterable: [func(item) for item in iterable]
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=include_workers) as executor:
+        yield executor.map
+
+
+def _read_include(path, include_cache=None, yaml_engine="auto", stats=None,
+                  stream=False, payloads=None):
+    """Read and flatten referenced config file. Flattened key chains are
+    relative to the including key's namespace.
+
+    Parameters
+    ----------
+    path: str
+        Path to config file to be included.
+    include_cache: IncludeCache, optional
+        Cache to be used for reading flattened configs.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation.
+    stats: LoadStats, optional
+        Records read time, size and cache usage.
+    stream: bool, optional
+        If True, yaml and json files are streamed into the flattened
+        dictionary.
+    payloads: dict, optional
+        Flattened configs already read within the current load call, keyed by
+        absolute path. Repeated includes of the same file are not read again
+        and share immutable values. Mutable values like lists are copied per
+        include. Updated in place.
+
+    Return
+    ------
+    inc_flat: dict
+
+    """
+
+    start = timeit.default_timer() if stats is not None else None
+
+    inc_flat = None
+    if payloads is not None:
+        payload_key = os.path.abspath(path)
+        inc_flat = payloads.get(payload_key)
+
+    if inc_flat is not None:
+        if stats is not None:
+            stats.record_read(path, timeit.default_timer() - start,
+                              os.path.getsize(path), True)
+        return confipy.cache._copy_flat(inc_flat)
+
+    if include_cache is not None:
+        cache_key = include_cache.key(path)
+        inc_flat = include_cache.get(cache_key)
+
+    cached = inc_flat is not None
+    if not cached:
+        if stream:
+            inc_flat = confipy.stream.read_flat(path, yaml_engine=yaml_engine)
+        else:
+            inc_cfg = confipy.reader.read_config(path,
+                                                 yaml_engine=yaml_engine)
+            inc_flat = confipy.converter._flat_dict(inc_cfg)
+        if include_cache is not None:
+            include_cache.set(cache_key, inc_flat)
+
+    # keep an unmodified copy since configs may be modified before repeated
+    # includes are read, e.g. for lazy loading
+    if payloads is not None:
+        payloads[payload_key] = confipy.cache._copy_flat(inc_flat)
+
+    if stats is not None:
+        if include_cache is not None:
+            stats.record_cache("include", cached)
+        stats.record_read(path, timeit.default_timer() - start,
+                          os.path.getsize(path), cached)
+
+    return inc_flat
+
+
+def substitute(to_parse, parsed=None, splitter=" + ", marker="$", stats=None,
+               **kwargs):
     """Find keys identified by splitter and marker signs. Only values
     containing the splitter are taken into account. Splitted values must have
     keys which begin with the marker sign. Otherwise, keys are ignored.
 
-    The function calls itself recursively until to_parse is empty.
+    Each value is tokenized once. References between values form a dependency
+    graph which is resolved in a single topological pass. Missing references
+    and reference cycles raise a SubstitutionError.
 
     Parameters
     ----------
@@ -104,50 +675,72 @@ def substitute(to_parse, parsed=None, splitter=" + ", marker="$", **kwargs):
         The splitter to identify possible keys.
     marker: str
         The marker to identify correct keys.
+    stats: LoadStats, optional
+        Records resolution passes and value lookups.
 
     Return
     ------
     parsed: dict
 
-    """
+    Raises
+    ------
+    SubstitutionError if references are missing or cyclic.
 
-    # return result if to_parse is empty
-    if not to_parse:
-        return parsed
+    """
 
-    # if there's nothing yet, find all non-subs items
-    if not parsed:
-        parsed = {key: value for key, value in to_parse.items()
-                  if not _contains(value, splitter)}
-        to_parse = {key: value for key, value in to_parse.items()
-                    if key in set(parsed) ^ set(to_parse)}
+    lookup = dict(parsed) if parsed else {}
+    templates = {}
 
-    # iterate items to be parsed; distinguish strings and lists
-    for key, value in to_parse.copy().items():
-        if isinstance(value, six.string_types):
-            valid = _substitue_value(value, parsed, splitter, marker)
+    for key_chain, value in to_parse.items():
+        template = _tokenize(value, splitter, marker)
+        if template is None:
+            lookup[key_chain] = value
         else:
-            valid = [_substitue_value(element, parsed, splitter, marker)
-                     if _contains(element, splitter) else element
-                     for element in value]
+            templates[key_chain] = template
 
-        if all(valid):
-            del to_parse[key]
-            parsed[key] = valid
+    _substitute_templates(templates, lookup, stats)
 
-    return substitute(to_parse, parsed)
+    return lookup
 
 
-def _substitue_value(value, parsed, splitter, marker):
-    """Substitute keys of a singular string. Returns False if one key could
-    not successfully be replaced.
+def _substitute_templates(templates, lookup, stats=None):
+    """Render templates in topological order and store the results in
+    lookup.
 
     Parameters
     ----------
-    value: str
-        String value containing keys to be substituted.
-    parsed: dict
-        Dictionary with valid lookup items for substitution usage.
+    templates: dict
+        Key chains mapped to templates, see _tokenize().
+    lookup: dict
+        Dictionary with valid lookup items for substitution usage. Updated in
+        place.
+    stats: LoadStats, optional
+        Records resolution passes and value lookups.
+
+    Raises
+    ------
+    SubstitutionError if references are missing or cyclic.
+
+    """
+
+    for key_chain in _resolve_order(templates, lookup):
+        lookup[key_chain] = _render(templates[key_chain], lookup)
+
+    if stats is not None and templates:
+        stats.record_substitution(1, sum(len(_references(template))
+                                         for template in templates.values()))
+
+
+def _tokenize(value, splitter, marker):
+    """Split a value into literal parts and referenced key chains. Strings are
+    represented as a list of parts where literals are strings and references
+    are key chain tuples. Lists are represented as a list of element
+    templates where None marks elements which are kept as they are.
+
+    Parameters
+    ----------
+    value: str, list
+        Value to be tokenized.
     splitter: str
         The splitter to identify possible keys.
     marker: str
@@ -155,25 +748,173 @@ def _substitue_value(value, parsed, splitter, marker):
 
     Return
     ------
-    parsed_item: str, None
+    template: tuple, None
+        Tuple of the original value and its parts. None if the value does not
+        require substitution.
+
+    """
+
+    if isinstance(value, six.string_types):
+        if splitter not in value:
+            return None
+        return value, _tokenize_string(value, splitter, marker)
+
+    if not isinstance(value, list):
+        return None
+
+    elements = [_tokenize_string(element, splitter, marker)
+                if isinstance(element, six.string_types) and
+                splitter in element else None
+                for element in value]
+
+    if not any(element is not None for element in elements):
+        return None
+
+    return value, elements
+
+
+def _tokenize_string(value, splitter, marker):
+    """Tokenize a singular string, see _tokenize() for more information."""
+
+    marker_length = len(marker)
+    return [_convert_key_chain(part[marker_length:])
+            if part.startswith(marker) else part
+            for part in value.split(splitter)]
+
+
+def _references(template):
+    """Return all key chains referenced by given template.
+
+    Parameters
+    ----------
+    template: tuple
+        See _tokenize() for more information.
+
+    Return
+    ------
+    references: list
+
+    """
+
+    value, parts = template
+    if isinstance(value, six.string_types):
+        parts = (parts,)
+
+    return [part for element in parts if element is not None
+            for part in element if isinstance(part, tuple)]
+
+
+def _resolve_order(templates, lookup):
+    """Determine the order in which templates have to be rendered such that
+    all references are resolved beforehand. Uses an iterative depth first
+    search to be independent of python's recursion limit.
+
+    Parameters
+    ----------
+    templates: dict
+        Key chains mapped to templates, see _tokenize().
+    lookup: dict
+        Dictionary with valid lookup items for substitution usage.
+
+    Return
+    ------
+    order: list
+        Key chains of templates in topological order.
+
+    Raises
+    ------
+    SubstitutionError if references are missing or cyclic.
 
     """
 
-    parsed_item = ""
-    for part in value.split(splitter):
-        if not part.startswith(marker):
-            parsed_item += part
+    dependencies = {}
+    missing = {}
+
+    for key_chain, template in templates.items():
+        references = _references(template)
+        dependencies[key_chain] = [reference for reference in references
+                                   if reference in templates]
+
+        not_found = [reference for reference in references
+                     if reference not in templates and reference not in lookup]
+        if not_found:
+            missing[key_chain] = not_found
+
+    if missing:
+        raise SubstitutionError(ERR_SUBS_MISSING.format(
+            _format_key_chains(missing),
+            _format_key_chains(set().union(*missing.values()))),
+            missing=missing)
+
+    order = []
+    visiting, done = set(), set()
+
+    for root in dependencies:
+        if root in done:
             continue
 
-        key_chain = _convert_key_chain(part[1:])
-        parsed_value = parsed.get(key_chain)
+        visiting.add(root)
+        stack = [(root, iter(dependencies[root]))]
+        while stack:
+            key_chain, remaining = stack[-1]
+            for dependency in remaining:
+                if dependency in visiting:
+                    chains = [chain for chain, _ in stack]
+                    cycle = tuple(chains[chains.index(dependency):])
+                    raise SubstitutionError(ERR_SUBS_CYCLE.format(
+                        _format_key_chains(cycle)), cycle=cycle)
+
+                if dependency not in done:
+                    visiting.add(dependency)
+                    stack.append((dependency,
+                                  iter(dependencies[dependency])))
+                    break
+            else:
+                stack.pop()
+                visiting.discard(key_chain)
+                done.add(key_chain)
+                order.append(key_chain)
+
+    return order
+
+
+def _render(template, lookup):
+    """Substitute references of given template with values from lookup.
+
+    Parameters
+    ----------
+    template: tuple
+        See _tokenize() for more information.
+    lookup: dict
+        Dictionary with valid lookup items for substitution usage.
 
-        if not parsed_value:
-            return [False]
+    Return
+    ------
+    rendered: str, list
+
+    """
 
-        parsed_item += parsed_value
+    value, parts = template
+    if isinstance(value, six.string_types):
+        return _render_string(parts, lookup)
 
-    return parsed_item
+    return [element if element_parts is None
+            else _render_string(element_parts, lookup)
+            for element, element_parts in zip(value, parts)]
+
+
+def _render_string(parts, lookup):
+    """Render a singular tokenized string, see _render()."""
+
+    return "".join([lookup[part] if isinstance(part, tuple) else part
+                    for part in parts])
+
+
+def _format_key_chains(key_chains):
+    """Represent key chains in dot notation for error messages."""
+
+    return ", ".join(sorted(".".join(map(six.text_type, key_chain))
+                            for key_chain in key_chains))
 
 
 def _contains(values, splitter):
@@ -207,3 +948,9 @@ def _convert_key_chain(key_string):
     """Convert dot notation to tupled key chain notation"""
 
     return tuple(key_string.split("."))
+
+
+register_parser("include", include,
+                marker=lambda kwargs: kwargs.get("marker", "$include"))
+register_parser("substitute", substitute,
+                marker=lambda kwargs: kwargs.get("splitter", " + "))
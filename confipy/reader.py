@@ -1,8 +1,13 @@
 """This module contains the config reader."""
 
+import re
+import six
 import yaml
 import json
+import logging
 import collections
+import confipy.binary
+import confipy.converter
 
 # python 2.7
 try:
@@ -10,6 +15,11 @@ try:
 except ImportError:
     import ConfigParser as configparser
 
+logger = logging.getLogger(__name__)
+
+SECTION_PATTERN = re.compile(r"^\[[^\[\]'\",]+\]$")
+YAML_PATTERN = re.compile(r"^(---|- |-$|[^=]*:(\s|$))")
+
 
 def _construct_unicode(self, node):
     """Override the default string handling function to always return unicode
@@ -23,11 +33,53 @@ def _construct_unicode(self, node):
     return self.construct_scalar(node)
 
 
-yaml.Loader.add_constructor(u'tag:yaml.org,2002:str', _construct_unicode)
-yaml.SafeLoader.add_constructor(u'tag:yaml.org,2002:str', _construct_unicode)
+YAML_LOADERS = {"python": yaml.Loader}
+
+# C accelerated loaders are only available if PyYAML is built with libyaml
+if getattr(yaml, "__with_libyaml__", False):
+    YAML_LOADERS["c"] = yaml.CLoader
+
+for loader in (yaml.Loader, yaml.SafeLoader, getattr(yaml, "CLoader", None),
+               getattr(yaml, "CSafeLoader", None)):
+    if loader is not None:
+        loader.add_constructor(u'tag:yaml.org,2002:str', _construct_unicode)
+
+
+def _read_yaml(fp, yaml_engine="auto", **kwargs):
+    """Read yaml compliant config file from file like object.
+
+    Parameters
+    ----------
+    fp: file-like object
+        Any object having a read() method.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation. By default, the libyaml based
+        C loader is used if available. Otherwise, falls back to the pure
+        python loader.
+
+    Return
+    ------
+    cfg_dict: dict
+        Dictionary containing config data.
+
+    """
+
+    return yaml.load(fp, Loader=_yaml_loader(yaml_engine))
+
+
+def _yaml_loader(yaml_engine="auto"):
+    """Return the yaml loader class of given yaml engine, see _read_yaml()."""
 
+    if yaml_engine == "auto":
+        return YAML_LOADERS.get("c", YAML_LOADERS["python"])
+    elif yaml_engine in YAML_LOADERS:
+        return YAML_LOADERS[yaml_engine]
 
-def _read_configparser(fp):
+    raise ValueError("Yaml engine '{}' is not available.".format(
+        yaml_engine))
+
+
+def _read_configparser(fp, **kwargs):
     """Read configparser compliant config file from file like object.
 
     Parameters
@@ -55,20 +107,130 @@ def _read_configparser(fp):
     return cfg_dict
 
 
-READER = collections.OrderedDict({"yaml": yaml.load,
-                                  "configparser": _read_configparser,
-                                  "json": json.load})
+def _read_json(fp, **kwargs):
+    """Read json compliant config file from file like object.
+
+    Parameters
+    ----------
+    fp: file-like object
+        Any object having a read() method.
+
+    Return
+    ------
+    cfg_dict: dict
+        Dictionary containing config data.
+
+    """
+
+    return json.load(fp)
+
+
+def _read_compiled(fp, verify=False, flat=False, **kwargs):
+    """Read compiled config file from binary file like object, see
+    confipy.compiler.compile_config().
+
+    Parameters
+    ----------
+    fp: file-like object
+        Any object having a read() method returning bytes.
+    verify: bool, optional
+        If True, the source files of the compiled config are hashed and
+        compared to the hashes recorded at compile time.
+    flat: bool, optional
+        If True, the flattened dictionary in dot notation is returned as
+        stored instead of the nested dictionary.
+
+    Return
+    ------
+    cfg_dict: dict
+        Dictionary containing config data.
+
+    Raises
+    ------
+    IOError if verification fails because source files changed.
+
+    """
+
+    index = confipy.binary.BinaryIndex(getattr(fp, "buffer", fp).read())
+
+    if verify:
+        stale = confipy.binary.stale_sources(index.metadata)
+        if stale:
+            raise IOError("Compiled config is outdated. Changed source "
+                          "files: {}.".format(", ".join(stale)))
+
+    flattened = dict(index.items())
+    if flat:
+        return flattened
+
+    return confipy.converter._unflat_dict(flattened)
+
+
+READER = collections.OrderedDict([("yaml", _read_yaml),
+                                  ("configparser", _read_configparser),
+                                  ("json", _read_json),
+                                  ("compiled", _read_compiled)])
 
 MIME_TYPES = {"yaml": READER["yaml"],
               "yml": READER["yaml"],
               "ini": READER["configparser"],
               "cfg": READER["configparser"],
-              "json": READER["json"]}
+              "json": READER["json"],
+              "cfgc": READER["compiled"]}
+
+# reader functions which require files to be opened in binary mode
+BINARY_READERS = (READER["compiled"],)
+
+
+def _sniff_format(content):
+    """Infer the config format from the first significant line of the config
+    content. Comment lines are skipped.
+
+    Content starting with a bracket or brace is json if it can be decoded as
+    json. Otherwise, it is ini if the first line is a section header and yaml
+    else since yaml flow collections look like json.
+
+    Parameters
+    ----------
+    content: str
+        Config content to be inspected.
+
+    Return
+    ------
+    read_label: {"yaml", "configparser", "json", None}
+        None if the format cannot be inferred.
+
+    """
 
+    stripped = content.lstrip(u"\ufeff \t\r\n")
+    if not stripped:
+        return "yaml"
 
-def _read_infer(fp):
-    """Iterates config reader functions and tries to find correct reader via
-    try except statements.
+    first = next((line.strip() for line in stripped.splitlines()
+                  if line.strip() and
+                  not line.lstrip().startswith(("#", ";"))), "")
+
+    if first[:1] in ("{", "["):
+        try:
+            json.loads(stripped)
+        except ValueError:
+            pass
+        else:
+            return "json"
+
+        if SECTION_PATTERN.match(first):
+            return "configparser"
+        return "yaml"
+
+    if YAML_PATTERN.match(first):
+        return "yaml"
+
+    return None
+
+
+def _read_infer(fp, **kwargs):
+    """Read config content once, sniff its format and parse it with the
+    corresponding reader function.
 
     Parameters
     ----------
@@ -82,34 +244,40 @@ def _read_infer(fp):
 
     Raises
     ------
-    IOError if no reader functions applies.
+    IOError if the format cannot be inferred or parsing fails.
 
     """
 
-    for read_label, read_func in READER.items():
-        try:
-            cfg_dict = read_func(fp)
-        except Exception as error:
-            print("Reader '{}' fails.".format(read_label))
-        else:
-            print("Reader '{}' succeeds.".format(read_label))
-            return cfg_dict
-        finally:
-            fp.seek(0)
-    else:
-        raise IOError("Cannot find appropriate reader.")
+    content = fp.read()
+    read_label = _sniff_format(content)
+
+    if read_label is None:
+        raise IOError("Cannot infer config format. Please provide the "
+                      "read_engine explicitly.")
 
+    logger.debug("Inferred read engine '%s'.", read_label)
 
-def read_config(path_or_fp, read_engine="auto"):
+    try:
+        return READER[read_label](six.StringIO(content), **kwargs)
+    except Exception as error:
+        logger.debug("Read engine '%s' fails: %s", read_label, error)
+        six.raise_from(IOError("Cannot read config with inferred read "
+                               "engine '{}'.".format(read_label)), error)
+
+
+def read_config(path_or_fp, read_engine="auto", **kwargs):
     """Read config file and return as dictionary.
 
     Parameters
     ----------
     path_or_fp: str, file-like
         Path to config file to be read.
-    read_engine: {"auto", "yaml", "json", "configparser"}
+    read_engine: {"auto", "yaml", "json", "configparser", "compiled"}
         Define the read engine to open the config file. By default, the file
-        type is used to infer the correct read engine.
+        type is used to infer the correct read engine. Unknown file types are
+        inferred from their content.
+    kwargs: dict, optional
+        Keyword arguments passed to the read engine, e.g. `yaml_engine`.
 
     Return
     ------
@@ -120,13 +288,35 @@ def read_config(path_or_fp, read_engine="auto"):
 
     # check for path or file-like object
     if hasattr(path_or_fp, "read"):
-        fp = path_or_fp
-        mime = read_engine
-    else:
-        fp = open(path_or_fp, "r")
-        mime = path_or_fp.split(".")[-1].lower()
+        read_function = _get_reader(read_engine)
+        return read_function(path_or_fp, **kwargs)
+
+    if read_engine == "auto":
+        read_engine = path_or_fp.split(".")[-1].lower()
 
-    read_function = MIME_TYPES.get(mime, _read_infer)
-    cfg_dict = read_function(fp)
+    read_function = _get_reader(read_engine)
+    mode = "rb" if read_function in BINARY_READERS else "r"
+    with open(path_or_fp, mode) as fp:
+        cfg_dict = read_function(fp, **kwargs)
 
     return cfg_dict
+
+
+def _is_compiled(path_or_fp, read_engine="auto"):
+    """Check whether config file is read by the compiled read engine, either
+    explicitly or inferred from the file type."""
+
+    if read_engine == "auto" and not hasattr(path_or_fp, "read"):
+        read_engine = path_or_fp.split(".")[-1].lower()
+
+    return _get_reader(read_engine) is READER["compiled"]
+
+
+def _get_reader(read_engine):
+    """Return reader function for given read engine or file type. Falls back
+    to content based inference for unknown values."""
+
+    if read_engine in READER:
+        return READER[read_engine]
+
+    return MIME_TYPES.get(read_engine, _read_infer)
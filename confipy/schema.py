@@ -0,0 +1,489 @@
+"""This module contains schema-driven config classes.
+
+A schema is a dictionary which maps keys to types, nested schemas or Field
+instances, e.g.:
+
+    {"db": {"host": str, "pool": {"size": int}}, "debug": bool}
+
+compile_schema() generates one class per nested schema whose fields are
+__slots__. Instances are built from the flattened dictionary of the loading
+pipeline in a single pass over the fields of the schema. Values are
+converted to the declared types while building, hence invalid values raise a
+SchemaError at load time and reading a field is a plain slot access.
+Generated classes are cached per schema.
+
+"""
+
+import re
+import six
+import threading
+
+ERR_MISSING = "Missing value for '{}' required by schema."
+ERR_CONVERT = "Cannot convert value {!r} of '{}' to {}: {}"
+ERR_FIELD = "Schema key {!r} is not a valid attribute name."
+ERR_RESERVED = "Schema key {!r} collides with a member of SchemaConfig."
+ERR_SPEC = "Invalid schema specification of '{}': {!r}."
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# string representations of booleans, equal to configparser
+BOOLEAN_STATES = {"1": True, "yes": True, "true": True, "on": True,
+                  "0": False, "no": False, "false": False, "off": False}
+
+_MISSING = object()
+
+# schema keys mapped to generated classes, see compile_schema()
+_CLASSES = {}
+_CLASSES_LOCK = threading.Lock()
+
+
+class SchemaError(ValueError):
+    """Raised if config data does not match a schema.
+
+    Attributes
+    ----------
+    key_chain: tuple
+        Key chain of the invalid or missing value.
+
+    """
+
+    def __init__(self, message, key_chain=()):
+        super(SchemaError, self).__init__(message)
+        self.key_chain = key_chain
+
+
+class Field(object):
+    """Schema field with an optional default value.
+
+    Parameters
+    ----------
+    type: type, callable, list
+        Type of the field, see compile_schema().
+    default: object, optional
+        Value which is used if the config does not contain the field. It is
+        not converted. By default, the field is required.
+
+    """
+
+    __slots__ = ("type", "default")
+
+    def __init__(self, type, default=_MISSING):
+        self.type = type
+        self.default = default
+
+    def __repr__(self):
+        """Return string representation."""
+
+        if self.default is _MISSING:
+            return "Field({!r})".format(self.type)
+        return "Field({!r}, default={!r})".format(self.type, self.default)
+
+
+class SchemaConfig(object):
+    """Base class of generated config classes. Supports bracket access and
+    the calls of DotNotation.
+
+    Generated classes provide the class attributes `_schema_nodes` and
+    `_schema_leaves` which describe how instances are built, see
+    from_flat(). `_schema_children` maps keys of nested schemas to their
+    classes and `_schema_source` contains the root schema, the root class
+    name and the key chain of the class which are required for pickling.
+
+    """
+
+    __slots__ = ()
+
+    _schema_nodes = ()
+    _schema_leaves = ()
+    _schema_children = {}
+    _schema_source = None
+
+    @classmethod
+    def from_flat(cls, flat_dict):
+        """Build an instance from a flattened dictionary. All nodes are
+        created first. Afterwards, each field is looked up, converted and set
+        once.
+
+        Parameters
+        ----------
+        flat_dict: dict
+            Flattened dictionary in dot notation, see
+            confipy.converter._flat_dict().
+
+        Return
+        ------
+        config: SchemaConfig
+
+        """
+
+        nodes = []
+        for node_cls, parent, setter in cls._schema_nodes:
+            node = object.__new__(node_cls)
+            if setter is not None:
+                setter(nodes[parent], node)
+            nodes.append(node)
+
+        for key_chain, index, setter, converter, default in cls._schema_leaves:
+            value = flat_dict.get(key_chain, _MISSING)
+            if value is not _MISSING:
+                try:
+                    value = converter(value)
+                except (TypeError, ValueError) as error:
+                    raise SchemaError(ERR_CONVERT.format(
+                        value, ".".join(key_chain), converter.type_name,
+                        error), key_chain)
+            elif default is not _MISSING:
+                value = default
+            else:
+                raise SchemaError(ERR_MISSING.format(".".join(key_chain)),
+                                  key_chain)
+
+            setter(nodes[index], value)
+
+        return nodes[0]
+
+    def __getitem__(self, key):
+        """Support bracketing attribute access."""
+        return getattr(self, key)
+
+    def __call__(self, ret="val", key=None, default=None):
+        """See DotNotation.__call__()."""
+
+        if ret in ("val", "dot"):
+            return {name: getattr(self, name) for name in self.__slots__
+                    if isinstance(getattr(self, name),
+                                  SchemaConfig) == (ret == "dot")}
+
+        elif ret == "dict":
+            view = {}
+            for name in self.__slots__:
+                value = getattr(self, name)
+                view[name] = value("dict") if isinstance(
+                    value, SchemaConfig) else value
+            return view
+
+        elif ret == "get":
+            if key not in self.__slots__:
+                return default
+            return getattr(self, key)
+
+        elif ret == "lookup":
+            return self._schema_lookup(key, default)
+
+        elif ret == "lookup_many":
+            return [self._schema_lookup(item, default) for item in key]
+
+        elif ret == "resolve":
+            return self
+
+    def __reduce__(self):
+        """Pickle the schema and field values. Unpickling compiles the schema
+        again, hence its types must be picklable."""
+
+        values = tuple(getattr(self, name) for name in self.__slots__)
+        return _restore, self._schema_source + (values,)
+
+    def __eq__(self, other):
+        if not isinstance(other, SchemaConfig):
+            return NotImplemented
+        return type(self) is type(other) and self("dict") == other("dict")
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        """Return string representation."""
+
+        fields = ", ".join("{}={!r}".format(name, getattr(self, name))
+                           for name in self.__slots__)
+        return "{}({})".format(type(self).__name__, fields)
+
+    def _schema_lookup(self, key, default):
+        """Return the value or node of given key chain."""
+
+        if isinstance(key, six.string_types):
+            key = key.split(".")
+
+        node = self
+        for name in key:
+            if (not isinstance(node, SchemaConfig) or
+                    name not in node.__slots__):
+                return default
+            node = getattr(node, name)
+
+        return node
+
+
+def compile_schema(schema, name="Config"):
+    """Return the generated class of given schema. Classes are cached, hence
+    equal schemas share the same class.
+
+    Parameters
+    ----------
+    schema: dict
+        Keys mapped to field types, nested schemas or Field instances. Keys
+        must be valid attribute names. Types are applied as follows:
+
+        - bool: accepts booleans and strings like 'yes', 'off' or '1'.
+        - int, float: reject booleans and non integral floats for int.
+        - str: accepts strings, numbers are converted to strings.
+        - list: accepts lists and splits strings by comma.
+        - [type]: list whose elements are converted to type.
+        - other callables: called with the value.
+    name: str, optional
+        Class name of the root. Nested classes are named by appending the
+        capitalized key.
+
+    Return
+    ------
+    cls: type
+        Subclass of SchemaConfig.
+
+    """
+
+    key = (name, _schema_key(schema))
+    try:
+        hash(key)
+    except TypeError:
+        return _source(_generate(schema, name, ()), (schema, name, ()))
+
+    with _CLASSES_LOCK:
+        cls = _CLASSES.get(key)
+        if cls is None:
+            cls = _CLASSES[key] = _source(_generate(schema, name, ()),
+                                          (schema, name, ()))
+
+    return cls
+
+
+def build(schema, flat_dict, name="Config"):
+    """Build a config instance of given schema from a flattened dictionary,
+    see compile_schema() and SchemaConfig.from_flat()."""
+
+    return compile_schema(schema, name).from_flat(flat_dict)
+
+
+def _source(cls, source):
+    """Set the `_schema_source` of a generated class and its nested classes
+    and return the class."""
+
+    cls._schema_source = source
+    schema, name, prefix = source
+    for key, child in cls._schema_children.items():
+        _source(child, (schema, name, prefix + (key,)))
+
+    return cls
+
+
+def _restore(schema, name, prefix, values):
+    """Restore a pickled instance, see SchemaConfig.__reduce__()."""
+
+    cls = compile_schema(schema, name)
+    for key in prefix:
+        cls = cls._schema_children[key]
+
+    config = object.__new__(cls)
+    for field, value in zip(cls.__slots__, values):
+        setattr(config, field, value)
+
+    return config
+
+
+def _schema_key(schema):
+    """Return a cache key of given schema."""
+
+    if isinstance(schema, dict):
+        return tuple((key, _schema_key(spec)) for key, spec in schema.items())
+
+    if isinstance(schema, Field):
+        return Field, _schema_key(schema.type), schema.default
+
+    if isinstance(schema, list):
+        return list, tuple(_schema_key(spec) for spec in schema)
+
+    return schema
+
+
+def _generate(schema, name, prefix):
+    """Generate the class of a nested schema. Nested classes are generated
+    first and their build instructions are moved under the field's node.
+
+    Parameters
+    ----------
+    schema: dict
+        See compile_schema().
+    name: str
+        Class name.
+    prefix: tuple
+        Key chain of the schema within the root schema. Only used for error
+        messages.
+
+    Return
+    ------
+    cls: type
+
+    """
+
+    fields = []
+    for key in schema:
+        if not isinstance(key, six.string_types) or not IDENTIFIER.match(key):
+            raise SchemaError(ERR_FIELD.format(key), prefix + (key,))
+        if key in RESERVED or (key.startswith("__") and key.endswith("__")):
+            raise SchemaError(ERR_RESERVED.format(key), prefix + (key,))
+        fields.append(str(key))
+
+    cls = type(str(name), (SchemaConfig,), {"__slots__": tuple(fields)})
+
+    nodes = [(cls, None, None)]
+    leaves = []
+    children = {}
+
+    for key, spec in schema.items():
+        setter = cls.__dict__[str(key)].__set__
+
+        if isinstance(spec, dict):
+            child = _generate(spec, name + key[:1].upper() + key[1:],
+                              prefix + (key,))
+            children[key] = child
+            offset = len(nodes)
+            for node_cls, parent, node_setter in child._schema_nodes:
+                if node_setter is None:
+                    nodes.append((node_cls, 0, setter))
+                else:
+                    nodes.append((node_cls, offset + parent, node_setter))
+            for leaf in child._schema_leaves:
+                leaves.append(((key,) + leaf[0], offset + leaf[1]) +
+                              leaf[2:])
+            continue
+
+        default = _MISSING
+        if isinstance(spec, Field):
+            spec, default = spec.type, spec.default
+
+        leaves.append(((key,), 0, setter,
+                       _converter(spec, prefix + (key,)), default))
+
+    cls._schema_nodes = tuple(nodes)
+    cls._schema_leaves = tuple(leaves)
+    cls._schema_children = children
+    return cls
+
+
+def _converter(spec, key_chain):
+    """Return the converter of a field type. Converters provide the name of
+    their type for error messages."""
+
+    if isinstance(spec, list):
+        if len(spec) != 1:
+            raise SchemaError(ERR_SPEC.format(".".join(key_chain), spec),
+                              key_chain)
+        return _ListConverter(_converter(spec[0], key_chain))
+
+    if spec in CONVERTERS:
+        return CONVERTERS[spec]
+
+    if not callable(spec):
+        raise SchemaError(ERR_SPEC.format(".".join(key_chain), spec),
+                          key_chain)
+
+    return _Converter(spec, getattr(spec, "__name__", repr(spec)))
+
+
+class _Converter(object):
+    """Converter function with the name of its type."""
+
+    __slots__ = ("func", "type_name")
+
+    def __init__(self, func, type_name):
+        self.func = func
+        self.type_name = type_name
+
+    def __call__(self, value):
+        return self.func(value)
+
+
+class _ListConverter(object):
+    """Converter of lists whose elements are converted, too."""
+
+    __slots__ = ("element", "type_name")
+
+    def __init__(self, element):
+        self.element = element
+        self.type_name = "list of {}".format(element.type_name)
+
+    def __call__(self, value):
+        return [self.element(item) for item in _to_list(value)]
+
+
+def _to_bool(value):
+    """Convert booleans and their string representations."""
+
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, six.string_types):
+        try:
+            return BOOLEAN_STATES[value.strip().lower()]
+        except KeyError:
+            pass
+
+    elif isinstance(value, six.integer_types) and value in (0, 1):
+        return bool(value)
+
+    raise ValueError("not a boolean")
+
+
+def _to_int(value):
+    """Convert integers, integral floats and strings of integers."""
+
+    if isinstance(value, bool):
+        raise TypeError("boolean is not an integer")
+
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError("float is not integral")
+
+    return int(value)
+
+
+def _to_float(value):
+    """Convert numbers and strings of numbers."""
+
+    if isinstance(value, bool):
+        raise TypeError("boolean is not a float")
+
+    return float(value)
+
+
+def _to_text(value):
+    """Convert strings and numbers to text."""
+
+    if isinstance(value, (list, dict, bool)) or value is None:
+        raise TypeError("{} is not a string".format(type(value).__name__))
+
+    return six.text_type(value)
+
+
+def _to_list(value):
+    """Convert lists and comma separated strings."""
+
+    if isinstance(value, list):
+        return value
+
+    if isinstance(value, six.string_types):
+        return [item.strip() for item in value.split(",")]
+
+    raise TypeError("{} is not a list".format(type(value).__name__))
+
+
+# members of generated classes which must not be shadowed by fields
+RESERVED = frozenset(dir(SchemaConfig))
+
+CONVERTERS = {bool: _Converter(_to_bool, "bool"),
+              int: _Converter(_to_int, "int"),
+              float: _Converter(_to_float, "float"),
+              str: _Converter(_to_text, "str"),
+              six.text_type: _Converter(_to_text, "str"),
+              list: _Converter(_to_list, "list")}
@@ -0,0 +1,200 @@
+"""This module contains configs shared between processes without copying.
+
+A config is serialized once into the binary format and published either to
+shared memory or to a memory mapped file. Other processes attach to it and
+access values through a read-only CompactNotation which decodes values on
+access only.
+
+"""
+
+import os
+import sys
+import mmap
+import tempfile
+import threading
+import confipy.cache
+import confipy.binary
+import confipy.notation
+import confipy.converter
+
+# shared memory requires python 3.8+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = None
+
+ERR_SHM_UNAVAILABLE = "Shared memory requires python 3.8 or higher."
+ERR_TARGET = "Provide either `name` or `path`, not both."
+
+# names of shared memory blocks created by this process
+_OWNED = set()
+_OWNED_LOCK = threading.Lock()
+
+
+class SharedConfig(object):
+    """Handle of a config published to shared memory or a memory mapped
+    file. Use share() and attach() to create instances.
+
+    Attributes
+    ----------
+    config: CompactNotation
+        Read-only view of the shared config.
+    name: str
+        Name of the shared memory block. None for memory mapped files.
+    path: str
+        Path of the memory mapped file. None for shared memory.
+
+    """
+
+    def __init__(self, buffer, shm=None, mapped=None, path=None, owner=False):
+        self._shm = shm
+        self._mapped = mapped
+        self._owner = owner
+        self._index = confipy.binary.BinaryIndex(buffer)
+
+        self.name = shm.name if shm is not None else None
+        self.path = path
+        self.config = confipy.notation.CompactNotation(self._index)
+
+    def close(self):
+        """Detach from the shared config. Views must not be used
+        afterwards."""
+
+        if self._index is None:
+            return
+
+        self._index.release()
+        self._index = None
+
+        if self._shm is not None:
+            self._shm.close()
+        if self._mapped is not None:
+            self._mapped.close()
+
+    def unlink(self):
+        """Close and remove the shared memory block or file. Only required
+        by the publishing process."""
+
+        self.close()
+        if self._shm is not None:
+            self._shm.unlink()
+            with _OWNED_LOCK:
+                _OWNED.discard(self._shm._name)
+        elif self.path is not None:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+def share(cfg, name=None, path=None):
+    """Publish a loaded config to shared memory or a memory mapped file.
+
+    Parameters
+    ----------
+    cfg: DotNotation, dict
+        Config as returned by confipy.load().
+    name: str, optional
+        Name of the shared memory block. By default, a unique name is
+        generated.
+    path: str, optional
+        If given, the config is written to this file instead of shared
+        memory.
+
+    Return
+    ------
+    shared: SharedConfig
+        Handle owning the shared memory block or file. Keep it alive as long
+        as other processes are attached and call unlink() afterwards.
+
+    """
+
+    if name is not None and path is not None:
+        raise ValueError(ERR_TARGET)
+
+    data = confipy.binary.encode(_flatten(cfg))
+
+    if path is not None:
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(handle, "wb") as file:
+            file.write(data)
+        confipy.cache._replace(tmp_path, path)
+        shared = attach(path=path)
+        shared._owner = True
+        return shared
+
+    if shared_memory is None:
+        raise RuntimeError(ERR_SHM_UNAVAILABLE)
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+    shm.buf[:len(data)] = data
+    with _OWNED_LOCK:
+        _OWNED.add(shm._name)
+    return SharedConfig(shm.buf, shm=shm, owner=True)
+
+
+def attach(name=None, path=None):
+    """Attach to a config published via share().
+
+    Parameters
+    ----------
+    name: str, optional
+        Name of the shared memory block.
+    path: str, optional
+        Path of the memory mapped file.
+
+    Return
+    ------
+    shared: SharedConfig
+
+    """
+
+    if (name is None) == (path is None):
+        raise ValueError(ERR_TARGET)
+
+    if path is not None:
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return SharedConfig(mapped, mapped=mapped, path=path)
+
+    if shared_memory is None:
+        raise RuntimeError(ERR_SHM_UNAVAILABLE)
+
+    shm = _attach_shm(name)
+    return SharedConfig(shm.buf, shm=shm)
+
+
+def _attach_shm(name):
+    """Attach to an existing shared memory block without registering it at
+    the resource tracker, which would remove the block once the attaching
+    process exits."""
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+
+    # blocks are registered on posix only. Blocks created by this process
+    # keep their registration which is removed by unlink().
+    with _OWNED_LOCK:
+        owned = shm._name in _OWNED
+    if os.name == "posix" and not owned:
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    return shm
+
+
+def _flatten(cfg):
+    """Return flattened config data of a DotNotation or nested dict."""
+
+    if isinstance(cfg, confipy.notation.DotNotation):
+        cfg = cfg("dict")
+
+    return confipy.converter._flat_dict(cfg, notation="dot")
@@ -0,0 +1,180 @@
+"""This module contains immutable config snapshots and their holder.
+
+Readers fetch the current snapshot once and read any number of values from
+it without locking. Writers build a complete new snapshot first and publish
+it with a single reference assignment, hence readers never observe a
+partially built config and values read from one snapshot are consistent.
+
+"""
+
+import time
+import threading
+import confipy
+import confipy.store
+import confipy.notation
+
+ERR_IMMUTABLE = "Snapshots are immutable."
+ERR_OPTIONS = "Unsupported load options for ConfigHolder: {}."
+
+# options of the flat loading pipeline, see confipy._load_flat()
+LOAD_OPTIONS = ("read_engine", "parsers", "yaml_engine", "stats", "stream",
+                "include_cache", "include_workers", "marker", "splitter",
+                "read_options")
+
+
+class Snapshot(object):
+    """Immutable, versioned config. Mutable values are frozen, namely lists
+    are stored as tuples and sets as frozensets. Mappings are copied.
+
+    Parameters
+    ----------
+    flat_dict: dict
+        Flattened dictionary containing config data. It is copied.
+    version: int, optional
+        Version number of the snapshot.
+
+    Attributes
+    ----------
+    config: CompactNotation
+        Read-only view of the config data.
+    version: int
+    created: float
+        Creation time as seconds since the epoch.
+
+    """
+
+    __slots__ = ("config", "version", "created")
+
+    def __init__(self, flat_dict, version=0):
+        store = confipy.store.FlatStore({key_chain: _freeze(value)
+                                         for key_chain, value
+                                         in flat_dict.items()})
+        object.__setattr__(self, "config",
+                           confipy.notation.CompactNotation(store))
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "created", time.time())
+
+    def __setattr__(self, name, value):
+        raise TypeError(ERR_IMMUTABLE)
+
+    __delattr__ = __setattr__
+
+    def __repr__(self):
+        """Return string representation."""
+        return "Snapshot(version={})".format(self.version)
+
+
+def _freeze(value):
+    """Return an immutable copy of lists and sets. Mappings are copied with
+    frozen values. Other values are returned as they are."""
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(element) for element in value)
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+
+    if isinstance(value, dict):
+        return {key: _freeze(element) for key, element in value.items()}
+
+    return value
+
+
+class ConfigHolder(object):
+    """Holds the current snapshot of a config. Reading the current snapshot
+    is a single attribute access and requires no lock. Publishing a new
+    snapshot replaces the reference atomically. Only writers are serialized.
+
+    Parameters
+    ----------
+    path: str, optional
+        Path to config file which is loaded initially and on reload().
+    load_kwargs: dict, optional
+        Keyword arguments passed to the loading pipeline, see confipy.load().
+        Only options listed in LOAD_OPTIONS are supported because snapshots
+        are built from the flattened config.
+
+    Attributes
+    ----------
+    callbacks: list
+        Callables which are invoked with the new snapshot after each swap.
+
+    """
+
+    def __init__(self, path=None, **load_kwargs):
+        unsupported = sorted(set(load_kwargs) - set(LOAD_OPTIONS))
+        if unsupported:
+            raise ValueError(ERR_OPTIONS.format(", ".join(unsupported)))
+
+        self.path = path
+        self.load_kwargs = load_kwargs
+        self.callbacks = []
+
+        self._write_lock = threading.Lock()
+        self._snapshot = Snapshot({}, version=0)
+
+        if path is not None:
+            self.reload()
+
+    @property
+    def current(self):
+        """Return the current snapshot. Keep the returned snapshot to read
+        several values consistently."""
+
+        return self._snapshot
+
+    @property
+    def config(self):
+        """Return the config of the current snapshot."""
+
+        return self._snapshot.config
+
+    def swap(self, flat_dict):
+        """Build a new snapshot from flattened config data and publish it.
+
+        Parameters
+        ----------
+        flat_dict: dict
+            Flattened dictionary containing config data.
+
+        Returns
+        -------
+        snapshot: Snapshot
+            The published snapshot.
+
+        """
+
+        with self._write_lock:
+            snapshot = Snapshot(flat_dict, version=self._snapshot.version + 1)
+            self._snapshot = snapshot
+
+        for callback in self.callbacks:
+            callback(snapshot)
+
+        return snapshot
+
+    def reload(self):
+        """Load the config file again and publish it as new snapshot. The
+        current snapshot remains in place if loading fails."""
+
+        return self.swap(confipy._load_flat(self.path, **self.load_kwargs))
+
+    def follow(self, reloadable):
+        """Publish a new snapshot initially and whenever given
+        ReloadableConfig changes.
+
+        Parameters
+        ----------
+        reloadable: ReloadableConfig
+            Config whose resolved values are published.
+
+        """
+
+        def publish(changed=True):
+            if changed:
+                with reloadable._lock:
+                    resolved = dict(reloadable.index.resolved)
+                self.swap(resolved)
+
+        publish()
+        reloadable.callbacks.append(publish)
@@ -0,0 +1,284 @@
+"""This module contains instrumentation of the loading pipeline."""
+
+import sys
+import timeit
+import threading
+import collections
+import confipy.notation
+
+FileRead = collections.namedtuple("FileRead",
+                                  ["path", "seconds", "bytes", "cached"])
+
+MemoryUsage = collections.namedtuple("MemoryUsage",
+                                     ["bytes", "nodes", "keys", "unique_keys",
+                                      "values", "unique_values",
+                                      "key_chains"])
+
+
+class LoadStats(object):
+    """Collects timings and counters of load calls. Pass an instance to
+    confipy.load() via the `stats` parameter. One instance may be reused
+    across several load calls to accumulate statistics.
+
+    Parameters
+    ----------
+    hook: callable, optional
+        Called with an event name and a dictionary of event information for
+        each recorded event. Events are 'stage', 'read', 'substitute' and
+        'cache'.
+
+    Attributes
+    ----------
+    stages: dict
+        Stage names mapped to accumulated wall time in seconds, e.g. 'read',
+        'flatten', 'parse.include', 'parse.substitute' and 'unflatten'.
+    files: list
+        FileRead named tuples for every read config file including includes.
+    substitution_passes: int
+        Number of resolution passes of the substitute parser.
+    substitution_lookups: int
+        Number of referenced values which were looked up.
+    cache_hits: int
+        Number of include and config cache hits.
+    cache_misses: int
+        Number of include and config cache misses.
+
+    """
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.stages = collections.OrderedDict()
+        self.files = []
+        self.substitution_passes = 0
+        self.substitution_lookups = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Return a context manager which records the wall time of the
+        enclosed block under given stage name."""
+
+        return _Timer(self, name)
+
+    def record_stage(self, name, seconds):
+        """Add wall time to given stage."""
+
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self._emit("stage", name=name, seconds=seconds)
+
+    def record_read(self, path, seconds, size, cached=False):
+        """Record reading a config file."""
+
+        file_read = FileRead(path, seconds, size, cached)
+        with self._lock:
+            self.files.append(file_read)
+        self._emit("read", **file_read._asdict())
+
+    def record_substitution(self, passes, lookups):
+        """Record resolution passes and value lookups of substitutions."""
+
+        with self._lock:
+            self.substitution_passes += passes
+            self.substitution_lookups += lookups
+        self._emit("substitute", passes=passes, lookups=lookups)
+
+    def record_cache(self, name, hit):
+        """Record a cache hit or miss of given cache name."""
+
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        self._emit("cache", name=name, hit=hit)
+
+    def as_dict(self):
+        """Return all statistics as a json serializable dictionary."""
+
+        return {"stages": dict(self.stages),
+                "files": [file_read._asdict() for file_read in self.files],
+                "substitution_passes": self.substitution_passes,
+                "substitution_lookups": self.substitution_lookups,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses}
+
+    def _emit(self, event, **info):
+        """Forward event to the hook if present."""
+
+        if self.hook is not None:
+            self.hook(event, info)
+
+    def __repr__(self):
+        """Return string representation."""
+
+        stages = ", ".join("{}={:.2f}ms".format(name, seconds * 1000)
+                           for name, seconds in self.stages.items())
+        return "LoadStats({}; {} files)".format(stages, len(self.files))
+
+
+class _Timer(object):
+    """Context manager recording the wall time of a stage."""
+
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = timeit.default_timer()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record_stage(self.name,
+                                timeit.default_timer() - self.start)
+
+
+class _NullTimer(object):
+    """Context manager doing nothing if statistics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(stats, name):
+    """Return stats.stage(name) or a no-op context manager if stats is
+    None."""
+
+    if stats is None:
+        return _NULL_TIMER
+    return stats.stage(name)
+
+
+def memory_usage(cfg):
+    """Estimate the memory used by a loaded config. Objects which are shared,
+    e.g. interned keys or values of repeatedly included config files, are
+    counted once.
+
+    Parameters
+    ----------
+    cfg: {DotNotation, dict, CompactNotation}
+        Loaded config as returned by confipy.load(). For CompactNotation
+        views, the entire underlying store is measured.
+
+    Return
+    ------
+    usage: MemoryUsage
+        Named tuple with the estimated size in bytes, the number of nodes,
+        the number of keys and distinct key objects, the number of values and
+        distinct value objects as well as the number of key chains of the
+        lookup index.
+
+    """
+
+    if isinstance(cfg, confipy.notation.CompactNotation):
+        return _store_usage(cfg._store)
+
+    seen = set()
+    counts = collections.Counter()
+    stack = [cfg]
+
+    while stack:
+        node = stack.pop()
+        counts["nodes"] += 1
+        counts["bytes"] += _object_size(node, seen)
+
+        if isinstance(node, confipy.notation.DotNotation):
+            items = vars(node)
+            counts["bytes"] += _object_size(items, seen)
+            index = node._dot_index
+            if index is not None and id(index) not in seen:
+                counts["bytes"] += _object_size(index, seen)
+                for key_chain in index:
+                    counts["key_chains"] += 1
+                    counts["bytes"] += _object_size(key_chain, seen)
+        else:
+            items = node
+
+        for key, value in items.items():
+            counts["keys"] += 1
+            if id(key) not in seen:
+                counts["unique_keys"] += 1
+                counts["bytes"] += _object_size(key, seen)
+
+            if isinstance(value, (dict, confipy.notation.DotNotation)):
+                stack.append(value)
+                continue
+
+            counts["values"] += 1
+            if id(value) not in seen:
+                counts["unique_values"] += 1
+                counts["bytes"] += _value_size(value, seen)
+
+    return MemoryUsage(*[counts[field] for field in MemoryUsage._fields])
+
+
+def _store_usage(store):
+    """Estimate the memory used by a store backing CompactNotation views, see
+    memory_usage()."""
+
+    seen = set()
+    counts = collections.Counter()
+    counts["bytes"] = _object_size(store, seen)
+    for name in getattr(type(store), "__slots__", ()):
+        counts["bytes"] += _value_size(getattr(store, name), seen)
+
+    values = set()
+    keys = set()
+    stack = [()]
+    while stack:
+        key_chain = stack.pop()
+        counts["nodes"] += 1
+        for key, is_node in store.children(key_chain).items():
+            counts["keys"] += 1
+            keys.add(id(key))
+            if is_node:
+                stack.append(key_chain + (key,))
+            else:
+                counts["values"] += 1
+                values.add(id(store.value(store.find(key_chain + (key,)))))
+
+    counts["unique_keys"] = len(keys)
+    counts["unique_values"] = len(values)
+    return MemoryUsage(*[counts[field] for field in MemoryUsage._fields])
+
+
+def _object_size(obj, seen):
+    """Return the size of given object unless it was seen already."""
+
+    if id(obj) in seen:
+        return 0
+
+    seen.add(id(obj))
+    return sys.getsizeof(obj)
+
+
+def _value_size(value, seen):
+    """Return the size of given value including the elements of containers.
+    """
+
+    size = 0
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+
+        size += _object_size(current, seen)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+
+    return size
@@ -0,0 +1,245 @@
+"""This module contains in-memory stores backing CompactNotation views.
+
+Stores provide read access to flattened config data via find(), value(),
+is_node() and children(), see confipy.binary.BinaryIndex for the binary
+counterpart.
+
+"""
+
+import array
+import collections
+
+# nodes with more children get a lookup table instead of a linear scan
+WIDE_NODE = 16
+
+
+class FlatStore(object):
+    """Immutable store of flattened config data. Values are found with a
+    single dictionary lookup and children of nodes are indexed up front.
+
+    Parameters
+    ----------
+    flat_dict: dict
+        Flattened dictionary containing config data. It is copied, hence
+        later changes to it do not affect the store.
+
+    """
+
+    __slots__ = ("_flat", "_children")
+
+    def __init__(self, flat_dict):
+        self._flat = dict(flat_dict)
+        self._children = {(): collections.OrderedDict()}
+
+        for key_chain in self._flat:
+            last = len(key_chain) - 1
+            for depth, key in enumerate(key_chain):
+                children = self._children.get(key_chain[:depth])
+                if children is None:
+                    children = collections.OrderedDict()
+                    self._children[key_chain[:depth]] = children
+                children[key] = children.get(key, False) or depth < last
+
+    def __len__(self):
+        return len(self._flat)
+
+    def find(self, key_chain):
+        """Return the position of given key chain or None if it does not
+        refer to a value. Positions of this store are key chains."""
+
+        if key_chain in self._flat:
+            return key_chain
+        return None
+
+    def is_node(self, key_chain):
+        """Check whether values exist below given key chain."""
+
+        return key_chain in self._children
+
+    def value(self, position):
+        """Return the value at given position."""
+
+        return self._flat[position]
+
+    def children(self, key_chain=()):
+        """Return child keys of given key chain mapped to a boolean which is
+        True for nodes and False for values."""
+
+        return self._children.get(key_chain, {})
+
+    def items(self, key_chain=()):
+        """Iterate over key chains and values of given subtree."""
+
+        length = len(key_chain)
+        for chain, value in self._flat.items():
+            if chain[:length] == key_chain:
+                yield chain, value
+
+
+class ArrayStore(object):
+    """Immutable store of flattened config data in flat arrays. Every key of
+    the config is an entry of a key table together with the index of its
+    parent entry. Children of a node are stored contiguously, hence a node is
+    described by the index of its first child and the number of its
+    children. Values are kept in a single list. Apart from lookup tables for
+    nodes with many children, no object is created per node.
+
+    Entry 0 is the root node. Entries with children are nodes, all other
+    entries are values.
+
+    Parameters
+    ----------
+    flat_dict: dict
+        Flattened dictionary containing config data.
+
+    """
+
+    __slots__ = ("_keys", "_parents", "_first", "_count", "_values", "_wide",
+                 "_length")
+
+    def __init__(self, flat_dict):
+        self._keys = [None]
+        self._parents = array.array("l", [-1])
+        self._first = array.array("l", [0])
+        self._count = array.array("l", [0])
+        self._values = [None]
+        self._wide = {}
+        self._length = len(flat_dict)
+
+        # breadth first layout places siblings next to each other
+        queue = collections.deque([(_branches(flat_dict), 0)])
+        while queue:
+            branch, entry = queue.popleft()
+            first = len(self._keys)
+            self._first[entry] = first
+            self._count[entry] = len(branch)
+            if len(branch) > WIDE_NODE:
+                self._wide[entry] = {key: first + offset
+                                     for offset, key in enumerate(branch)}
+
+            for key, value in branch.items():
+                self._keys.append(key)
+                self._parents.append(entry)
+                self._first.append(0)
+                self._count.append(0)
+                if value.__class__ is _Branch:
+                    self._values.append(None)
+                    queue.append((value, len(self._keys) - 1))
+                else:
+                    self._values.append(value)
+
+    def __len__(self):
+        return self._length
+
+    def find(self, key_chain):
+        """Return the position of given key chain or None if it does not
+        refer to a value. Positions of this store are entry indices."""
+
+        entry = self.descend(0, key_chain)
+        if entry is None or not self.is_value(entry):
+            return None
+        return entry
+
+    def is_node(self, key_chain):
+        """Check whether values exist below given key chain."""
+
+        entry = self.descend(0, key_chain)
+        return entry is not None and not self.is_value(entry)
+
+    def is_value(self, entry):
+        """Check whether given entry refers to a value."""
+
+        return entry > 0 and not self._count[entry]
+
+    def value(self, position):
+        """Return the value at given position."""
+
+        return self._values[position]
+
+    def key_chain(self, position):
+        """Return the key chain at given position."""
+
+        keys = []
+        while position > 0:
+            keys.append(self._keys[position])
+            position = self._parents[position]
+        return tuple(reversed(keys))
+
+    def children(self, key_chain=()):
+        """Return child keys of given key chain mapped to a boolean which is
+        True for nodes and False for values."""
+
+        entry = self.descend(0, key_chain)
+        if entry is None:
+            return {}
+        return self.entry_children(entry)
+
+    def entry_children(self, entry):
+        """Return child keys of given node entry, see children()."""
+
+        first = self._first[entry]
+        return collections.OrderedDict(
+            (self._keys[child], self._count[child] > 0)
+            for child in range(first, first + self._count[entry]))
+
+    def items(self, key_chain=()):
+        """Iterate over key chains and values of given subtree."""
+
+        entry = self.descend(0, key_chain)
+        if entry is None:
+            return
+
+        stack = [(entry, tuple(key_chain))]
+        while stack:
+            entry, chain = stack.pop()
+            if self.is_value(entry):
+                yield chain, self._values[entry]
+                continue
+
+            first = self._first[entry]
+            for child in reversed(range(first, first + self._count[entry])):
+                stack.append((child, chain + (self._keys[child],)))
+
+    def descend(self, entry, key_chain):
+        """Return the entry of given key chain relative to given node entry or
+        None if it does not exist."""
+
+        for key in key_chain:
+            wide = self._wide.get(entry)
+            if wide is not None:
+                entry = wide.get(key)
+                if entry is None:
+                    return None
+                continue
+
+            first = self._first[entry]
+            try:
+                entry = self._keys.index(key, first,
+                                         first + self._count[entry])
+            except ValueError:
+                return None
+
+        return entry
+
+
+class _Branch(collections.OrderedDict):
+    """Temporary node of the nested layout used to build an ArrayStore."""
+
+    __slots__ = ()
+
+
+def _branches(flat_dict):
+    """Return the nested layout of a flattened dictionary built from _Branch
+    nodes."""
+
+    root = _Branch()
+    for key_chain, value in flat_dict.items():
+        node = root
+        for key in key_chain[:-1]:
+            child = node.get(key)
+            if child.__class__ is not _Branch:
+                child = node[key] = _Branch()
+            node = child
+        node[key_chain[-1]] = value
+
+    return root
@@ -0,0 +1,459 @@
+"""This module contains streaming readers which emit flattened key chains.
+
+Streaming readers do not build the nested dictionary of a config file.
+Mappings are walked event by event and their values are written directly
+into the flattened dictionary which is used by the parsers. Only lists are
+constructed as a whole because they are values of the flattened dictionary
+themselves.
+
+Yaml files are streamed via the event API of the configured yaml loader.
+Json files are streamed via an incremental tokenizer whose values are
+decoded by the scanner of the json module. Yaml features which require the
+nested dictionary, namely anchors of mappings, merge keys, tagged mappings
+and multiple documents, fall back to the regular reader.
+
+"""
+
+import re
+import six
+import yaml
+import json.decoder
+import json.scanner
+import confipy.reader
+import confipy.converter
+
+CHUNK_SIZE = 65536
+
+MAP_TAG = u"tag:yaml.org,2002:map"
+MERGE_TAG = u"tag:yaml.org,2002:merge"
+STR_TAG = u"tag:yaml.org,2002:str"
+
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+JSON_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*\Z")
+JSON_BLANK = frozenset(" \t\n\r")
+JSON_STRUCTURE = frozenset("{}[]:,")
+JSON_SCANNER = json.scanner.make_scanner(json.decoder.JSONDecoder())
+
+ATTRIBUTE_NOTATIONS = confipy.converter.ATTRIBUTE_NOTATIONS
+
+_NO_KEY = object()
+
+
+class _Fallback(Exception):
+    """Raised if a config file cannot be streamed and requires the regular
+    reader."""
+
+
+def read_flat(path_or_fp, read_engine="auto", notation="dict", **kwargs):
+    """Read config file and return its flattened dictionary. Yaml and json
+    files are streamed. Compiled configs are flat already. Other formats are
+    read regularly and flattened afterwards.
+
+    Parameters
+    ----------
+    path_or_fp: str, file-like
+        Path to config file to be read.
+    read_engine: {"auto", "yaml", "json", "configparser", "compiled"}
+        Define the read engine to open the config file, see read_config().
+    notation: {"dict", "dot", "compact"}, optional
+        Mappings with non-string keys are kept as values for the dot and
+        compact notations, see confipy.converter._flat_dict().
+    kwargs: dict, optional
+        Keyword arguments passed to the read engine, e.g. `yaml_engine`.
+
+    Return
+    ------
+    flattened: dict
+
+    """
+
+    if confipy.reader._is_compiled(path_or_fp, read_engine):
+        return confipy.reader.read_config(path_or_fp, read_engine, flat=True,
+                                          **kwargs)
+
+    label = read_engine
+    if read_engine == "auto" and not hasattr(path_or_fp, "read"):
+        label = path_or_fp.split(".")[-1].lower()
+
+    stream_function = STREAM_READER.get(label)
+    if stream_function is None:
+        cfg_dict = confipy.reader.read_config(path_or_fp, read_engine,
+                                              **kwargs)
+        return confipy.converter._flat_dict(cfg_dict, notation=notation)
+
+    if hasattr(path_or_fp, "read"):
+        return _stream(stream_function, path_or_fp, label, notation, kwargs)
+
+    with open(path_or_fp, "r") as fp:
+        return _stream(stream_function, fp, label, notation, kwargs)
+
+
+def _stream(stream_function, fp, label, notation, kwargs):
+    """Stream file like object and fall back to the regular reader if
+    required."""
+
+    try:
+        return stream_function(fp, notation=notation, **kwargs)
+    except _Fallback:
+        fp.seek(0)
+        cfg_dict = confipy.reader._get_reader(label)(fp, **kwargs)
+        return confipy.converter._flat_dict(cfg_dict, notation=notation)
+
+
+def _stream_yaml(fp, notation="dict", yaml_engine="auto", **kwargs):
+    """Stream yaml file via parser events into a flattened dictionary.
+
+    Parameters
+    ----------
+    fp: file-like object
+        Any object having a read() method.
+    notation: {"dict", "dot"}, optional
+        See read_flat().
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation.
+
+    Return
+    ------
+    flattened: dict
+
+    """
+
+    loader = confipy.reader._yaml_loader(yaml_engine)(fp)
+    try:
+        return _flatten_events(loader, notation)
+    finally:
+        loader.dispose()
+
+
+def _flatten_events(loader, notation):
+    """Consume the events of a single yaml document whose root is a mapping.
+    See _stream_yaml() for more information."""
+
+    get_event = loader.get_event
+
+    get_event()
+    if not loader.check_event(yaml.DocumentStartEvent):
+        raise _Fallback()
+    get_event()
+
+    if not _is_plain_mapping(get_event()):
+        raise _Fallback()
+
+    flattened = {}
+    anchors = {}
+
+    # prefix, pending key and whether a non-string key occurred
+    frames = [[(), _NO_KEY, False]]
+
+    while frames:
+        frame = frames[-1]
+        event = get_event()
+        event_type = type(event)
+
+        if event_type is yaml.MappingEndEvent:
+            frames.pop()
+            if frame[2] and notation in ATTRIBUTE_NOTATIONS:
+                _collapse(flattened, frame[0])
+            continue
+
+        if frame[1] is _NO_KEY:
+            if event_type is not yaml.ScalarEvent:
+                raise _Fallback()
+
+            key = _compose(loader, event, anchors)
+            if key.__class__ is six.text_type:
+                key = confipy.converter._intern_key(key)
+            else:
+                if key.tag == MERGE_TAG:
+                    raise _Fallback()
+                key = loader.construct_document(key)
+                frame[2] = frame[2] or not isinstance(key,
+                                                      six.string_types)
+
+            frame[1] = key
+            continue
+
+        key_chain = frame[0] + (frame[1],)
+        frame[1] = _NO_KEY
+
+        if event_type is yaml.MappingStartEvent:
+            if not _is_plain_mapping(event):
+                raise _Fallback()
+            frames.append([key_chain, _NO_KEY, False])
+            continue
+
+        flattened[key_chain] = _construct(loader,
+                                          _compose(loader, event, anchors))
+
+    get_event()
+    if not loader.check_event(yaml.StreamEndEvent):
+        raise _Fallback()
+
+    return flattened
+
+
+def _is_plain_mapping(event):
+    """Check whether event starts an untagged mapping without anchor."""
+
+    return (isinstance(event, yaml.MappingStartEvent) and
+            event.anchor is None and
+            event.tag in (None, u"!", MAP_TAG))
+
+
+def _resolve(loader, event):
+    """Return the tag of a scalar event."""
+
+    if event.tag is None or event.tag == u"!":
+        return loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+    return event.tag
+
+
+def _construct(loader, node):
+    """Construct the python object of a composed node. Plain strings are
+    returned as they are."""
+
+    if node.__class__ is six.text_type:
+        return node
+    return loader.construct_document(node)
+
+
+def _compose(loader, event, anchors):
+    """Compose the node of a value starting with given event from parser
+    events. Anchors of composed nodes are registered for subsequent aliases.
+    Scalars which resolve to strings are returned as strings instead of nodes
+    unless they carry an anchor.
+
+    Parameters
+    ----------
+    loader: yaml.Loader
+        Loader providing the events following the given event.
+    event: yaml.Event
+        Event starting the value.
+    anchors: dict
+        Anchor names mapped to nodes. Updated in place.
+
+    Return
+    ------
+    node: yaml.Node, str
+
+    """
+
+    event_type = type(event)
+
+    if event_type is yaml.ScalarEvent:
+        tag = _resolve(loader, event)
+        if tag == STR_TAG and event.anchor is None:
+            return event.value
+
+        node = yaml.ScalarNode(tag, event.value, event.start_mark,
+                               event.end_mark, style=event.style)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        return node
+
+    if event_type is yaml.AliasEvent:
+        if event.anchor not in anchors:
+            raise _Fallback()
+        return anchors[event.anchor]
+
+    if event_type is yaml.SequenceStartEvent:
+        node_type, end_event = yaml.SequenceNode, yaml.SequenceEndEvent
+    else:
+        node_type, end_event = yaml.MappingNode, yaml.MappingEndEvent
+
+    tag = event.tag
+    if tag is None or tag == u"!":
+        tag = loader.resolve(node_type, None, event.implicit)
+
+    node = node_type(tag, [], event.start_mark, None,
+                     flow_style=event.flow_style)
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+
+    children = []
+    while not loader.check_event(end_event):
+        child = _compose(loader, loader.get_event(), anchors)
+        if child.__class__ is six.text_type:
+            child = yaml.ScalarNode(STR_TAG, child)
+        children.append(child)
+
+    node.end_mark = loader.get_event().end_mark
+
+    if node_type is yaml.SequenceNode:
+        node.value = children
+    else:
+        node.value = list(zip(children[::2], children[1::2]))
+    return node
+
+
+def _collapse(flattened, prefix):
+    """Replace all key chains below prefix with a single nested dictionary
+    value. Required for mappings with non-string keys in dot notation."""
+
+    length = len(prefix)
+    nested = {key_chain[length:]: value
+              for key_chain, value in flattened.items()
+              if key_chain[:length] == prefix}
+
+    for key_chain in nested:
+        del flattened[prefix + key_chain]
+
+    flattened[prefix] = confipy.converter._unflat_dict(nested)
+
+
+def _stream_json(fp, notation="dict", **kwargs):
+    """Stream json file via an incremental tokenizer into a flattened
+    dictionary. Json keys are always strings, hence the notation does not
+    matter.
+
+    Parameters
+    ----------
+    fp: file-like object
+        Any object having a read() method.
+
+    Return
+    ------
+    flattened: dict
+
+    """
+
+    tokens = _JsonTokens(fp)
+    if tokens.peek() != "{":
+        raise _Fallback()
+    tokens.next()
+
+    flattened = {}
+    prefixes = [()]
+    kind, key = tokens.next()
+
+    while prefixes:
+        if kind == "}":
+            prefixes.pop()
+        else:
+            if kind != "key":
+                tokens.error("Expecting property name")
+            if tokens.next()[0] != ":":
+                tokens.error("Expecting ':' delimiter")
+
+            key_chain = prefixes[-1] + (key,)
+            if tokens.peek() == "{":
+                tokens.next()
+                prefixes.append(key_chain)
+                kind, key = tokens.next()
+                continue
+
+            flattened[key_chain] = tokens.value()
+
+        # find the next key while closing finished objects
+        while prefixes:
+            kind, key = tokens.next()
+            if kind == ",":
+                kind, key = tokens.next()
+                if kind != "key":
+                    tokens.error("Expecting property name")
+                break
+            if kind != "}":
+                tokens.error("Expecting ',' delimiter")
+            prefixes.pop()
+
+    if tokens.peek() is not None:
+        tokens.error("Extra data")
+
+    return flattened
+
+
+class _JsonTokens(object):
+    """Incremental json tokenizer reading chunks from a file like object.
+    Tokens are tuples of kind and value. Kinds are structural characters or
+    'key' for strings. Values of the flattened dictionary are decoded as a
+    whole by the scanner of the json module."""
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.offset = 0
+        self.eof = False
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it or
+        None at the end of the file."""
+
+        if self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if char not in JSON_BLANK:
+                return char
+
+        while True:
+            self.pos = JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def next(self):
+        """Consume and return the next token. Other characters are returned
+        as kind without being consumed."""
+
+        char = self.peek()
+        if char != '"':
+            if char in JSON_STRUCTURE:
+                self.pos += 1
+            return char, None
+
+        while True:
+            try:
+                key, self.pos = json.decoder.scanstring(self.buffer,
+                                                        self.pos + 1)
+                return "key", confipy.converter._intern_key(key)
+            except ValueError:
+                if not self._fill():
+                    raise
+
+    def value(self):
+        """Consume and return the next json value. Values followed only by
+        characters which might continue a number until the end of the buffer
+        are decoded again with more data since numbers might be incomplete,
+        e.g. '1.' of '1.5'."""
+
+        self.peek()
+        while True:
+            try:
+                value, end = JSON_SCANNER(self.buffer, self.pos)
+            except (ValueError, StopIteration) as error:
+                if self._fill(len(self.buffer)):
+                    continue
+                if isinstance(error, StopIteration):
+                    self.error("Expecting value")
+                raise
+
+            if (not JSON_NUMBER_TAIL.match(self.buffer, end) or
+                    not self._fill(len(self.buffer))):
+                self.pos = end
+                return value
+
+    def error(self, message):
+        """Raise a ValueError at the current position."""
+
+        raise ValueError("{}: char {}".format(message,
+                                             self.offset + self.pos))
+
+    def _fill(self, size=0):
+        """Append the next chunk of at least given size and drop consumed
+        content. Returns False at the end of the file."""
+
+        chunk = self.fp.read(max(size, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+
+STREAM_READER = {"yaml": _stream_yaml,
+                 "yml": _stream_yaml,
+                 "json": _stream_json}
@@ -0,0 +1,283 @@
+"""This module contains configs which track substitution dependencies."""
+
+import six
+import threading
+import confipy.stats
+import confipy.parser
+import confipy.converter
+
+_MISSING = object()
+
+
+class DependencyIndex(object):
+    """Flattened config data before and after substitution together with a
+    reverse dependency index which maps key chains to the key chains of
+    substitutions referencing them. Changes only resolve the transitive
+    dependents of the changed key chains again.
+
+    Parameters
+    ----------
+    raw: dict
+        Flattened config data before substitution.
+    splitter: str, optional
+        The splitter to identify possible keys.
+    marker: str, optional
+        The marker to identify correct keys.
+    substitute: bool, optional
+        If False, values are not substituted.
+
+    Attributes
+    ----------
+    raw: dict
+        Flattened config data before substitution.
+    resolved: dict
+        Flattened config data after substitution.
+    dependents: dict
+        Key chains mapped to the set of key chains directly referencing them.
+
+    """
+
+    def __init__(self, raw, splitter=" + ", marker="$", substitute=True):
+        self.splitter = splitter
+        self.marker = marker
+        self.substitute = substitute
+
+        self.raw = {}
+        self.resolved = {}
+        self.dependents = {}
+        self._templates = {}
+
+        self.apply(raw)
+
+    def transitive_dependents(self, key_chains):
+        """Return all key chains which directly or indirectly reference any
+        of the given key chains."""
+
+        found = set()
+        queue = list(key_chains)
+        while queue:
+            for dependent in self.dependents.get(queue.pop(), ()):
+                if dependent not in found:
+                    found.add(dependent)
+                    queue.append(dependent)
+
+        return found
+
+    def apply(self, raw_updates, removed=()):
+        """Apply new or changed raw values and remove key chains. Only the
+        affected substitutions are resolved again. All changes are computed
+        before being applied, hence the index is unchanged if resolution
+        fails.
+
+        Parameters
+        ----------
+        raw_updates: dict
+            Flattened dictionary of new or changed raw values. Values which
+            are replaced by new nodes and nodes which are replaced by values
+            are removed.
+        removed: iterable, optional
+            Key chains to be removed.
+
+        Returns
+        -------
+        updates: dict
+            Key chains mapped to resolved values which changed.
+        removed: set
+            Key chains which were removed.
+
+        Raises
+        ------
+        SubstitutionError if references are missing or cyclic.
+
+        """
+
+        removed = set(removed) | self._replaced(raw_updates)
+        templates = {}
+        if self.substitute:
+            for key_chain, value in raw_updates.items():
+                template = confipy.parser._tokenize(value, self.splitter,
+                                                    self.marker)
+                if template is not None:
+                    templates[key_chain] = template
+
+        for dependent in self.transitive_dependents(set(raw_updates) |
+                                                    removed):
+            if dependent not in raw_updates and dependent not in removed:
+                templates[dependent] = self._templates[dependent]
+
+        # resolve on top of current values without modifying them yet
+        updates = {key_chain: value
+                   for key_chain, value in raw_updates.items()
+                   if key_chain not in templates}
+        lookup = _Overlay(updates, self.resolved, removed | set(templates))
+        for key_chain in confipy.parser._resolve_order(templates, lookup):
+            updates[key_chain] = confipy.parser._render(templates[key_chain],
+                                                        lookup)
+
+        for key_chain in removed | set(raw_updates):
+            self._set_template(key_chain, templates.get(key_chain))
+
+        for key_chain in removed:
+            self.raw.pop(key_chain, None)
+            self.resolved.pop(key_chain, None)
+
+        self.raw.update(raw_updates)
+
+        updates = {key_chain: value for key_chain, value in updates.items()
+                   if self.resolved.get(key_chain, _MISSING) != value}
+        self.resolved.update(updates)
+
+        return updates, removed
+
+    def _replaced(self, key_chains):
+        """Return key chains which are replaced by setting given key chains,
+        namely values below a key chain which replaces a node and values at
+        ancestors of a key chain which replaces a value by a node."""
+
+        replaced = set()
+        for key_chain in key_chains:
+            if key_chain in self.raw:
+                continue
+
+            replaced.update(key_chain[:depth]
+                            for depth in range(1, len(key_chain))
+                            if key_chain[:depth] in self.raw)
+
+            length = len(key_chain)
+            replaced.update(existing for existing in self.raw
+                            if len(existing) > length and
+                            existing[:length] == key_chain)
+
+        return replaced - set(key_chains)
+
+    def _set_template(self, key_chain, template):
+        """Replace the template of given key chain and maintain the reverse
+        dependency index."""
+
+        previous = self._templates.pop(key_chain, None)
+        if previous is not None:
+            for reference in confipy.parser._references(previous):
+                dependents = self.dependents[reference]
+                dependents.discard(key_chain)
+                if not dependents:
+                    del self.dependents[reference]
+
+        if template is not None:
+            self._templates[key_chain] = template
+            for reference in confipy.parser._references(template):
+                self.dependents.setdefault(reference, set()).add(key_chain)
+
+
+class TrackedConfig(object):
+    """Config which keeps a DependencyIndex to apply changes of single values
+    in time proportional to the number of affected key chains.
+
+    Parameters
+    ----------
+    raw: dict
+        Flattened config data before substitution.
+    notation: {"dot", "dict"}, optional
+        Define output type of config data.
+    substitute: bool, optional
+        If False, values are not substituted.
+    stats: LoadStats, optional
+        Records the substitution and unflatten stages.
+    kwargs: dict, optional
+        Keyword arguments of the substitute parser, namely `splitter` and
+        `marker`.
+
+    Attributes
+    ----------
+    config: {DotNotation, dict}
+        The resolved config. The same instance is patched on every update.
+    index: DependencyIndex
+
+    """
+
+    def __init__(self, raw, notation="dot", substitute=True, stats=None,
+                 **kwargs):
+        if notation == "compact":
+            raise ValueError("Compact notation is read-only and cannot be "
+                             "updated.")
+
+        self.notation = notation
+        self._lock = threading.RLock()
+
+        stage = "parse.substitute" if substitute else "track"
+        with confipy.stats.timed(stats, stage):
+            self.index = DependencyIndex(raw,
+                                         splitter=kwargs.get("splitter",
+                                                             " + "),
+                                         marker=kwargs.get("marker", "$"),
+                                         substitute=substitute)
+
+        with confipy.stats.timed(stats, "unflatten"):
+            self.config = confipy.converter._unflat_dict(self.index.resolved,
+                                                         notation=notation)
+
+    def update(self, key_chain, value):
+        """Set the raw value of given key chain. Substitutions depending on
+        it are resolved again and the config is patched in place.
+
+        Parameters
+        ----------
+        key_chain: tuple, str
+            Key chain as tuple or in dot notation, e.g. "paths.images".
+        value: object
+            New raw value which may contain substitutions.
+
+        Returns
+        -------
+        changed: list
+            Key chains whose resolved values changed.
+
+        """
+
+        if isinstance(key_chain, six.string_types):
+            key_chain = confipy.parser._convert_key_chain(key_chain)
+
+        return self._apply({key_chain: value})
+
+    def dependents(self, key_chain):
+        """Return all key chains which directly or indirectly reference given
+        key chain."""
+
+        if isinstance(key_chain, six.string_types):
+            key_chain = confipy.parser._convert_key_chain(key_chain)
+
+        with self._lock:
+            return self.index.transitive_dependents([key_chain])
+
+    def _apply(self, raw_updates, removed=()):
+        """Apply changes to the index and patch the config accordingly."""
+
+        with self._lock:
+            updates, removed = self.index.apply(raw_updates, removed)
+            confipy.converter._patch_dict(self.config, updates, removed,
+                                          notation=self.notation)
+
+        return sorted(list(updates) + list(removed), key=repr)
+
+
+class _Overlay(object):
+    """Read-write view of updates on top of a base dictionary. Key chains of
+    removed are hidden unless present in updates."""
+
+    def __init__(self, updates, base, removed):
+        self.updates = updates
+        self.base = base
+        self.removed = removed
+
+    def __contains__(self, key):
+        return key in self.updates or (key not in self.removed and
+                                       key in self.base)
+
+    def __getitem__(self, key):
+        if key in self.updates:
+            return self.updates[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __setitem__(self, key, value):
+        self.updates[key] = value
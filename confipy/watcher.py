@@ -0,0 +1,223 @@
+"""This module contains the reloadable config which watches config files."""
+
+import os
+import logging
+import threading
+import confipy.cache
+import confipy.reader
+import confipy.parser
+import confipy.converter
+import confipy.tracking
+
+ERR_WATCH_PARSER = "Parser '{}' is not supported for reloadable configs."
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ReloadableConfig(confipy.tracking.TrackedConfig):
+    """Config which watches the root config file and all transitive includes
+    by polling their signatures. Once a file changes, only the subtree of
+    this file is read again and only substitutions depending on it are
+    resolved again. The config instance is patched in place.
+
+    Parameters
+    ----------
+    path: str
+        Path to config file to be read.
+    read_engine: {"auto", "yaml", "json", "configparser"}, optional
+        Define the read engine to open the root config file.
+    parsers: iterable, optional
+        Parsers to be run on raw config data. Supports "include" and
+        "substitute".
+    notation: {"dot", "dict"}, optional
+        Define output type of config data.
+    yaml_engine: {"auto", "c", "python"}, optional
+        Define the yaml loader implementation.
+    key_by: {"stat", "hash"}, optional
+        Define how file changes are detected, see file_signature().
+    kwargs: dict, optional
+        Keyword arguments passed to the parsers.
+
+    Attributes
+    ----------
+    config: {DotNotation, dict}
+        The current config. The same instance is patched on every reload or
+        update().
+    callbacks: list
+        Callables which are invoked with a list of changed key chains after
+        each reload.
+
+    """
+
+    def __init__(self, path, read_engine="auto",
+                 parsers=("include", "substitute"), notation="dot",
+                 yaml_engine="auto", key_by="stat", **kwargs):
+        for parser in parsers:
+            if parser not in ("include", "substitute"):
+                raise ValueError(ERR_WATCH_PARSER.format(parser))
+
+        self.path = path
+        self.read_engine = read_engine
+        self.parsers = tuple(parsers)
+        self.yaml_engine = yaml_engine
+        self.key_by = key_by
+        self.kwargs = kwargs
+        self.callbacks = []
+
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.notation = notation
+        raw, self._manifest = self._read_tree(path, ())
+        self._signatures = self._sign(self._manifest)
+
+        super(ReloadableConfig, self).__init__(
+            raw, notation=notation, substitute="substitute" in parsers,
+            **kwargs)
+
+    def poll(self):
+        """Check all watched files for changes and reload changed subtrees.
+
+        Returns
+        -------
+        changed: list
+            Key chains whose resolved values changed or were removed.
+
+        """
+
+        with self._lock:
+            changed_files = [path for path, signature
+                             in self._signatures.items()
+                             if self._signature(path) != signature]
+            if not changed_files:
+                return []
+
+            entries = sorted([(key_chain, path)
+                              for key_chain, path in self._manifest
+                              if os.path.abspath(path) in changed_files],
+                             key=lambda entry: len(entry[0]))
+
+            raw_updates = {}
+            removed = set()
+            manifest = self._manifest
+            reloaded = []
+
+            for key_chain, path in entries:
+                if any(_startswith(key_chain, prefix) for prefix in reloaded):
+                    continue
+
+                sub_raw, sub_manifest = self._read_tree(path, key_chain)
+                removed.update(chain for chain in self.index.raw
+                               if _startswith(chain, key_chain) and
+                               chain not in sub_raw)
+                raw_updates.update(sub_raw)
+
+                manifest = [entry for entry in manifest
+                            if not _startswith(entry[0], key_chain)]
+                manifest.extend(sub_manifest)
+                reloaded.append(key_chain)
+
+            raw = self.index.raw
+            raw_updates = {key_chain: value
+                           for key_chain, value in raw_updates.items()
+                           if raw.get(key_chain, _MISSING) != value}
+
+            changed = self._apply(raw_updates, removed)
+            self._manifest = manifest
+            self._signatures = self._sign(manifest)
+
+        for callback in self.callbacks:
+            callback(changed)
+
+        return changed
+
+    def start(self, interval=1.0):
+        """Start polling in a background daemon thread.
+
+        Parameters
+        ----------
+        interval: float, optional
+            Seconds between two polls.
+
+        """
+
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background polling thread."""
+
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, interval):
+        """Poll until stopped. Failing reloads keep the current config."""
+
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Reloading config '%s' fails.", self.path)
+
+    def _read_tree(self, path, key_chain):
+        """Read config file under given key chain and resolve its includes.
+
+        Returns
+        -------
+        raw: dict
+            Flattened config data before substitution.
+        manifest: list
+            Key chains and paths of the config file and all its includes.
+
+        """
+
+        if key_chain:
+            raw = confipy.parser._read_include(path,
+                                               yaml_engine=self.yaml_engine)
+            raw = {key_chain + inc_key_chain: value
+                   for inc_key_chain, value in raw.items()}
+        else:
+            read_cfg = confipy.reader.read_config(path, self.read_engine,
+                                                  yaml_engine=self.yaml_engine)
+            raw = confipy.converter._flat_dict(read_cfg,
+                                               notation=self.notation)
+
+        manifest = [(key_chain, path)]
+        if "include" in self.parsers:
+            raw = confipy.parser.include(raw, path,
+                                         yaml_engine=self.yaml_engine,
+                                         include_manifest=manifest,
+                                         **self.kwargs)
+
+        return raw, manifest
+
+    def _sign(self, manifest):
+        """Return signatures of all files of given manifest."""
+
+        return {os.path.abspath(path): self._signature(path)
+                for _, path in manifest}
+
+    def _signature(self, path):
+        """Return file signature or None if the file is not accessible."""
+
+        try:
+            return confipy.cache.file_signature(path, self.key_by)
+        except (IOError, OSError):
+            return None
+
+
+def _startswith(key_chain, prefix):
+    """Check whether key chain is located under given prefix."""
+
+    return key_chain[:len(prefix)] == prefix
@@ -28,5 +28,6 @@ setup(
     download_url = 'https://github.com/mansenfranzen/confipy/archive/0.0.3.tar.gz',
     keywords = ['config', 'yaml'],
     tests_require=['pytest'],
+    entry_points={'console_scripts': ['confipy = confipy.cli:main']},
     cmdclass={'test': PyTest}
 )
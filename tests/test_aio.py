@@ -0,0 +1,84 @@
+"""This module tests the asynchronous confipy index function."""
+
+import sys
+import shutil
+import pytest
+
+# asyncio support requires python 3.5+
+if sys.version_info < (3, 5):
+    pytest.skip("aload requires python 3.5+", allow_module_level=True)
+
+import asyncio
+import confipy
+import confipy.cache
+import confipy.stats
+import confipy.compiler
+import confipy.notation
+import os
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_aload():
+    test_file = get_file("material/parser_include_recursive.yaml")
+    cfg = run(confipy.aload(test_file, max_concurrency=2))
+
+    assert isinstance(cfg, confipy.notation.DotNotation)
+    assert cfg("dict") == confipy.load(test_file)("dict")
+
+
+def test_aload_dict():
+    test_file = get_file("material/parser_substitute.yaml")
+    cfg = run(confipy.aload(test_file, notation="dict"))
+
+    assert cfg == confipy.load(test_file, notation="dict")
+
+
+def test_aload_cache():
+    test_file = get_file("material/parser_include_recursive.yaml")
+    cache = confipy.cache.IncludeCache()
+    run(confipy.aload(test_file, include_cache=cache))
+    run(confipy.aload(test_file, include_cache=cache))
+
+    assert cache.info().hits == 2
+
+
+def test_aload_options(tmpdir):
+    test_file = get_file("material/lazy_index.yaml")
+    for option in ("lazy", "track", "stream", "schema", "config_cache"):
+        with pytest.raises(TypeError):
+            run(confipy.aload(test_file, **{option: True}))
+    with pytest.raises(TypeError):
+        run(confipy.aload(test_file, select=["base"]))
+
+    stats = confipy.stats.LoadStats()
+    cfg = run(confipy.aload(test_file, stats=stats))
+    assert cfg("dict") == confipy.load(test_file)("dict")
+    assert list(stats.stages)[:3] == ["read", "flatten", "parse.include"]
+    assert os.path.basename(stats.files[0].path) == "lazy_index.yaml"
+
+    # compiled configs are not parsed again
+    for name in ("lazy_index.yaml", "lazy_paths.yaml", "parser_include.yaml",
+                 "parser_flatten_dict.yaml"):
+        shutil.copy(get_file(os.path.join("material", name)), str(tmpdir))
+    output = confipy.compiler.compile_config(
+        str(tmpdir.join("lazy_index.yaml")), parsers=["include"])
+    cfg = run(confipy.aload(output, read_options={"verify": True}))
+    assert cfg.thumbs == "$paths.images + thumbs/"
+
+
+if __name__ == "__main__":
+    test_aload()
+    test_aload_dict()
+    test_aload_cache()
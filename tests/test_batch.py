@@ -0,0 +1,66 @@
+"""This module tests the batch index function."""
+
+import os
+import confipy
+import confipy.cache
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+paths = [get_file("material/parser_include_recursive.yaml"),
+         get_file("material/parser_include_raiseError.yaml"),
+         get_file("material/lazy_index.yaml")]
+
+
+def test_load_many():
+    cache = confipy.cache.IncludeCache()
+    results = confipy.load_many(paths, workers=1, include_cache=cache,
+                                notation="dict")
+
+    assert [result.path for result in results] == paths
+    assert results[0].config == confipy.load(paths[0], notation="dict")
+    assert results[0].error is None
+    assert isinstance(results[1].error, AssertionError)
+    assert results[1].config is None
+    assert results[2].config["thumbs"] == "/home/user/images/thumbs/"
+
+    # parser_include.yaml and parser_flatten_dict.yaml are shared
+    assert cache.info().hits == 2
+
+
+def test_load_many_process():
+    results = confipy.load_many(paths, workers=2, executor="process")
+
+    assert results[0].config.Lvl1.Key1 == "Value1"
+    assert isinstance(results[1].error, AssertionError)
+    assert results[2].config("dict") == confipy.load(paths[2])("dict")
+
+
+def test_load_many_process_pickle_error():
+    schema = {"Key1": lambda value: value}
+    results = confipy.load_many(paths[:1] * 2, workers=1,
+                                executor="process", schema=schema)
+
+    assert [result.config for result in results] == [None, None]
+    assert all(result.error is not None for result in results)
+
+
+def test_load_many_isolated(tmpdir):
+    tmpdir.join("values.yaml").write("items: [1, 2]")
+    for name in ("a", "b"):
+        tmpdir.join(name + ".yaml").write("inc: $include values.yaml")
+    batch = [str(tmpdir.join("a.yaml")), str(tmpdir.join("b.yaml"))]
+
+    results = confipy.load_many(batch, workers=1, notation="dict")
+    results[0].config["inc"]["items"].append(3)
+
+    assert results[1].config["inc"]["items"] == [1, 2]
+
+
+if __name__ == "__main__":
+    test_load_many()
+    test_load_many_process()
+    test_load_many_process_pickle_error()
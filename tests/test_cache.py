@@ -0,0 +1,93 @@
+"""This module tests the confipy caches."""
+
+import os
+import shutil
+import confipy
+import confipy.cache
+import confipy.parser
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def copy_material(directory, *names):
+    for name in names:
+        shutil.copy(get_file(os.path.join("material", name)), str(directory))
+
+
+def test_config_cache(tmpdir):
+    copy_material(tmpdir, "parser_include_recursive.yaml",
+                  "parser_include.yaml", "parser_flatten_dict.yaml")
+    test_file = str(tmpdir.join("parser_include_recursive.yaml"))
+    cache = confipy.cache.ConfigCache(str(tmpdir.join("cache")))
+
+    expected = confipy.load(test_file, notation="dict")
+    assert confipy.load(test_file, notation="dict",
+                        config_cache=cache) == expected
+    assert confipy.load(test_file, notation="dict",
+                        config_cache=cache) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # different load options do not share entries
+    cfg = confipy.load(test_file, config_cache=cache)
+    assert cfg.Lvl1.Key1 == "Value1"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_config_cache_invalidation(tmpdir):
+    copy_material(tmpdir, "parser_include.yaml", "parser_flatten_dict.yaml")
+    test_file = str(tmpdir.join("parser_include.yaml"))
+    cache = confipy.cache.ConfigCache(str(tmpdir.join("cache")),
+                                      key_by="hash")
+    confipy.load(test_file, config_cache=cache)
+
+    tmpdir.join("parser_flatten_dict.yaml").write("level1: changed")
+    cfg = confipy.load(test_file, config_cache=cache)
+
+    assert cfg.Key2.level1 == "changed"
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    cache.clear()
+    assert not tmpdir.join("cache").listdir()
+
+
+
+def test_config_cache_changed_during_load(tmpdir):
+    copy_material(tmpdir, "parser_include.yaml", "parser_flatten_dict.yaml")
+    test_file = str(tmpdir.join("parser_include.yaml"))
+    cache = confipy.cache.ConfigCache(str(tmpdir.join("cache")),
+                                      key_by="hash")
+
+    # edit the included file after it was read, but before the cache write
+    parsing_handler = confipy.parser.parsing_handler
+
+    def edit_include(*args, **kwargs):
+        parsed = parsing_handler(*args, **kwargs)
+        tmpdir.join("parser_flatten_dict.yaml").write("level1: changed")
+        return parsed
+
+    confipy.parser.parsing_handler = edit_include
+    try:
+        cfg = confipy.load(test_file, config_cache=cache)
+    finally:
+        confipy.parser.parsing_handler = parsing_handler
+
+    assert cfg.Key2.level1 != "changed"
+    cache_dir = tmpdir.join("cache")
+    assert not cache_dir.check() or not cache_dir.listdir()
+
+    cfg = confipy.load(test_file, config_cache=cache)
+    assert cfg.Key2.level1 == "changed"
+    assert (cache.hits, cache.misses) == (0, 2)
+
+def test_config_cache_nested(tmpdir):
+    cache = confipy.cache.ConfigCache(str(tmpdir))
+    test_file = get_file("material/reader_yaml.yaml")
+
+    for _ in range(2):
+        cfg = confipy.load(test_file, notation="dict", config_cache=cache)
+        assert cfg["DummySection2"] == {"key1": "value1", "key2": "value2"}
+
+    assert cache.hits == 1
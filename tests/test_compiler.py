@@ -0,0 +1,91 @@
+"""This module tests compiled configs."""
+
+import os
+import shutil
+import pytest
+import tempfile
+import confipy
+import confipy.cli
+import confipy.reader
+import confipy.stream
+import confipy.compiler
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def _copy_material(*names):
+    directory = tempfile.mkdtemp()
+    for name in names:
+        shutil.copy(get_file(os.path.join("material", name)), directory)
+    return directory
+
+
+def test_compile():
+    directory = _copy_material("lazy_index.yaml", "lazy_paths.yaml",
+                               "parser_include.yaml",
+                               "parser_flatten_dict.yaml")
+    source = os.path.join(directory, "lazy_index.yaml")
+
+    output = confipy.compiler.compile_config(source)
+
+    assert output == os.path.join(directory, "lazy_index.cfgc")
+    assert confipy.load(output)("dict") == confipy.load(source)("dict")
+    assert confipy.compiler.stale_sources(output) == []
+
+    with open(os.path.join(directory, "lazy_paths.yaml"), "a") as file:
+        file.write("music: $base + music/\n")
+
+    assert confipy.compiler.stale_sources(output) == [
+        os.path.abspath(os.path.join(directory, "lazy_paths.yaml"))]
+    with pytest.raises(IOError):
+        confipy.reader.read_config(output, verify=True)
+    with pytest.raises(IOError):
+        confipy.load(output, read_options={"verify": True})
+
+    shutil.rmtree(directory)
+
+
+def test_compile_unparsed():
+    directory = _copy_material("lazy_index.yaml", "lazy_paths.yaml",
+                               "parser_include.yaml",
+                               "parser_flatten_dict.yaml")
+    source = os.path.join(directory, "lazy_index.yaml")
+    output = confipy.compiler.compile_config(source, parsers=["include"])
+
+    # compiled configs are not parsed again
+    for options in ({}, {"lazy": True}, {"stream": True},
+                    {"select": ["thumbs"]}):
+        cfg = confipy.load(output, **options)
+        assert cfg.thumbs == "$paths.images + thumbs/"
+
+    tracked = confipy.load(output, track=True)
+    assert tracked.config.thumbs == "$paths.images + thumbs/"
+
+    flattened = confipy.stream.read_flat(output)
+    assert flattened[("paths", "images")] == "$base + images/"
+
+    shutil.rmtree(directory)
+
+
+def test_cli():
+    directory = _copy_material("parser_include.yaml",
+                               "parser_flatten_dict.yaml")
+    source = os.path.join(directory, "parser_include.yaml")
+    output = os.path.join(directory, "compiled.bin")
+
+    assert confipy.cli.main(["compile", source, "-o", output]) == 0
+    assert confipy.cli.main(["check", output]) == 0
+
+    cfg = confipy.load(output, read_engine="compiled", notation="dict")
+    assert cfg == confipy.load(source, notation="dict")
+
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_compile()
+    test_compile_unparsed()
+    test_cli()
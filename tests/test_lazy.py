@@ -0,0 +1,112 @@
+"""This module tests lazy loading."""
+
+import pytest
+import confipy
+import confipy.cache
+import confipy.notation
+import confipy.parser
+import confipy.lazy
+import confipy.stats
+import os
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def test_lazy_equals_eager():
+    test_file = get_file("material/lazy_index.yaml")
+    eager = confipy.load(test_file)
+    lazy = confipy.load(test_file, lazy=True)
+
+    assert isinstance(lazy, confipy.notation.LazyDotNotation)
+    assert lazy("dict") == eager("dict")
+
+
+def test_lazy_include_on_access():
+    test_file = get_file("material/lazy_index.yaml")
+    cache = confipy.cache.IncludeCache()
+    cfg = confipy.load(test_file, lazy=True, include_cache=cache)
+
+    assert cfg.base == "/home/user/"
+    assert cache.info().misses == 0
+
+    assert cfg.paths.downloads == "/home/user/downloads/"
+    assert cache.info().misses == 1
+
+    assert cfg["other"].Key1 == "Value1"
+    assert cache.info().misses == 2
+
+
+def test_lazy_substitute_into_include():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"), lazy=True)
+
+    assert cfg.thumbs == "/home/user/images/thumbs/"
+    assert cfg("get", "missing", "default") == "default"
+    assert vars(cfg) == {"thumbs": "/home/user/images/thumbs/"}
+
+
+def test_lazy_resolve():
+    test_file = get_file("material/parser_include_recursive.yaml")
+    cfg = confipy.load(test_file, lazy=True)
+
+    assert cfg("resolve") is cfg
+    assert "Key2" in vars(cfg.Lvl1)
+
+
+def test_lazy_missing():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"), lazy=True,
+                       parsers=("substitute",))
+
+    with pytest.raises(confipy.parser.SubstitutionError):
+        cfg.thumbs
+
+
+def test_lazy_cycle():
+    flattened = {("key1",): "$key2 + suf", ("key2",): "$key1 + suf"}
+    cfg = confipy.lazy.LazyResolver(flattened, "dummy.yaml").root()
+
+    with pytest.raises(confipy.parser.SubstitutionError) as error:
+        cfg.key1
+
+    assert set(error.value.cycle) == {("key1",), ("key2",)}
+
+
+def test_select():
+    test_file = get_file("material/lazy_index.yaml")
+    full = confipy.load(test_file)("dict")
+    stats = confipy.stats.LoadStats()
+
+    cfg = confipy.load(test_file, select=["thumbs", "base"], stats=stats)
+
+    assert cfg("dict") == {"thumbs": full["thumbs"], "base": full["base"]}
+    assert [os.path.basename(file.path) for file in stats.files] == [
+        "lazy_index.yaml", "lazy_paths.yaml"]
+
+
+def test_select_wildcard():
+    test_file = get_file("material/lazy_index.yaml")
+    full = confipy.load(test_file, notation="dict")
+
+    cfg = confipy.load(test_file, select=["paths.*", "other.Key2.*.level2"],
+                       notation="dict")
+
+    assert cfg == {"paths": full["paths"],
+                   "other": {"Key2": full["other"]["Key2"]}}
+    assert confipy.load(test_file, select=["missing.*"], notation="dict") == {}
+
+    for option in ("lazy", "track"):
+        with pytest.raises(ValueError):
+            confipy.load(test_file, select=["paths.*"], **{option: True})
+
+
+if __name__ == "__main__":
+    test_lazy_equals_eager()
+    test_lazy_include_on_access()
+    test_lazy_substitute_into_include()
+    test_lazy_resolve()
+    test_lazy_missing()
+    test_lazy_cycle()
+    test_select()
+    test_select_wildcard()
@@ -0,0 +1,190 @@
+"""This module tests the notation classes."""
+
+import os
+import copy
+import pickle
+import pytest
+import confipy
+import confipy.store
+import confipy.converter
+import confipy.notation
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def test_lookup():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"))
+    key = "other.Key2.level1.level2.level3.key1"
+
+    assert cfg("lookup", key="thumbs") == "/home/user/images/thumbs/"
+    assert cfg("lookup", key=key) == "value1"
+    assert cfg("lookup", key=tuple(key.split("."))) == "value1"
+    assert cfg("lookup", key="paths") is cfg.paths
+    assert cfg("lookup", key="paths.missing", default=0) == 0
+    assert cfg("lookup", key="base.missing") is None
+    assert cfg.other("lookup", key="Key1") == "Value1"
+    assert cfg("lookup_many", key=["base", "missing"], default="") == [
+        "/home/user/", ""]
+
+
+def test_lookup_lazy():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"), lazy=True)
+
+    assert cfg("lookup", key="paths.images") == "/home/user/images/"
+    assert cfg("lookup", key="paths.missing", default=0) == 0
+    assert "other" not in vars(cfg)
+
+
+def test_views_memoized():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"))
+    as_dict = cfg("dict")
+
+    assert cfg("dict") == as_dict and cfg("dict") is not as_dict
+    assert cfg("val") == cfg("val")
+
+    # returned views are copies of the memoized views
+    assert cfg._dot_view("dict") is cfg._dot_view("dict")
+    as_dict["paths"]["images"] = "modified"
+    cfg("val")["base"] = "modified"
+    assert cfg("dict")["paths"]["images"] == "/home/user/images/"
+    assert cfg("val")["base"] == "/home/user/"
+
+    cfg.paths.images = "changed"
+    assert cfg("dict") is not as_dict
+    assert cfg("dict")["paths"]["images"] == "changed"
+    assert cfg("lookup", key="paths.images") == "changed"
+
+    del cfg.paths.images
+    assert "images" not in cfg("dict")["paths"]
+    assert cfg("lookup", key="paths.images") is None
+
+    cfg.paths["nested"] = confipy.notation.DotNotation()
+    cfg.paths.nested.key = "value"
+    assert cfg("lookup", key="paths.nested.key") == "value"
+    assert cfg("dict")["paths"]["nested"] == {"key": "value"}
+
+
+def test_views_tracked_update():
+    tracked = confipy.load(get_file("material/lazy_index.yaml"), track=True)
+    cfg = tracked.config
+
+    assert cfg("lookup", key="thumbs") == "/home/user/images/thumbs/"
+    tracked.update("base", "/root/")
+
+    assert cfg("lookup", key="thumbs") == "/root/images/thumbs/"
+    assert cfg("dict")["paths"]["images"] == "/root/images/"
+
+
+def test_pickle():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"))
+    cfg("dict")
+    restored = pickle.loads(pickle.dumps(cfg))
+
+    assert restored("dict") == cfg("dict")
+    restored.base = "/root/"
+    assert restored("lookup", key="base") == "/root/"
+    assert cfg("lookup", key="base") == "/home/user/"
+
+
+def test_copy():
+    test_file = get_file("material/lazy_index.yaml")
+    cfg = confipy.load(test_file)
+    expected = cfg("dict")
+
+    shallow = copy.copy(cfg)
+    shallow.base = "/root/"
+    assert cfg.base == cfg("lookup", key="base") == "/home/user/"
+    assert shallow("lookup", key="base") == "/root/"
+
+    node = copy.copy(cfg.paths)
+    node.images = "changed"
+    assert cfg("lookup", key="paths.images") == "/home/user/images/"
+
+    deep = copy.deepcopy(cfg)
+    deep.paths.images = "changed"
+    assert deep("lookup", key="paths.images") == "changed"
+    assert cfg("dict") == expected
+
+    # the flattened dictionary of the pipeline is not used as index
+    flat_dict = confipy._load_flat(test_file)
+    cfg = confipy.converter._unflat_dict(flat_dict, notation="dot",
+                                         keep_index=True)
+    cfg.base = "/root/"
+    assert flat_dict[("base",)] == "/home/user/"
+
+    lazy = confipy.load(test_file, lazy=True)
+    for restored in (copy.copy(lazy), pickle.loads(pickle.dumps(lazy))):
+        assert type(restored) is confipy.notation.DotNotation
+        assert restored("dict") == expected
+
+
+def test_compact():
+    test_file = get_file("material/lazy_index.yaml")
+    cfg = confipy.load(test_file, notation="compact")
+    key = "other.Key2.level1.level2.level3.key1"
+
+    assert isinstance(cfg, confipy.notation.CompactNotation)
+    assert cfg("dict") == confipy.load(test_file)("dict")
+    assert cfg.other.Key2.level1["level2"].level3.key1 == "value1"
+    assert cfg("lookup", key=key) == "value1"
+    assert cfg.other("lookup", key="Key2.level1")("dict") == {
+        "level2": {"level3": {"key1": "value1", "key2": "value2"}}}
+    assert cfg("get", key="missing", default=0) == 0
+    assert cfg("lookup_many", key=["base", "base.missing"]) == [
+        "/home/user/", None]
+    assert "paths" in cfg("dot") and "base" in cfg("val")
+
+    with pytest.raises(TypeError):
+        cfg.base = "/root/"
+
+    with pytest.raises(ValueError):
+        confipy.load(test_file, notation="compact", track=True)
+
+
+def test_compact_pickle():
+    test_file = get_file("material/lazy_index.yaml")
+    cfg = confipy.load(test_file, notation="compact")
+    store = confipy.store.FlatStore(confipy._load_flat(test_file))
+    nodes = [cfg, cfg.other.Key2,
+             confipy.notation.CompactNotation(store),
+             confipy.notation.CompactNotation(store, ("other",))]
+
+    for node in nodes:
+        for restored in (pickle.loads(pickle.dumps(node)),
+                         copy.deepcopy(node), copy.copy(node)):
+            assert type(restored) is type(node)
+            assert restored("dict") == node("dict")
+
+
+def test_compact_store():
+    flat_dict = {("node", "key{}".format(idx)): idx for idx in range(20)}
+    flat_dict[("mapping",)] = {1: "one"}
+    flat_dict[("a", "b", "c")] = [1, 2]
+    store = confipy.store.ArrayStore(flat_dict)
+
+    assert len(store) == 22
+    assert sorted(store.items()) == sorted(flat_dict.items())
+    assert list(store.items(("node",)))[3] == (("node", "key3"), 3)
+    assert store.key_chain(store.find(("a", "b", "c"))) == ("a", "b", "c")
+    assert store.find(("node",)) is None and store.is_node(("node",))
+    assert store.find(("a", "b", "c", "d")) is None
+    assert store.children() == {"node": True, "mapping": False, "a": True}
+
+    cfg = confipy.converter._unflat_dict(flat_dict, notation="compact")
+    assert cfg.node.key19 == 19 and cfg.mapping[1] == "one"
+    assert cfg("dict") == confipy.converter._unflat_dict(flat_dict)
+
+
+if __name__ == "__main__":
+    test_lookup()
+    test_lookup_lazy()
+    test_views_memoized()
+    test_views_tracked_update()
+    test_pickle()
+    test_copy()
+    test_compact()
+    test_compact_pickle()
+    test_compact_store()
@@ -1,10 +1,14 @@
 """This module contains tests"""
 
+import six
 import pytest
+import confipy
 import confipy.converter
 import confipy.notation
 import confipy.reader
 import confipy.parser
+import confipy.cache
+import confipy.stats
 import os
 
 
@@ -70,6 +74,96 @@ def test_include_fail():
         included = confipy.parser.include(flattened, file)
 
 
+def test_include_cache():
+    test_file = get_file("material/parser_include_recursive.yaml")
+    cache = confipy.cache.IncludeCache(maxsize=2)
+
+    for _ in range(2):
+        cfg = confipy.reader.read_config(test_file)
+        flattened = confipy.converter._flat_dict(cfg)
+        included = confipy.parser.include(flattened, test_file,
+                                          include_cache=cache)
+        assert included == test_incl_recursive
+
+    assert cache.info() == (2, 2, 2, 2)
+
+    cache.maxsize = 1
+    cache.set(("dummy",), {})
+    assert len(cache) == 1
+
+
+def test_include_cache_copies(tmpdir):
+    tmpdir.join("values.yaml").write("items: [1, 2]")
+    tmpdir.join("main.yaml").write("inc: $include values.yaml")
+    test_file = str(tmpdir.join("main.yaml"))
+    cache = confipy.cache.IncludeCache()
+
+    cfg_a = confipy.load(test_file, notation="dict", include_cache=cache)
+    cfg_a["inc"]["items"].append(3)
+    cfg_b = confipy.load(test_file, notation="dict", include_cache=cache)
+
+    assert cfg_b["inc"]["items"] == [1, 2]
+    assert cache.info().hits == 1
+
+
+def test_include_workers():
+    test_file = get_file("material/parser_include_recursive.yaml")
+    cfg = confipy.reader.read_config(test_file)
+    flattened = confipy.converter._flat_dict(cfg)
+    included = confipy.parser.include(flattened, test_file,
+                                      include_workers=4)
+
+    assert included == test_incl_recursive
+    assert list(included) == list(confipy.parser.include(flattened,
+                                                         test_file))
+
+
+def test_include_repeated():
+    test_file = get_file("material/parser_include_repeated.yaml")
+    cfg = confipy.reader.read_config(test_file)
+    flattened = confipy.converter._flat_dict(cfg)
+
+    for workers in (None, 2):
+        stats = confipy.stats.LoadStats()
+        included = confipy.parser.include(flattened, test_file, stats=stats,
+                                          include_workers=workers)
+        first = included[("service1", "defaults", "Key1")]
+
+        assert included[("service3", "defaults", "Key1")] is first
+        assert len(stats.files) == 6
+        assert sum(file.cached for file in stats.files) == 4
+
+    parsed = confipy.parser.parsing_handler(["include"], flattened,
+                                            source_path=test_file)
+    assert parsed == included
+
+
+def test_include_repeated_mutable(tmpdir):
+    tmpdir.join("hosts.yaml").write("hosts: [a, b]")
+    tmpdir.join("main.yaml").write("svc1: $include hosts.yaml\n"
+                                   "svc2: $include hosts.yaml\n")
+    test_file = str(tmpdir.join("main.yaml"))
+
+    for options in ({}, {"include_workers": 2}, {"lazy": True},
+                    {"stream": True}):
+        cfg = confipy.load(test_file, **options)
+        cfg.svc1.hosts.append("c")
+        assert cfg.svc2.hosts == ["a", "b"]
+
+    cfg = confipy.load(test_file, notation="dict")
+    cfg["svc1"]["hosts"].append("c")
+    assert cfg["svc2"]["hosts"] == ["a", "b"]
+
+
+def test_include_cycle():
+    file = get_file("material/parser_include_cycle.yaml")
+    cfg = confipy.reader.read_config(file)
+    flattened = confipy.converter._flat_dict(cfg)
+
+    with pytest.raises(AssertionError):
+        confipy.parser.include(flattened, file)
+
+
 def test_substitute():
     test_file = get_file("material/parser_substitute.yaml")
     cfg = confipy.reader.read_config(test_file)
@@ -79,11 +173,158 @@ def test_substitute():
     assert subs == test_subs
 
 
+def test_substitute_chain():
+    depth = 5000
+    chain = {("key0",): "value"}
+    chain.update({("key{}".format(idx),): "$key{} + x".format(idx - 1)
+                  for idx in range(1, depth)})
+    subs = confipy.parser.substitute(chain)
+
+    assert subs[("key{}".format(depth - 1),)] == "value" + "x" * (depth - 1)
+
+
+def test_substitute_missing():
+    to_parse = {("key1",): "$key2 + suf", ("key3",): "$key1 + suf"}
+
+    with pytest.raises(confipy.parser.SubstitutionError) as error:
+        confipy.parser.substitute(to_parse)
+
+    assert error.value.missing == {("key1",): [("key2",)]}
+
+
+def test_substitute_cycle():
+    to_parse = {("key1",): "$key2 + suf", ("key2",): "$key1 + suf"}
+
+    with pytest.raises(confipy.parser.SubstitutionError) as error:
+        confipy.parser.substitute(to_parse)
+
+    assert set(error.value.cycle) == {("key1",), ("key2",)}
+
+
+def test_substitute_custom_marker():
+    to_parse = {("key1",): "value1", ("key2",): "%key1 | suf",
+                ("key3",): "%key2 | end"}
+    subs = confipy.parser.substitute(to_parse, splitter=" | ", marker="%")
+
+    assert subs[("key3",)] == "value1sufend"
+
+
+def test_requires_parsing():
+    parsers = ("include", "substitute")
+    cfg = {"key1": {"key2": ["value", 1]}, "key3": 3}
+
+    assert not confipy.parser.requires_parsing(parsers, cfg)
+    assert not confipy.parser.requires_parsing((), {"key": "$key + suf"})
+    assert confipy.parser.requires_parsing(parsers, {"key": ["$a + b"]})
+    assert confipy.parser.requires_parsing(parsers, {"k": "$include a.yaml"})
+    assert confipy.parser.requires_parsing(parsers, {"k": "$a | b"},
+                                           splitter=" | ")
+
+
+def test_parsing_handler_fused():
+    test_file = get_file("material/lazy_index.yaml")
+    flattened = confipy.converter._flat_dict(
+        confipy.reader.read_config(test_file))
+    original = dict(flattened)
+    parsers = ("include", "substitute")
+
+    fused = confipy.parser.parsing_handler(parsers, flattened,
+                                           source_path=test_file)
+    sequential = confipy.parser.parsing_handler(parsers, flattened,
+                                                source_path=test_file,
+                                                include_workers=2)
+
+    assert fused == sequential
+    assert list(fused) == list(sequential)
+    assert fused[("thumbs",)] == "/home/user/images/thumbs/"
+    assert flattened == original
+
+    with pytest.raises(ValueError):
+        confipy.parser.parsing_handler(("unknown",), flattened)
+
+
+def test_register_parser():
+    def upper(key_chain, value, **kwargs):
+        if isinstance(value, list):
+            return [upper(key_chain, element) for element in value]
+        if value.startswith("!upper "):
+            return value[len("!upper "):].upper()
+        return value
+
+    confipy.parser.register_parser("upper", upper, marker="!upper ",
+                                   per_item=True)
+    try:
+        flattened = {("key1",): "!upper value", ("key2",): "$key1 + _suf",
+                     ("key3",): ["!upper a", "$key2 + _b"], ("key4",): 4}
+        parsers = ("upper", "substitute")
+        parsed = confipy.parser.parsing_handler(parsers, flattened)
+
+        assert parsed == {("key1",): "VALUE", ("key2",): "VALUE_suf",
+                          ("key3",): ["A", "VALUE_suf_b"], ("key4",): 4}
+        assert confipy.parser._group_parsers(parsers, {}) == [parsers]
+        assert confipy.parser.requires_parsing(("upper",),
+                                               {"key": ["!upper a"]})
+        assert not confipy.parser.requires_parsing(("upper",), {"key": "a"})
+    finally:
+        del confipy.parser.PARSERS["upper"]
+
+
+def test_register_parser_fused_include():
+    def suffix(key_chain, value, **kwargs):
+        if isinstance(value, six.string_types):
+            return value + "!"
+        return value
+
+    confipy.parser.register_parser("suffix", suffix, per_item=True)
+    try:
+        test_file = get_file("material/lazy_index.yaml")
+        flattened = confipy.converter._flat_dict(
+            confipy.reader.read_config(test_file))
+        parsers = ("include", "suffix", "substitute")
+
+        fused = confipy.parser.parsing_handler(parsers, flattened,
+                                               source_path=test_file)
+        sequential = flattened
+        for parser in parsers:
+            sequential = confipy.parser.parsing_handler(
+                (parser,), sequential, source_path=test_file)
+
+        assert confipy.parser._group_parsers(parsers, {}) == [parsers]
+        assert fused == sequential
+        assert fused[("base",)] == "/home/user/!"
+    finally:
+        del confipy.parser.PARSERS["suffix"]
+
+
+def test_convert_dict():
+    cfg = {"key1": {"key2": {"key3": "value3"}, "empty": {}},
+           "key4": {1: "one", 2: {"key5": "value5"}}, "key6": [1, 2]}
+
+    for notation in ("dict", "dot"):
+        flattened = confipy.converter._flat_dict(cfg, notation=notation)
+        expected = confipy.converter._unflat_dict(flattened, notation=notation)
+        converted = confipy.converter._convert_dict(cfg, notation=notation)
+
+        if notation == "dot":
+            expected, converted = expected("dict"), converted("dict")
+        assert converted == expected
+
+
 def test_unflatten():
     unflatten = confipy.converter._unflat_dict(test_incl_recursive)
     assert unflatten == test_incl_lvl2_unflattend
 
 
+def test_unflatten_existing():
+    existing = {"Lvl1": {}, "Lvl2": {"key": "value"}}
+    flat = {("Lvl1", "key"): "value1", ("Lvl2", "sub", "key"): "value2"}
+    unflatten = confipy.converter._unflat_dict(flat, existing)
+
+    assert unflatten is existing
+    assert unflatten == {"Lvl1": {"key": "value1"},
+                         "Lvl2": {"key": "value", "sub": {"key": "value2"}}}
+
+
 def test_unflatten_dot():
     unflatten = confipy.converter._unflat_dict(test_incl_recursive,
                                                notation="dot")
@@ -97,6 +338,20 @@ if __name__ == "__main__":
     test_include()
     test_include_recursive()
     test_include_fail()
+    test_include_cache()
+    test_include_workers()
+    test_include_repeated()
+    test_include_cycle()
     test_substitute()
+    test_substitute_chain()
+    test_substitute_missing()
+    test_substitute_cycle()
+    test_substitute_custom_marker()
+    test_requires_parsing()
+    test_parsing_handler_fused()
+    test_register_parser()
+    test_register_parser_fused_include()
+    test_convert_dict()
     test_unflatten()
+    test_unflatten_existing()
     test_unflatten_dot()
@@ -56,6 +56,21 @@ def test_yaml_reader():
     assert cfg == test_dict
 
 
+def test_yaml_engine():
+    file = get_file("material/reader_yaml.yaml")
+    cfg = confipy.reader.read_config(file, yaml_engine="python")
+    assert cfg == test_dict
+
+    if "c" in confipy.reader.YAML_LOADERS:
+        assert confipy.reader.read_config(file, yaml_engine="c") == cfg
+
+
+def test_yaml_engine_fail():
+    with pytest.raises(ValueError):
+        confipy.reader.read_config(get_file("material/reader_yaml.yaml"),
+                                   yaml_engine="unknown")
+
+
 def test_json_reader():
     cfg = confipy.reader.read_config(get_file("material/reader_json.json"))
     assert cfg == test_dict
@@ -74,6 +89,49 @@ def test_auto_read():
     assert cfg == test_dict
 
 
+def test_auto_read_sniff(caplog):
+    with open(get_file("material/reader_ini.ini"), "r") as file:
+        cfg = confipy.reader.read_config(file)
+
+    assert cfg["DummySection2"] == test_dict["DummySection2"]
+    assert confipy.reader._sniff_format("key=value") is None
+    assert "fails" not in caplog.text
+
+
+def test_auto_read_sniff_json(tmpdir):
+    path = tmpdir.join("pretty.conf")
+    path.write('{\n  "a":\n  [1]\n}\n')
+
+    assert confipy.reader._sniff_format(path.read()) == "json"
+    assert confipy.reader.read_config(str(path)) == {"a": [1]}
+    assert confipy.reader._sniff_format("[\n[1]\n]") == "json"
+    assert confipy.reader._sniff_format("[sec]\nkey=1") == "configparser"
+    assert confipy.reader._sniff_format("; note\n[sec]\nkey=1") == (
+        "configparser")
+
+    # decided by the first significant line only
+    block = "text: |\n  [section]\n  body\n"
+    assert confipy.reader._sniff_format(block) == "yaml"
+    assert confipy.reader._sniff_format("{a: 1}") == "yaml"
+    assert confipy.reader._sniff_format("[1]") == "json"
+
+    path = tmpdir.join("block.conf")
+    path.write(block)
+    assert confipy.reader.read_config(str(path)) == {
+        "text": "[section]\nbody\n"}
+    path.write("# flow\n{a: 1}")
+    assert confipy.reader.read_config(str(path)) == {"a": 1}
+    path.write("[1]")
+    assert confipy.reader.read_config(str(path)) == [1]
+
+
+def test_auto_read_override():
+    with open(get_file("material/reader_ini.ini"), "r") as file:
+        cfg = confipy.reader.read_config(file, read_engine="configparser")
+
+    assert cfg["DummySection2"] == test_dict["DummySection2"]
+
+
 def test_auto_read_fail():
     with pytest.raises(IOError):
         with open(get_file("material/reader_raiseError.cfg"), "r") as file:
@@ -85,6 +143,9 @@ if __name__ == "__main__":
     test_cfg_reader()
     test_ini_reader()
     test_yaml_reader()
+    test_yaml_engine()
+    test_yaml_engine_fail()
     test_json_reader()
     test_auto_read()
+    test_auto_read_override()
     test_auto_read_fail()
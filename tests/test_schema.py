@@ -0,0 +1,96 @@
+"""This module tests schema-driven config classes."""
+
+import copy
+import pickle
+import pytest
+import confipy
+import confipy.schema
+import os
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+schema_ini = {"DummySection1": {"key1": str,
+                                "list_int": [int],
+                                "list_str": list,
+                                "enabled": confipy.schema.Field(bool, True)},
+              "DummySection2": {"key2": str}}
+
+
+def test_schema():
+    cfg = confipy.load(get_file("material/reader_ini.ini"), schema=schema_ini)
+
+    assert cfg.DummySection1.list_int == [1, 2, 3, 4]
+    assert cfg.DummySection1.list_str == ["A", "B", "C"]
+    assert cfg["DummySection1"].enabled is True
+    assert cfg("lookup", key="DummySection2.key2") == "value2"
+    assert cfg("dict")["DummySection1"]["key1"] == "value1"
+    assert not hasattr(cfg.DummySection1, "__dict__")
+
+    # generated classes are cached
+    assert type(cfg) is confipy.schema.compile_schema(schema_ini)
+    assert type(cfg.DummySection1).__name__ == "ConfigDummySection1"
+
+
+def test_schema_flat():
+    flat_dict = {("db", "port"): "5432", ("db", "debug"): "off",
+                 ("db", "ratio"): 1, ("extra",): None}
+    schema = {"db": {"port": int, "debug": bool, "ratio": float}}
+    cfg = confipy.schema.build(schema, flat_dict)
+
+    assert (cfg.db.port, cfg.db.debug, cfg.db.ratio) == (5432, False, 1.0)
+    assert cfg.db("get", key="port") == 5432
+    assert cfg.db("get", key="from_flat", default=0) == 0
+    assert cfg == confipy.schema.build(schema, flat_dict)
+
+
+def test_schema_pickle():
+    cfg = confipy.load(get_file("material/reader_ini.ini"), schema=schema_ini)
+
+    for restored in (pickle.loads(pickle.dumps(cfg)), copy.deepcopy(cfg)):
+        assert type(restored) is type(cfg) and restored == cfg
+        assert type(restored.DummySection1) is type(cfg.DummySection1)
+
+    section = pickle.loads(pickle.dumps(cfg.DummySection2))
+    assert section == cfg.DummySection2
+
+    results = confipy.load_many([get_file("material/reader_ini.ini")],
+                                workers=1, executor="process",
+                                schema=schema_ini)
+    assert results[0].config == cfg
+
+    # schemas which are not hashable are compiled again
+    schema = {"db": {"hosts": confipy.schema.Field(list, [])}}
+    cfg = confipy.schema.build(schema, {("db", "hosts"): "a, b"})
+    assert pickle.loads(pickle.dumps(cfg)).db.hosts == ["a", "b"]
+
+
+def test_schema_errors():
+    test_file = get_file("material/reader_ini.ini")
+
+    with pytest.raises(confipy.schema.SchemaError) as error:
+        confipy.load(test_file, schema={"DummySection1": {"key1": int}})
+    assert error.value.key_chain == ("DummySection1", "key1")
+
+    with pytest.raises(confipy.schema.SchemaError) as error:
+        confipy.load(test_file, schema={"DummySection1": {"missing": str}})
+    assert error.value.key_chain == ("DummySection1", "missing")
+
+    for invalid in ({"not-valid": str}, {"key": [int, str]}, {"key": 1},
+                    {"from_flat": str}, {"db": {"__class__": str}},
+                    {"_schema_leaves": str}):
+        with pytest.raises(confipy.schema.SchemaError):
+            confipy.schema.compile_schema(invalid)
+
+    with pytest.raises(confipy.schema.SchemaError):
+        confipy.schema.build({"flag": bool}, {("flag",): "maybe"})
+
+
+if __name__ == "__main__":
+    test_schema()
+    test_schema_flat()
+    test_schema_pickle()
+    test_schema_errors()
@@ -0,0 +1,83 @@
+"""This module tests configs shared between processes."""
+
+import os
+import pytest
+import tempfile
+import confipy
+import confipy.binary
+import confipy.shared
+import confipy.converter
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def _read_shared(name, key):
+    with confipy.shared.attach(name=name) as shared:
+        return shared.config("lookup", key=key)
+
+
+def test_binary_index():
+    flat = {("b",): [1, 2], ("a", "c"): "value", ("a", "b", "d"): None,
+            ("ab",): {1: "one"}}
+    index = confipy.binary.BinaryIndex(confipy.binary.encode(
+        flat, metadata={"sources": {}}))
+
+    assert len(index) == 4
+    assert dict(index.items()) == flat
+    assert index.value(index.find(("a", "c"))) == "value"
+    assert index.find(("a",)) is None
+    assert index.is_node(("a",)) and not index.is_node(("ab",))
+    assert list(index.children()) == ["a", "ab", "b"]
+    assert index.children(("a",)) == {"b": True, "c": False}
+    assert index.metadata == {"sources": {}}
+
+    with pytest.raises(TypeError):
+        confipy.binary.encode({(1,): "value"})
+    with pytest.raises(ValueError):
+        confipy.binary.BinaryIndex(b"\x00" * 64)
+
+
+@pytest.mark.skipif(confipy.shared.shared_memory is None,
+                    reason="shared memory requires python 3.8+")
+def test_share_memory():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"))
+
+    with confipy.shared.share(cfg) as shared:
+        view = shared.config
+        assert view("dict") == cfg("dict")
+        assert view.paths.images == cfg.paths.images
+        assert view["other"].Key1 == "Value1"
+        assert view("get", key="missing", default=0) == 0
+        assert set(view("val")) == {"base", "thumbs"}
+
+        with pytest.raises(TypeError):
+            view.base = "changed"
+
+        # attaching within the publishing process keeps its registration
+        with confipy.shared.attach(name=shared.name) as other:
+            assert other.config.base == cfg.base
+
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(_read_shared, shared.name,
+                               "paths.images").result() == cfg.paths.images
+
+
+def test_share_file():
+    cfg = confipy.load(get_file("material/lazy_index.yaml"))
+    path = os.path.join(tempfile.mkdtemp(), "config.bin")
+
+    with confipy.shared.share(cfg, path=path):
+        with confipy.shared.attach(path=path) as shared:
+            assert shared.config("dict") == cfg("dict")
+
+    assert not os.path.exists(path)
+
+
+if __name__ == "__main__":
+    test_binary_index()
+    test_share_memory()
+    test_share_file()
@@ -0,0 +1,112 @@
+"""This module tests immutable config snapshots."""
+
+import os
+import shutil
+import pytest
+import threading
+import confipy
+import confipy.snapshot
+import confipy.watcher
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def test_snapshot():
+    snapshot = confipy.snapshot.Snapshot({("a", "b"): 1, ("c",): [2]},
+                                         version=3)
+
+    assert snapshot.version == 3
+    assert snapshot.config.a.b == 1
+    assert snapshot.config("dict") == {"a": {"b": 1}, "c": (2,)}
+    assert snapshot.config("lookup", key="a.b") == 1
+
+    with pytest.raises(TypeError):
+        snapshot.version = 4
+    with pytest.raises(TypeError):
+        snapshot.config.c = 3
+
+    # leaves are frozen, hence neither the source nor readers modify them
+    flat_dict = {("a", "c"): [1, 2], ("d",): {1: [3]}}
+    snapshot = confipy.snapshot.ConfigHolder().swap(flat_dict)
+    flat_dict[("a", "c")].append(3)
+    flat_dict[("d",)][1].append(4)
+    assert snapshot.config.a.c == (1, 2)
+    assert snapshot.config.d == {1: (3,)}
+    with pytest.raises(AttributeError):
+        snapshot.config.a.c.append(3)
+
+
+def test_holder():
+    test_file = get_file("material/lazy_index.yaml")
+    holder = confipy.snapshot.ConfigHolder(test_file)
+    events = []
+    holder.callbacks.append(events.append)
+
+    first = holder.current
+    assert first.version == 1
+    assert holder.config("dict") == confipy.load(test_file)("dict")
+
+    second = holder.swap({("base",): "/root/"})
+    assert holder.current is second and events == [second]
+    assert second.version == 2
+    assert first.config.base == "/home/user/"
+    assert holder.config("dict") == {"base": "/root/"}
+
+    holder = confipy.snapshot.ConfigHolder(test_file, parsers=["include"])
+    assert holder.config.thumbs == "$paths.images + thumbs/"
+
+    for option in ({"notation": "dict"}, {"track": True}, {"lazy": True}):
+        with pytest.raises(ValueError):
+            confipy.snapshot.ConfigHolder(test_file, **option)
+
+
+def test_holder_concurrent_reads():
+    holder = confipy.snapshot.ConfigHolder()
+    holder.swap({("a",): 0, ("b",): 0})
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            snapshot = holder.current
+            if snapshot.config.a != snapshot.config.b:
+                errors.append(snapshot.version)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for number in range(1, 200):
+        holder.swap({("a",): number, ("b",): number})
+    done.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert holder.current.version == 200
+
+
+def test_holder_follow(tmpdir):
+    for name in ("lazy_index.yaml", "lazy_paths.yaml", "parser_include.yaml",
+                 "parser_flatten_dict.yaml"):
+        shutil.copy(get_file(os.path.join("material", name)), str(tmpdir))
+
+    reloadable = confipy.watcher.ReloadableConfig(
+        str(tmpdir.join("lazy_index.yaml")), key_by="hash")
+    holder = confipy.snapshot.ConfigHolder()
+    holder.follow(reloadable)
+    first = holder.current
+
+    tmpdir.join("lazy_paths.yaml").write("images: $base + img/")
+    reloadable.poll()
+
+    assert holder.config.thumbs == "/home/user/img/thumbs/"
+    assert first.config.thumbs == "/home/user/images/thumbs/"
+
+
+if __name__ == "__main__":
+    test_snapshot()
+    test_holder()
+    test_holder_concurrent_reads()
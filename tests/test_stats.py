@@ -0,0 +1,81 @@
+"""This module tests the instrumentation of the loading pipeline."""
+
+import os
+import confipy
+import confipy.cache
+import confipy.stats
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def test_load_stats():
+    test_file = get_file("material/lazy_index.yaml")
+    events = []
+    stats = confipy.stats.LoadStats(hook=lambda event, info: events.append(
+        event))
+    cache = confipy.cache.IncludeCache()
+
+    cfg = confipy.load(test_file, stats=stats, include_cache=cache)
+
+    assert cfg.thumbs == "/home/user/images/thumbs/"
+    assert list(stats.stages) == ["read", "flatten", "parse.include",
+                                  "parse.substitute", "unflatten"]
+    assert [os.path.basename(file.path) for file in stats.files] == [
+        "lazy_index.yaml", "lazy_paths.yaml", "parser_include.yaml",
+        "parser_flatten_dict.yaml"]
+    assert all(file.bytes > 0 for file in stats.files)
+    assert stats.substitution_passes == 1
+    assert stats.substitution_lookups == 3
+    assert (stats.cache_hits, stats.cache_misses) == (0, 3)
+    assert events.count("read") == 4
+
+    confipy.load(test_file, stats=stats, include_cache=cache)
+    assert stats.cache_hits == 3
+    assert stats.as_dict()["files"][-1]["cached"] is True
+
+
+def test_load_stats_tracked():
+    stats = confipy.stats.LoadStats()
+    confipy.load(get_file("material/lazy_index.yaml"), stats=stats,
+                 track=True)
+
+    assert list(stats.stages) == ["read", "flatten", "parse.include",
+                                  "parse.substitute", "unflatten"]
+
+
+def test_load_stats_nested():
+    stats = confipy.stats.LoadStats()
+    confipy.load(get_file("material/reader_yaml.yaml"), stats=stats)
+
+    assert list(stats.stages) == ["read", "convert"]
+    assert stats.substitution_passes == 0
+
+
+def test_memory_usage():
+    cfg = confipy.load(get_file("material/parser_include_repeated.yaml"))
+    usage = confipy.stats.memory_usage(cfg)
+
+    assert usage.nodes == 19
+    assert usage.keys == 30
+    assert usage.values == usage.key_chains == 12
+
+    # included values and keys are shared across the three services
+    assert usage.unique_values == 6
+    assert usage.unique_keys == 12
+    assert usage.bytes > 0
+
+    assert confipy.stats.memory_usage(cfg("dict"))[1:4] == usage[1:4]
+
+    cfg = confipy.load(get_file("material/parser_include_repeated.yaml"),
+                       notation="compact")
+    assert confipy.stats.memory_usage(cfg)[1:6] == usage[1:6]
+
+
+if __name__ == "__main__":
+    test_load_stats()
+    test_load_stats_tracked()
+    test_load_stats_nested()
+    test_memory_usage()
@@ -0,0 +1,107 @@
+"""This module tests the streaming readers."""
+
+import io
+import six
+import json
+import confipy
+import confipy.reader
+import confipy.stream
+import confipy.converter
+import os
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def read_flat(path, notation="dict"):
+    cfg_dict = confipy.reader.read_config(path)
+    return confipy.converter._flat_dict(cfg_dict, notation=notation)
+
+
+def test_stream_equals_read():
+    for path in ("material/reader_yaml.yaml", "material/reader_json.json",
+                 "material/parser_substitute.yaml",
+                 "material/lazy_paths.yaml"):
+        test_file = get_file(path)
+        for notation in ("dict", "dot"):
+            streamed = confipy.stream.read_flat(test_file, notation=notation)
+            assert streamed == read_flat(test_file, notation)
+
+
+def test_stream_yaml():
+    content = (u"a: {1: x, b: {c: 2}}\n"
+               u"d: &list [1, {e: f}]\n"
+               u"g: *list\n"
+               u"h: !!str 1\n")
+
+    streamed = confipy.stream.read_flat(io.StringIO(content), "yaml")
+    assert streamed == {("a", 1): "x", ("a", "b", "c"): 2,
+                        ("d",): [1, {"e": "f"}], ("g",): [1, {"e": "f"}],
+                        ("h",): "1"}
+
+    # mappings with non-string keys are kept as values for dot notation
+    streamed = confipy.stream.read_flat(io.StringIO(content), "yaml",
+                                        notation="dot")
+    assert streamed[("a",)] == {1: "x", "b": {"c": 2}}
+
+
+def test_stream_yaml_fallback():
+    content = (u"base: &base {a: 1}\n"
+               u"alias: *base\n"
+               u"merged:\n"
+               u"  <<: *base\n"
+               u"  b: 2\n")
+
+    streamed = confipy.stream.read_flat(io.StringIO(content), "yaml")
+    assert streamed == {("base", "a"): 1, ("alias", "a"): 1,
+                        ("merged", "a"): 1, ("merged", "b"): 2}
+
+
+def test_stream_json():
+    cfg_dict = {"a": {"b": [1, {"c": 2.5}], "d": None},
+                "e": {"f": {"g": u"hé\""}}, "i": -1}
+    content = six.text_type(json.dumps(cfg_dict, indent=2))
+
+    expected = confipy.converter._flat_dict(cfg_dict)
+    assert confipy.stream._stream_json(io.StringIO(content)) == expected
+
+    # values split across chunks
+    fp = io.StringIO(content)
+    fp.read = lambda size=-1, read=fp.read: read(3)
+    assert confipy.stream._stream_json(fp) == expected
+
+    # numbers, strings and literals straddling a chunk boundary
+    content = u'{"n": 1.5e3, "s": "text", "l": true, "z": null, "m": -12}'
+    expected = {(key,): value for key, value in json.loads(content).items()}
+    for split in range(1, len(content)):
+        chunks = [content[:split], content[split:]]
+        fp = io.StringIO(content)
+        fp.read = lambda size=-1: chunks.pop(0) if chunks else u""
+        assert confipy.stream._stream_json(fp) == expected
+
+    for invalid in (u'{"a": 1,}', u'{"a" 1}', u'{"a": 1} x', u'{"a": tru}'):
+        try:
+            confipy.stream.read_flat(io.StringIO(invalid), "json")
+        except ValueError:
+            continue
+        raise AssertionError(invalid)
+
+
+def test_load_stream():
+    test_file = get_file("material/parser_include.yaml")
+    cfg = confipy.load(test_file, stream=True)
+    assert cfg("dict") == confipy.load(test_file)("dict")
+
+    test_file = get_file("material/parser_substitute.yaml")
+    cfg = confipy.load(test_file, stream=True, notation="dict")
+    assert cfg == confipy.load(test_file, notation="dict")
+
+
+if __name__ == "__main__":
+    test_stream_equals_read()
+    test_stream_yaml()
+    test_stream_yaml_fallback()
+    test_stream_json()
+    test_load_stream()
@@ -0,0 +1,94 @@
+"""This module tests configs tracking substitution dependencies."""
+
+import os
+import pytest
+import confipy
+import confipy.parser
+import confipy.tracking
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+def test_track_equals_load():
+    test_file = get_file("material/lazy_index.yaml")
+    tracked = confipy.load(test_file, track=True)
+
+    assert isinstance(tracked, confipy.tracking.TrackedConfig)
+    assert tracked.config("dict") == confipy.load(test_file)("dict")
+
+
+def test_track_update():
+    tracked = confipy.load(get_file("material/lazy_index.yaml"), track=True)
+    cfg = tracked.config
+
+    assert tracked.dependents("base") == {("paths", "images"),
+                                          ("paths", "downloads"),
+                                          ("thumbs",)}
+
+    changed = tracked.update("base", "/srv/")
+    assert changed == [("base",), ("paths", "downloads"),
+                       ("paths", "images"), ("thumbs",)]
+    assert tracked.config is cfg
+    assert cfg.thumbs == "/srv/images/thumbs/"
+
+    # values may introduce new substitutions
+    tracked.update(("paths", "images"), "$base + pictures/")
+    assert cfg.thumbs == "/srv/pictures/thumbs/"
+    assert tracked.dependents("base") == {("paths", "images"),
+                                          ("paths", "downloads"),
+                                          ("thumbs",)}
+    assert tracked.update(("other", "Key1"), "Value1") == []
+
+
+def test_track_update_replace():
+    tracked = confipy.load(get_file("material/lazy_index.yaml"), track=True)
+    cfg = tracked.config
+
+    # node replaced by value
+    tracked.update("other.Key2", "flat")
+    assert cfg.other.Key2 == "flat"
+    assert not [key_chain for key_chain in tracked.index.raw
+                if key_chain[:2] == ("other", "Key2") and len(key_chain) > 2]
+    tracked.update(("other", "Key2", "level1"), "nested")
+    assert cfg("dict")["other"] == {"Key1": "Value1",
+                                    "Key2": {"level1": "nested"}}
+
+    # value replaced by node
+    tracked.update(("other", "Key1", "sub"), "value")
+    assert ("other", "Key1") not in tracked.index.resolved
+    assert cfg.other.Key1.sub == "value"
+
+    # dependents of replaced values are resolved again
+    with pytest.raises(confipy.parser.SubstitutionError):
+        tracked.update("paths", "flat")
+    assert tracked.index.raw[("paths", "images")] == "$base + images/"
+    assert cfg.paths.downloads == "/home/user/downloads/"
+
+    with pytest.raises(confipy.parser.SubstitutionError):
+        tracked.update(("base", "sub"), "value")
+    assert cfg.base == "/home/user/"
+
+
+def test_track_update_fail():
+    tracked = confipy.load(get_file("material/lazy_index.yaml"), track=True)
+
+    with pytest.raises(confipy.parser.SubstitutionError):
+        tracked.update("base", "$thumbs + suf")
+
+    assert tracked.index.raw[("base",)] == "/home/user/"
+    assert tracked.config.thumbs == "/home/user/images/thumbs/"
+
+
+def test_dependency_index():
+    raw = {("a",): "a", ("b",): "$a + b", ("c",): "$b + c"}
+    index = confipy.tracking.DependencyIndex(raw)
+
+    updates, removed = index.apply({("b",): "b"})
+    assert updates == {("b",): "b", ("c",): "bc"}
+    assert index.dependents == {("b",): {("c",)}}
+
+    with pytest.raises(confipy.parser.SubstitutionError):
+        index.apply({}, removed=[("b",)])
@@ -0,0 +1,71 @@
+"""This module tests the reloadable config."""
+
+import os
+import shutil
+import pytest
+import confipy.parser
+import confipy.watcher
+
+
+def get_file(path):
+    cur_dir = os.path.dirname(__file__)
+    return os.path.join(cur_dir, path)
+
+
+@pytest.fixture
+def reloadable(tmpdir):
+    for name in ("lazy_index.yaml", "lazy_paths.yaml", "parser_include.yaml",
+                 "parser_flatten_dict.yaml"):
+        shutil.copy(get_file(os.path.join("material", name)), str(tmpdir))
+
+    return confipy.watcher.ReloadableConfig(
+        str(tmpdir.join("lazy_index.yaml")), key_by="hash")
+
+
+def test_reload_include(tmpdir, reloadable):
+    cfg = reloadable.config
+    events = []
+    reloadable.callbacks.append(events.append)
+
+    assert reloadable.poll() == []
+
+    tmpdir.join("lazy_paths.yaml").write("images: $base + img/")
+    changed = reloadable.poll()
+
+    assert changed == [("paths", "downloads"), ("paths", "images"),
+                       ("thumbs",)]
+    assert events == [changed]
+    assert reloadable.config is cfg
+    assert cfg.thumbs == "/home/user/img/thumbs/"
+    assert "downloads" not in vars(cfg.paths)
+    assert cfg.other.Key1 == "Value1"
+
+
+def test_reload_nested_include(tmpdir, reloadable):
+    tmpdir.join("parser_flatten_dict.yaml").write("level1: changed")
+
+    assert reloadable.poll() == [("other", "Key2", "level1"),
+                                 ("other", "Key2", "level1", "level2",
+                                  "level3", "key1"),
+                                 ("other", "Key2", "level1", "level2",
+                                  "level3", "key2")]
+    assert reloadable.config.other.Key2.level1 == "changed"
+
+
+def test_reload_root(tmpdir, reloadable):
+    tmpdir.join("lazy_index.yaml").write("base: /root/\n"
+                                         "paths: $include lazy_paths.yaml")
+
+    assert ("thumbs",) in reloadable.poll()
+    assert reloadable.config("dict") == {
+        "base": "/root/", "paths": {"images": "/root/images/",
+                                    "downloads": "/root/downloads/"}}
+
+
+def test_reload_fail(tmpdir, reloadable):
+    tmpdir.join("lazy_index.yaml").write("thumbs: $paths.images + thumbs/")
+
+    with pytest.raises(confipy.parser.SubstitutionError):
+        reloadable.poll()
+
+    assert reloadable.config.thumbs == "/home/user/images/thumbs/"